@@ -29,6 +29,7 @@ class MCPToolDefinitions:
             # MCPToolDefinitions._get_read_multiple_files_tool(),
             # MCPToolDefinitions._get_read_code_mem_tool(),
             MCPToolDefinitions._get_write_file_tool(),
+            MCPToolDefinitions._get_apply_edits_tool(),
             # MCPToolDefinitions._get_write_multiple_files_tool(),
             # MCPToolDefinitions._get_execute_python_tool(),
             # MCPToolDefinitions._get_execute_bash_tool(),
@@ -55,6 +56,10 @@ class MCPToolDefinitions:
                         "type": "integer",
                         "description": "End line number (starting from 1, optional)",
                     },
+                    "max_bytes": {
+                        "type": "integer",
+                        "description": "Byte budget for the returned content; longer ranges are cut at a line boundary with a truncation marker (optional, 0 for no limit)",
+                    },
                 },
                 "required": ["file_path"],
             },
@@ -71,7 +76,7 @@ class MCPToolDefinitions:
                 "properties": {
                     "file_requests": {
                         "type": "string",
-                        "description": 'JSON string with file requests, e.g., \'{"file1.py": {}, "file2.py": {"start_line": 1, "end_line": 10}}\' or simple array \'["file1.py", "file2.py"]\'',
+                        "description": 'JSON string with file requests, e.g., \'{"file1.py": {}, "file2.py": {"start_line": 1, "end_line": 10, "max_bytes": 20000}}\' or simple array \'["file1.py", "file2.py"]\'',
                     },
                     "max_files": {
                         "type": "integer",
@@ -171,6 +176,29 @@ class MCPToolDefinitions:
             },
         }
 
+    @staticmethod
+    def _get_apply_edits_tool() -> Dict[str, Any]:
+        """增量编辑文件工具定义"""
+        return {
+            "name": "apply_edits",
+            "description": "Edit existing files with unified diffs or exact search/replace blocks instead of rewriting them. All edits are checked first; if any conflicts, no file is changed and the conflicts are reported. Returns a compact diff summary.",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "edits": {
+                        "type": "string",
+                        "description": 'Unified diff text (with ---/+++ file headers), or a JSON string, e.g., \'[{"file_path": "model.py", "search": "lr = 0.1", "replace": "lr = 0.01"}]\' or \'{"model.py": "@@ -10,3 +10,3 @@ ..."}\'. A search block must match exactly once unless "replace_all": true is set',
+                    },
+                    "dry_run": {
+                        "type": "boolean",
+                        "description": "Only check that the edits apply and return the diff summary",
+                        "default": False,
+                    },
+                },
+                "required": ["edits"],
+            },
+        }
+
     @staticmethod
     def _get_execute_python_tool() -> Dict[str, Any]:
         """Python执行工具定义"""
@@ -233,6 +261,10 @@ class MCPToolDefinitions:
                         "description": "Maximum traversal depth",
                         "default": 5,
                     },
+                    "since_version": {
+                        "type": "integer",
+                        "description": "Only list files added, modified or removed after this snapshot version (returned as 'version' by earlier calls)",
+                    },
                 },
             },
         }
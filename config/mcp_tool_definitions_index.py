@@ -29,6 +29,7 @@ class MCPToolDefinitions:
             # MCPToolDefinitions._get_read_multiple_files_tool(),
             # MCPToolDefinitions._get_read_code_mem_tool(),
             MCPToolDefinitions._get_write_file_tool(),
+            MCPToolDefinitions._get_apply_edits_tool(),
             # MCPToolDefinitions._get_write_multiple_files_tool(),
             # MCPToolDefinitions._get_execute_python_tool(),
             # MCPToolDefinitions._get_execute_bash_tool(),
@@ -78,6 +79,10 @@ class MCPToolDefinitions:
                         "type": "integer",
                         "description": "End line number (starting from 1, optional)",
                     },
+                    "max_bytes": {
+                        "type": "integer",
+                        "description": "Byte budget for the returned content; longer ranges are cut at a line boundary with a truncation marker (optional, 0 for no limit)",
+                    },
                 },
                 "required": ["file_path"],
             },
@@ -94,7 +99,7 @@ class MCPToolDefinitions:
                 "properties": {
                     "file_requests": {
                         "type": "string",
-                        "description": 'JSON string with file requests, e.g., \'{"file1.py": {}, "file2.py": {"start_line": 1, "end_line": 10}}\' or simple array \'["file1.py", "file2.py"]\'',
+                        "description": 'JSON string with file requests, e.g., \'{"file1.py": {}, "file2.py": {"start_line": 1, "end_line": 10, "max_bytes": 20000}}\' or simple array \'["file1.py", "file2.py"]\'',
                     },
                     "max_files": {
                         "type": "integer",
@@ -194,6 +199,29 @@ class MCPToolDefinitions:
             },
         }
 
+    @staticmethod
+    def _get_apply_edits_tool() -> Dict[str, Any]:
+        """增量编辑文件工具定义"""
+        return {
+            "name": "apply_edits",
+            "description": "Edit existing files with unified diffs or exact search/replace blocks instead of rewriting them. All edits are checked first; if any conflicts, no file is changed and the conflicts are reported. Returns a compact diff summary.",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "edits": {
+                        "type": "string",
+                        "description": 'Unified diff text (with ---/+++ file headers), or a JSON string, e.g., \'[{"file_path": "model.py", "search": "lr = 0.1", "replace": "lr = 0.01"}]\' or \'{"model.py": "@@ -10,3 +10,3 @@ ..."}\'. A search block must match exactly once unless "replace_all": true is set',
+                    },
+                    "dry_run": {
+                        "type": "boolean",
+                        "description": "Only check that the edits apply and return the diff summary",
+                        "default": False,
+                    },
+                },
+                "required": ["edits"],
+            },
+        }
+
     @staticmethod
     def _get_execute_python_tool() -> Dict[str, Any]:
         """Python执行工具定义"""
@@ -256,6 +284,10 @@ class MCPToolDefinitions:
                         "description": "Maximum traversal depth",
                         "default": 5,
                     },
+                    "since_version": {
+                        "type": "integer",
+                        "description": "Only list files added, modified or removed after this snapshot version (returned as 'version' by earlier calls)",
+                    },
                 },
             },
         }
@@ -319,6 +351,11 @@ class MCPToolDefinitions:
                         "type": "string",
                         "description": "Specify search directory (optional)",
                     },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "Stop searching once this many matches were found",
+                        "default": 50,
+                    },
                 },
                 "required": ["pattern"],
             },
@@ -329,7 +366,7 @@ class MCPToolDefinitions:
         """操作历史工具定义"""
         return {
             "name": "get_operation_history",
-            "description": "Get operation history",
+            "description": "Get recent operations (optionally filtered by action or file path) and lifetime counters such as writes per file and execution failure rate",
             "input_schema": {
                 "type": "object",
                 "properties": {
@@ -338,6 +375,19 @@ class MCPToolDefinitions:
                         "description": "Return the last N operations",
                         "default": 10,
                     },
+                    "action": {
+                        "type": "string",
+                        "description": "Only return operations of this action, e.g. 'write_file' (optional)",
+                    },
+                    "file_path": {
+                        "type": "string",
+                        "description": "Only return operations on this file (optional)",
+                    },
+                    "stats_only": {
+                        "type": "boolean",
+                        "description": "Only return the aggregate counters",
+                        "default": False,
+                    },
                 },
             },
         }
@@ -948,6 +948,7 @@ CORE PRINCIPLES:
 
 AVAILABLE TOOLS:
 - write_file: Create complete file implementations
+- apply_edits: Change existing files with diffs or search/replace blocks
 - read_file: Review existing code for context
 - get_file_structure: Understand project organization
 - search_code_references: Find patterns and references from indexed code
@@ -1071,6 +1072,7 @@ Build incrementally using multiple tool calls. For each step:
   - **Core principle**: Original paper requirements take absolute priority over any reference code found
 3. **TOOL EXECUTION STRATEGY**:
   - ⚠️**Development Cycle (for each new file implementation)**: `search_code_references` (OPTIONAL reference check from indexes library in working directory) → `write_file` (implement based on original paper)
+  - **Fixing an existing file**: `apply_edits` (unified diff or exact search/replace blocks) instead of rewriting the whole file with `write_file`
 
 4. **CRITICAL**: Use bash and python tools to ACTUALLY REPLICATE the paper yourself - do not provide instructions.
 
@@ -1128,6 +1130,7 @@ Build incrementally using multiple tool calls. For each step:
   - **Core principle**: Original paper requirements take absolute priority over any reference code found
 3. **TOOL EXECUTION STRATEGY**:
   - ⚠️**Development Cycle (for each new file implementation)**: `search_code_references` (OPTIONAL reference check from `/home/agent/indexes`) → `write_file` (implement based on original paper)
+  - **Fixing an existing file**: `apply_edits` (unified diff or exact search/replace blocks) instead of rewriting the whole file with `write_file`
 
 **Execution Guidelines**:
 - **Plan First**: Before each action, explain your reasoning and which function you'll use
@@ -1229,6 +1232,7 @@ Build incrementally using multiple tool calls. For each step:
 
 2. **TOOL EXECUTION STRATEGY**:
   - **Development Cycle (for each new file implementation)**: `write_file` (implement)
+  - **Fixing an existing file**: `apply_edits` (unified diff or exact search/replace blocks) instead of rewriting the whole file with `write_file`
 
 **Execution Guidelines**:
 - **Plan First**: Before each action, explain your reasoning and which function you'll use
@@ -13,18 +13,35 @@ python tools/code_implementation_server.py
 """
 
 import os
-import subprocess
+import asyncio
 import json
+import signal
+import subprocess
 import sys
 import io
-from pathlib import Path
+import time
+from pathlib import Path, PurePosixPath
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Set
 import tempfile
 import shutil
+import bisect
+import difflib
+import fnmatch
+import mmap
+import atexit
+from array import array
+from collections import Counter, OrderedDict, deque
 import logging
 from datetime import datetime
 
+try:
+    import resource
+
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
 # Set standard output encoding to UTF-8
 if sys.stdout.encoding != "utf-8":
     try:
@@ -40,6 +57,19 @@ if sys.stdout.encoding != "utf-8":
 # Import MCP related modules
 from mcp.server.fastmcp import FastMCP
 
+# Allow running as a script from any working directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from utils.workspace_snapshot import (
+    get_workspace_snapshot,
+    mark_snapshots_stale,
+    notify_file_changed,
+)
+from utils.tool_result_shaping import shape_tool_result
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -49,9 +79,75 @@ mcp = FastMCP("code-implementation-server")
 
 # Global variables: workspace directory and operation history
 WORKSPACE_DIR = None
-OPERATION_HISTORY = []
+OPERATION_HISTORY = None
 CURRENT_FILES = {}
 
+# Operations kept in memory; all of them are journaled to
+# {workspace parent}/operation_history.jsonl in batches
+OPERATION_HISTORY_SIZE = int(os.environ.get("OPERATION_HISTORY_SIZE", "1000"))
+OPERATION_JOURNAL_FILENAME = "operation_history.jsonl"
+OPERATION_JOURNAL_FLUSH_SECONDS = 5.0
+OPERATION_JOURNAL_FLUSH_BATCH = 50
+
+# Code execution limits: bytes kept per output stream and parallel executions
+EXECUTION_MAX_OUTPUT_BYTES = int(
+    os.environ.get("EXECUTION_MAX_OUTPUT_BYTES", str(256 * 1024))
+)
+EXECUTION_MAX_CONCURRENCY = int(os.environ.get("EXECUTION_MAX_CONCURRENCY", "4"))
+EXECUTION_SEMAPHORE = None
+# Seconds to keep reading output after the command exited while background
+# jobs it started still hold its stdout/stderr
+EXECUTION_OUTPUT_GRACE_SECONDS = 5
+
+# Resource limits applied to every execution on POSIX systems (0 disables a
+# limit): CPU seconds per run, address space, processes of the user (the
+# kernel counts all of the user's processes and threads) and size of any
+# single written file. The address space limit is off by default: CUDA,
+# PyTorch and JAX reserve far more virtual memory than they use and fail
+# to initialize under it.
+EXECUTION_CPU_SECONDS = int(os.environ.get("EXECUTION_CPU_SECONDS", "600"))
+EXECUTION_MEMORY_MB = int(os.environ.get("EXECUTION_MEMORY_MB", "0"))
+EXECUTION_MAX_PROCESSES = int(os.environ.get("EXECUTION_MAX_PROCESSES", "4096"))
+EXECUTION_MAX_FILE_MB = int(os.environ.get("EXECUTION_MAX_FILE_MB", "1024"))
+
+# Warm Python workers for execute_python (pool size 0 spawns a fresh
+# interpreter per call); workers are recycled after a number of runs or
+# once their resident memory exceeds the limit
+PYTHON_WORKER_POOL_SIZE = int(os.environ.get("PYTHON_WORKER_POOL_SIZE", "2"))
+PYTHON_WORKER_PRELOAD = [
+    module.strip()
+    for module in os.environ.get("PYTHON_WORKER_PRELOAD", "numpy,pandas").split(",")
+    if module.strip()
+]
+PYTHON_WORKER_MAX_RUNS = int(os.environ.get("PYTHON_WORKER_MAX_RUNS", "50"))
+PYTHON_WORKER_MAX_RSS_MB = int(os.environ.get("PYTHON_WORKER_MAX_RSS_MB", "1024"))
+PYTHON_WORKER_POOL = None
+
+# Line-offset indexes of recently read files (LRU), and the default byte
+# budget of a single read (0 disables it)
+LINE_INDEX_CACHE = OrderedDict()
+LINE_INDEX_CACHE_SIZE = 128
+READ_FILE_MAX_BYTES = int(os.environ.get("READ_FILE_MAX_BYTES", str(1024 * 1024)))
+
+# Parsed implement_code_summary.md files used by read_code_mem
+SUMMARY_STORES = {}
+
+# Trigram search indexes per search root (LRU); files above the size limit
+# are not held in memory and are scanned from disk instead. Indexes re-stat
+# the tree after code execution or once the refresh interval has passed.
+# Roots outside the workspace are scanned directly; they are indexed only
+# once searched repeatedly, and only if their files are small enough in
+# total for indexing to pay off.
+SEARCH_INDEXES = OrderedDict()
+SEARCH_INDEX_CACHE_SIZE = 4
+SEARCH_INDEX_MAX_FILE_BYTES = 1024 * 1024
+SEARCH_INDEX_REFRESH_SECONDS = 30
+SEARCH_INDEX_MIN_SCANS = 2
+SEARCH_INDEX_MAX_TREE_BYTES = 16 * 1024 * 1024
+# Search root -> [direct scans, bytes of indexable files at the last scan]
+SEARCHED_ROOTS = OrderedDict()
+SEARCHED_ROOTS_SIZE = 64
+
 
 def initialize_workspace(workspace_dir: str = None):
     """
@@ -100,19 +196,262 @@ def validate_path(path: str) -> Path:
     return full_path
 
 
+WRITE_ACTIONS = {"write_file", "write_file_multi", "apply_edits"}
+EXECUTION_ACTIONS = {
+    "execute_python",
+    "execute_python_timeout",
+    "execute_python_error",
+    "execute_bash",
+    "execute_bash_timeout",
+    "execute_bash_error",
+    "execute_bash_blocked",
+}
+
+
+def _operation_file_paths(details: Dict[str, Any]) -> List[str]:
+    """File paths an operation touched, from its logged details"""
+    file_paths = []
+    if isinstance(details.get("file_path"), str):
+        file_paths.append(details["file_path"])
+    for key in ("file_paths", "files"):
+        value = details.get(key)
+        if isinstance(value, (list, dict)):
+            file_paths.extend(path for path in value if isinstance(path, str))
+    return file_paths
+
+
+class OperationHistory:
+    """
+    Ring buffer of recent operations backed by an append-only JSONL journal
+
+    Recent records are indexed by action and by file path, and lifetime
+    counters (operations per action, writes per file, execution failures)
+    are kept up to date as operations are logged.
+    """
+
+    def __init__(self, capacity: int):
+        self.records = deque(maxlen=capacity)
+        self.by_action: Dict[str, deque] = {}
+        self.by_file: Dict[str, deque] = {}
+        self.total_operations = 0
+        self.action_counts = Counter()
+        self.writes_per_file = Counter()
+        self.executions = 0
+        self.execution_failures = 0
+        self.pending = []
+        self.last_flush = time.monotonic()
+        self.journal_path = None
+
+    def record(self, action: str, details: Dict[str, Any]):
+        self.total_operations += 1
+        record = {
+            "sequence": self.total_operations,
+            "timestamp": datetime.now().isoformat(),
+            "action": action,
+            "details": details,
+        }
+        file_paths = _operation_file_paths(details)
+
+        if len(self.records) == self.records.maxlen:
+            # The evicted record is the oldest entry of each of its indexes
+            evicted = self.records[0]
+            for index, keys in (
+                (self.by_action, [evicted["action"]]),
+                (self.by_file, _operation_file_paths(evicted["details"])),
+            ):
+                for key in keys:
+                    bucket = index.get(key)
+                    if bucket and bucket[0] is evicted:
+                        bucket.popleft()
+                        if not bucket:
+                            del index[key]
+        self.records.append(record)
+        self.by_action.setdefault(action, deque()).append(record)
+        for file_path in dict.fromkeys(file_paths):
+            self.by_file.setdefault(file_path, deque()).append(record)
+
+        self.action_counts[action] += 1
+        # Conflicting and dry-run edits are logged but change no file
+        if (
+            action in WRITE_ACTIONS
+            and details.get("status", "success") == "success"
+            and not details.get("dry_run")
+        ):
+            self.writes_per_file.update(file_paths)
+        if action in EXECUTION_ACTIONS:
+            self.executions += 1
+            if action not in ("execute_python", "execute_bash") or details.get(
+                "return_code"
+            ):
+                self.execution_failures += 1
+
+        self.pending.append(record)
+        if (
+            len(self.pending) >= OPERATION_JOURNAL_FLUSH_BATCH
+            or time.monotonic() - self.last_flush >= OPERATION_JOURNAL_FLUSH_SECONDS
+        ):
+            self.flush()
+
+    def flush(self):
+        """Append pending records to the journal next to the workspace"""
+        self.last_flush = time.monotonic()
+        if not self.pending or WORKSPACE_DIR is None or not WORKSPACE_DIR.exists():
+            return
+        journal_path = WORKSPACE_DIR.parent / OPERATION_JOURNAL_FILENAME
+        try:
+            with open(journal_path, "a", encoding="utf-8") as f:
+                f.write(
+                    "".join(
+                        json.dumps(record, ensure_ascii=False, default=str) + "\n"
+                        for record in self.pending
+                    )
+                )
+            self.pending = []
+            self.journal_path = journal_path
+        except OSError as e:
+            logger.warning(f"Failed to write operation journal {journal_path}: {e}")
+
+    def query(
+        self, last_n: int = 10, action: str = "", file_path: str = ""
+    ) -> List[Dict[str, Any]]:
+        """Most recent records, optionally only one action and/or file"""
+        if action and file_path:
+            records = [
+                record
+                for record in self.by_file.get(file_path, ())
+                if record["action"] == action
+            ]
+        elif action:
+            records = self.by_action.get(action, ())
+        elif file_path:
+            records = self.by_file.get(file_path, ())
+        else:
+            records = self.records
+        records = list(records)
+        return records[-last_n:] if last_n > 0 else records
+
+    def stats(self) -> Dict[str, Any]:
+        """Lifetime counters, cheap enough to poll every iteration"""
+        return {
+            "total_operations": self.total_operations,
+            "operations_by_action": dict(self.action_counts),
+            "total_writes": sum(self.writes_per_file.values()),
+            "writes_per_file": dict(self.writes_per_file),
+            "executions": self.executions,
+            "execution_failures": self.execution_failures,
+            "execution_failure_rate": (
+                round(self.execution_failures / self.executions, 3)
+                if self.executions
+                else 0.0
+            ),
+        }
+
+
 def log_operation(action: str, details: Dict[str, Any]):
     """Log operation history"""
-    OPERATION_HISTORY.append(
-        {"timestamp": datetime.now().isoformat(), "action": action, "details": details}
-    )
+    OPERATION_HISTORY.record(action, details)
+
+
+OPERATION_HISTORY = OperationHistory(OPERATION_HISTORY_SIZE)
+atexit.register(OPERATION_HISTORY.flush)
 
 
 # ==================== File Operation Tools ====================
 
 
+def get_line_offsets(full_path: Path) -> array:
+    """
+    Byte offset of the start of every line, cached until mtime or size change
+
+    A trailing entry holds the file size, so line ``n`` (0-based) spans
+    ``offsets[n]:offsets[n + 1]``.
+    """
+    stats = full_path.stat()
+    signature = (stats.st_mtime_ns, stats.st_size)
+    key = str(full_path)
+    cached = LINE_INDEX_CACHE.get(key)
+    if cached is not None and cached[0] == signature:
+        LINE_INDEX_CACHE.move_to_end(key)
+        return cached[1]
+
+    offsets = array("Q", [0])
+    if stats.st_size:
+        with open(full_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                position = mapped.find(b"\n")
+                while position != -1:
+                    offsets.append(position + 1)
+                    position = mapped.find(b"\n", position + 1)
+        if offsets[-1] != stats.st_size:
+            offsets.append(stats.st_size)
+
+    LINE_INDEX_CACHE[key] = (signature, offsets)
+    if len(LINE_INDEX_CACHE) > LINE_INDEX_CACHE_SIZE:
+        LINE_INDEX_CACHE.popitem(last=False)
+    return offsets
+
+
+def read_line_range(
+    full_path: Path,
+    start_line: int = None,
+    end_line: int = None,
+    max_bytes: int = None,
+) -> Dict[str, Any]:
+    """
+    Read 1-based lines [start_line, end_line] by decoding only their bytes
+
+    When the range exceeds ``max_bytes`` (defaults to READ_FILE_MAX_BYTES,
+    0 disables the budget) it is cut at the last complete line within the
+    budget and a truncation marker is appended.
+    """
+    if max_bytes is None:
+        max_bytes = READ_FILE_MAX_BYTES
+
+    offsets = get_line_offsets(full_path)
+    file_total_lines = len(offsets) - 1
+    start_index = max((start_line or 1) - 1, 0)
+    end_index = min(end_line if end_line else file_total_lines, file_total_lines)
+    end_index = max(end_index, start_index)
+
+    start_offset = offsets[start_index] if start_index < file_total_lines else 0
+    end_offset = offsets[end_index] if end_index > start_index else start_offset
+    requested_bytes = end_offset - start_offset
+
+    truncated = False
+    if max_bytes and requested_bytes > max_bytes:
+        # Cut at the last line boundary inside the budget (at least one line)
+        truncated = True
+        last_index = bisect.bisect_right(offsets, start_offset + max_bytes) - 1
+        last_index = max(last_index, start_index + 1)
+        end_offset = min(offsets[last_index], start_offset + max_bytes)
+        end_index = last_index
+
+    with open(full_path, "rb") as f:
+        f.seek(start_offset)
+        raw = f.read(end_offset - start_offset)
+    # Match text-mode reads: universal newlines, and never split a character
+    content = raw.decode("utf-8", errors="ignore" if truncated else "strict")
+    content = content.replace("\r\n", "\n").replace("\r", "\n")
+
+    if truncated:
+        content += (
+            f"\n... [truncated at {max_bytes} bytes: showing lines "
+            f"{start_index + 1}-{end_index}, "
+            f"{requested_bytes - len(raw)} more bytes in the requested range]"
+        )
+
+    return {
+        "content": content,
+        "lines_read": end_index - start_index,
+        "file_total_lines": file_total_lines,
+        "size_bytes": len(raw),
+        "truncated": truncated,
+    }
+
+
 @mcp.tool()
 async def read_file(
-    file_path: str, start_line: int = None, end_line: int = None
+    file_path: str, start_line: int = None, end_line: int = None, max_bytes: int = None
 ) -> str:
     """
     Read file content, supports specifying line number range
@@ -121,6 +460,7 @@ async def read_file(
         file_path: File path, relative to workspace
         start_line: Starting line number (1-based, optional)
         end_line: Ending line number (1-based, optional)
+        max_bytes: Byte budget for the returned content (optional, 0 for no limit)
 
     Returns:
         JSON string of file content or error message
@@ -135,24 +475,21 @@ async def read_file(
             )
             return json.dumps(result, ensure_ascii=False, indent=2)
 
-        with open(full_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        # 处理行号范围
-        if start_line is not None or end_line is not None:
-            start_idx = (start_line - 1) if start_line else 0
-            end_idx = end_line if end_line else len(lines)
-            lines = lines[start_idx:end_idx]
-
-        content = "".join(lines)
+        # 处理行号范围 (only the requested lines are read and decoded)
+        read_result = read_line_range(full_path, start_line, end_line, max_bytes)
 
         result = {
             "status": "success",
-            "content": content,
+            "content": read_result["content"],
             "file_path": file_path,
-            "total_lines": len(lines),
-            "size_bytes": len(content.encode("utf-8")),
+            "total_lines": read_result["lines_read"],
+            "file_total_lines": read_result["file_total_lines"],
+            "size_bytes": read_result["size_bytes"],
+            "truncated": read_result["truncated"],
         }
+        if start_line is not None:
+            # Line numbers of elision markers count from here
+            result["start_line"] = start_line
 
         log_operation(
             "read_file",
@@ -160,11 +497,11 @@ async def read_file(
                 "file_path": file_path,
                 "start_line": start_line,
                 "end_line": end_line,
-                "lines_read": len(lines),
+                "lines_read": read_result["lines_read"],
             },
         )
 
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return shape_tool_result("read_file", result)
 
     except Exception as e:
         result = {
@@ -184,6 +521,7 @@ async def read_multiple_files(file_requests: str, max_files: int = 5) -> str:
     Args:
         file_requests: JSON string with file requests, e.g.,
                       '{"file1.py": {}, "file2.py": {"start_line": 1, "end_line": 10}}'
+                      (each entry may also set "max_bytes" to cap that file's content)
                       or simple array: '["file1.py", "file2.py"]'
         max_files: Maximum number of files to read in one operation (default: 5)
 
@@ -288,19 +626,14 @@ async def read_multiple_files(file_requests: str, max_files: int = 5) -> str:
                     results["summary"]["files_not_found"] += 1
                     continue
 
-                with open(full_path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-
-                # Handle line range
-                original_line_count = len(lines)
-                if start_line is not None or end_line is not None:
-                    start_idx = (start_line - 1) if start_line else 0
-                    end_idx = end_line if end_line else len(lines)
-                    lines = lines[start_idx:end_idx]
-
-                content = "".join(lines)
-                size_bytes = len(content.encode("utf-8"))
-                lines_count = len(lines)
+                # Handle line range (only the requested lines are decoded)
+                read_result = read_line_range(
+                    full_path, start_line, end_line, options.get("max_bytes")
+                )
+                content = read_result["content"]
+                original_line_count = read_result["file_total_lines"]
+                size_bytes = read_result["size_bytes"]
+                lines_count = read_result["lines_read"]
 
                 # Record individual file result
                 results["files"][file_path] = {
@@ -315,6 +648,7 @@ async def read_multiple_files(file_requests: str, max_files: int = 5) -> str:
                     "end_line": end_line,
                     "line_range_applied": start_line is not None
                     or end_line is not None,
+                    "truncated": read_result["truncated"],
                 }
 
                 # Update summary
@@ -385,7 +719,7 @@ async def read_multiple_files(file_requests: str, max_files: int = 5) -> str:
             },
         )
 
-        return json.dumps(results, ensure_ascii=False, indent=2)
+        return shape_tool_result("read_multiple_files", results)
 
     except Exception as e:
         result = {
@@ -432,6 +766,8 @@ async def write_file(
         # Write file
         with open(full_path, "w", encoding="utf-8") as f:
             f.write(content)
+        update_search_indexes(full_path, content)
+        notify_file_changed(full_path)
 
         # Update current file record
         CURRENT_FILES[file_path] = {
@@ -581,6 +917,8 @@ async def write_multiple_files(
                 # Write file
                 with open(full_path, "w", encoding="utf-8") as f:
                     f.write(content)
+                update_search_indexes(full_path, content)
+                notify_file_changed(full_path)
 
                 # Calculate file metrics
                 size_bytes = len(content.encode("utf-8"))
@@ -680,80 +1018,1175 @@ async def write_multiple_files(
         return json.dumps(result, ensure_ascii=False, indent=2)
 
 
-# ==================== Code Execution Tools ====================
+# ==================== File Edit Tools ====================
+
+
+UNIFIED_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+EDIT_DIFF_MAX_LINES = 80
+
+
+class EditConflict(Exception):
+    """An edit that does not apply cleanly to the current file content"""
+
+
+def _diff_header_path(header: str) -> str:
+    """File path from a ``---``/``+++`` header, without timestamps or a/ b/"""
+    path = header.split("\t")[0].strip()
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+
+def _parse_unified_diff(diff_text: str) -> List[Dict[str, Any]]:
+    """
+    Split unified diff text into per-file patches
+
+    Hunk line counts are not trusted (hand-written diffs often get them
+    wrong); a hunk simply runs until the next header or non-diff line.
+    """
+    patches = []
+    current = None
+    hunk = None
+    lines = diff_text.splitlines()
+
+    def close_hunk():
+        # Blank lines after a hunk usually separate files, not context
+        while hunk and hunk["bare_tail"]:
+            hunk["old"].pop()
+            hunk["new"].pop()
+            hunk["bare_tail"] -= 1
+
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        if (
+            line.startswith("--- ")
+            and index + 1 < len(lines)
+            and lines[index + 1].startswith("+++ ")
+        ):
+            old_path = _diff_header_path(line[4:])
+            new_path = _diff_header_path(lines[index + 1][4:])
+            current = {
+                "file_path": old_path if new_path == "/dev/null" else new_path,
+                "new_file": old_path == "/dev/null",
+                "deleted": new_path == "/dev/null",
+                "hunks": [],
+            }
+            patches.append(current)
+            close_hunk()
+            hunk = None
+            index += 2
+            continue
+
+        header_match = UNIFIED_HUNK_HEADER.match(line)
+        if header_match:
+            if current is None:
+                current = {
+                    "file_path": None,
+                    "new_file": False,
+                    "deleted": False,
+                    "hunks": [],
+                }
+                patches.append(current)
+            close_hunk()
+            hunk = {
+                "old_start": int(header_match.group(1)),
+                "old": [],
+                "new": [],
+                "bare_tail": 0,
+            }
+            current["hunks"].append(hunk)
+        elif hunk is not None:
+            if line.startswith(" ") or line == "":
+                hunk["old"].append(line[1:])
+                hunk["new"].append(line[1:])
+                hunk["bare_tail"] = hunk["bare_tail"] + 1 if line == "" else 0
+            elif line.startswith(("-", "+")):
+                hunk["old" if line[0] == "-" else "new"].append(line[1:])
+                hunk["bare_tail"] = 0
+            elif not line.startswith("\\"):
+                # "diff --git", "index ..." and similar lines end the hunk
+                close_hunk()
+                hunk = None
+        index += 1
+
+    close_hunk()
+    return patches
+
+
+def _locate_block(
+    lines: List[str], block: List[str], expected: int, search_from: int
+) -> Optional[int]:
+    """Position of ``block`` in ``lines`` closest to ``expected``"""
+    last_start = len(lines) - len(block)
+    if last_start < search_from:
+        return None
+
+    expected = min(max(expected, search_from), last_start)
+    for compare in (lambda line: line, lambda line: line.rstrip()):
+        wanted = [compare(line) for line in block]
+        for distance in range(last_start - search_from + 1):
+            for position in (expected - distance, expected + distance):
+                if search_from <= position <= last_start and all(
+                    compare(lines[position + offset]) == wanted_line
+                    for offset, wanted_line in enumerate(wanted)
+                ):
+                    return position
+    return None
+
+
+def _apply_hunks(content: str, hunks: List[Dict[str, Any]]) -> str:
+    """Apply unified diff hunks in order, tolerating shifted line numbers"""
+    lines = content.split("\n") if content else []
+    ends_with_newline = content.endswith("\n") or not content
+    if content.endswith("\n"):
+        lines.pop()
+
+    drift = 0
+    search_from = 0
+    for number, hunk in enumerate(hunks, 1):
+        old_block = hunk["old"]
+        # Index in the original file where the hunk applies: its first old
+        # line, or for a pure insertion (-N,0) the line after line N
+        anchor = hunk["old_start"] - 1 if old_block else hunk["old_start"]
+        if old_block:
+            position = _locate_block(lines, old_block, anchor + drift, search_from)
+            if position is None:
+                raise EditConflict(
+                    f"hunk {number} (@@ -{hunk['old_start']}) does not match the current file content"
+                )
+        else:
+            position = min(max(anchor + drift, search_from), len(lines))
+
+        lines[position : position + len(old_block)] = hunk["new"]
+        drift = position - anchor + len(hunk["new"]) - len(old_block)
+        search_from = position + len(hunk["new"])
+
+    if not lines:
+        return ""
+    return "\n".join(lines) + ("\n" if ends_with_newline else "")
+
+
+def _apply_search_replace(content: str, edit: Dict[str, Any]) -> str:
+    """Replace an exact search block, which must match exactly once"""
+    search = edit.get("search", "")
+    replace = edit.get("replace", "")
+    if not isinstance(search, str) or not isinstance(replace, str) or not search:
+        raise EditConflict("search and replace must be strings and search non-empty")
+
+    occurrences = content.count(search)
+    if occurrences == 0:
+        first_line = search.strip().split("\n")[0].strip()
+        hint = ""
+        for line_number, line in enumerate(content.split("\n"), 1):
+            if first_line and first_line in line:
+                hint = f" (first search line appears at line {line_number})"
+                break
+        raise EditConflict(f"search text not found{hint}")
+    if occurrences > 1 and not edit.get("replace_all", False):
+        raise EditConflict(
+            f"search text matches {occurrences} times; add surrounding lines or set replace_all"
+        )
+
+    return content.replace(search, replace, -1 if edit.get("replace_all") else 1)
+
+
+def _normalize_edit_requests(edits: str) -> List[Dict[str, Any]]:
+    """
+    Flatten the accepted edit formats into a list of per-file operations
+
+    Accepts raw unified diff text, a JSON list of
+    ``{"file_path", "search", "replace"[, "replace_all"]}`` or
+    ``{"file_path", "diff"}`` objects, or a JSON object mapping file paths to
+    a diff string or a list of search/replace blocks.
+    """
+    try:
+        parsed = json.loads(edits)
+    except json.JSONDecodeError:
+        parsed = None
+
+    if parsed is None or isinstance(parsed, str):
+        operations = []
+        for patch in _parse_unified_diff(parsed or edits):
+            if not patch["file_path"]:
+                raise ValueError("unified diff is missing ---/+++ file headers")
+            operations.append({"file_path": patch["file_path"], "patch": patch})
+        return operations
+
+    if isinstance(parsed, dict):
+        entries = []
+        for file_path, file_edits in parsed.items():
+            if isinstance(file_edits, str):
+                entries.append({"file_path": file_path, "diff": file_edits})
+            else:
+                for edit in (
+                    file_edits if isinstance(file_edits, list) else [file_edits]
+                ):
+                    entries.append({**edit, "file_path": file_path})
+    elif isinstance(parsed, list):
+        entries = parsed
+    else:
+        raise ValueError("edits must be unified diff text, a JSON list or object")
+
+    operations = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("file_path"):
+            raise ValueError(f"each edit needs a file_path: {str(entry)[:100]}")
+        if "diff" in entry:
+            patches = _parse_unified_diff(entry["diff"])
+            if not patches:
+                raise ValueError(f"no hunks found in diff for {entry['file_path']}")
+            for patch in patches:
+                operations.append({"file_path": entry["file_path"], "patch": patch})
+        else:
+            operations.append({"file_path": entry["file_path"], "edit": entry})
+    return operations
+
+
+def _summarize_edit_diff(file_path: str, old_content: str, new_content: str):
+    """Compact unified diff of an edit with added/removed line counts"""
+    old_lines = old_content.split("\n")
+    new_lines = new_content.split("\n")
+    # No autojunk: blank lines are "popular" in code and would blur the diff
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+
+    diff_lines = [f"--- a/{file_path}", f"+++ b/{file_path}"]
+    lines_added = 0
+    lines_removed = 0
+    for group in matcher.get_grouped_opcodes(1):
+        old_start, old_end = group[0][1], group[-1][2]
+        new_start, new_end = group[0][3], group[-1][4]
+        diff_lines.append(
+            f"@@ -{old_start + 1},{old_end - old_start} "
+            f"+{new_start + 1},{new_end - new_start} @@"
+        )
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                diff_lines.extend(f" {line}" for line in old_lines[i1:i2])
+                continue
+            diff_lines.extend(f"-{line}" for line in old_lines[i1:i2])
+            diff_lines.extend(f"+{line}" for line in new_lines[j1:j2])
+            lines_removed += i2 - i1
+            lines_added += j2 - j1
+    if len(diff_lines) > EDIT_DIFF_MAX_LINES:
+        hidden = len(diff_lines) - EDIT_DIFF_MAX_LINES
+        diff_lines = diff_lines[:EDIT_DIFF_MAX_LINES] + [
+            f"... ({hidden} more diff lines)"
+        ]
+    return "\n".join(diff_lines), lines_added, lines_removed
 
 
 @mcp.tool()
-async def execute_python(code: str, timeout: int = 30) -> str:
+async def apply_edits(edits: str, dry_run: bool = False) -> str:
     """
-    Execute Python code and return output
+    Apply unified diffs or exact search/replace blocks to workspace files
+
+    All edits are checked against the current file contents first; if any
+    of them conflicts, no file is written and every conflict is reported.
 
     Args:
-        code: Python code to execute
-        timeout: Timeout in seconds
+        edits: Unified diff text, or a JSON string with edits, e.g.,
+               '[{"file_path": "model.py", "search": "lr = 0.1", "replace": "lr = 0.01"}]'
+               or '{"model.py": "@@ -10,3 +10,3 @@\\n ..."}'
+        dry_run: Only check that the edits apply and return the diff summary
 
     Returns:
-        JSON string of execution result
+        JSON string with per-file diff summaries, or the conflicts found
     """
     try:
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".py", delete=False, encoding="utf-8"
-        ) as f:
-            f.write(code)
-            temp_file = f.name
-
         try:
-            # Ensure workspace directory exists
-            ensure_workspace_exists()
-
-            # Execute Python code
-            result = subprocess.run(
-                [sys.executable, temp_file],
-                cwd=WORKSPACE_DIR,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                encoding="utf-8",
-            )
+            operations = _normalize_edit_requests(edits)
+        except (ValueError, TypeError, AttributeError) as e:
+            result = {"status": "error", "message": f"Invalid edits: {str(e)}"}
+            log_operation("apply_edits_error", {"error": str(e)})
+            return json.dumps(result, ensure_ascii=False, indent=2)
 
-            execution_result = {
-                "status": "success" if result.returncode == 0 else "error",
-                "return_code": result.returncode,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "timeout": timeout,
+        if not operations:
+            result = {
+                "status": "error",
+                "message": "No edits found: expected unified diff hunks or JSON search/replace edits",
             }
+            log_operation("apply_edits_error", {"error": "no_edits"})
+            return json.dumps(result, ensure_ascii=False, indent=2)
 
-            if result.returncode != 0:
-                execution_result["message"] = "Python code execution failed"
-            else:
-                execution_result["message"] = "Python code execution successful"
+        # Compute every new file content before touching the disk; states are
+        # keyed by resolved path so "m.py" and "./m.py" share one
+        pending = {}
+        conflicts = []
+        for edit_index, operation in enumerate(operations):
+            file_path = operation["file_path"]
+            try:
+                full_path = validate_path(file_path)
+                patch = operation.get("patch")
+                if full_path not in pending:
+                    if full_path.exists():
+                        with open(full_path, "r", encoding="utf-8", newline="") as f:
+                            raw_content = f.read()
+                    elif patch and (
+                        patch["new_file"]
+                        or all(not hunk["old"] for hunk in patch["hunks"])
+                    ):
+                        raw_content = None
+                    else:
+                        raise EditConflict("file does not exist")
+                    original = (raw_content or "").replace("\r\n", "\n")
+                    pending[full_path] = {
+                        "file_path": file_path,
+                        "full_path": full_path,
+                        "created": raw_content is None,
+                        "crlf": "\r\n" in (raw_content or ""),
+                        "original": original,
+                        "content": original,
+                        "edits_applied": 0,
+                    }
+
+                state = pending[full_path]
+                if patch:
+                    if patch["deleted"]:
+                        raise EditConflict("deleting files is not supported")
+                    # A creation diff must not be spliced into existing content
+                    if patch["new_file"] and (
+                        not state["created"] or state["edits_applied"]
+                    ):
+                        raise EditConflict("file already exists")
+                    state["content"] = _apply_hunks(
+                        state["content"], operation["patch"]["hunks"]
+                    )
+                else:
+                    state["content"] = _apply_search_replace(
+                        state["content"], operation["edit"]
+                    )
+                state["edits_applied"] += 1
+            except (EditConflict, ValueError, PermissionError, OSError) as e:
+                conflicts.append(
+                    {"file_path": file_path, "edit_index": edit_index, "reason": str(e)}
+                )
 
+        if conflicts:
+            result = {
+                "status": "conflict",
+                "message": f"{len(conflicts)} edit(s) did not apply; no files were changed",
+                "conflicts": conflicts,
+            }
             log_operation(
-                "execute_python",
+                "apply_edits",
                 {
-                    "return_code": result.returncode,
-                    "stdout_length": len(result.stdout),
-                    "stderr_length": len(result.stderr),
+                    "files": [state["file_path"] for state in pending.values()],
+                    "status": "conflict",
+                    "conflicts": conflicts,
                 },
             )
+            return json.dumps(result, ensure_ascii=False, indent=2)
 
-            return json.dumps(execution_result, ensure_ascii=False, indent=2)
+        files = {}
+        for state in pending.values():
+            file_path = state["file_path"]
+            diff, lines_added, lines_removed = _summarize_edit_diff(
+                file_path, state["original"], state["content"]
+            )
+            content = state["content"]
+            files[file_path] = {
+                "status": "success",
+                "edits_applied": state["edits_applied"],
+                "created": state["created"],
+                "lines_added": lines_added,
+                "lines_removed": lines_removed,
+                "size_bytes": len(content.encode("utf-8")),
+                "lines": len(content.split("\n")),
+                "diff": diff,
+            }
 
-        finally:
-            # Clean up temporary file
-            os.unlink(temp_file)
+        if not dry_run:
+            for state in pending.values():
+                file_path, full_path = state["file_path"], state["full_path"]
+                content = state["content"]
+                full_path.parent.mkdir(parents=True, exist_ok=True)
+                # Write through a temporary file so readers never see half an edit
+                temporary_path = full_path.with_name(f".{full_path.name}.edit.tmp")
+                with open(temporary_path, "w", encoding="utf-8", newline="") as f:
+                    f.write(content.replace("\n", "\r\n") if state["crlf"] else content)
+                os.replace(temporary_path, full_path)
+                update_search_indexes(full_path, content)
+                notify_file_changed(full_path)
+
+                CURRENT_FILES[file_path] = {
+                    "last_modified": datetime.now().isoformat(),
+                    "size_bytes": files[file_path]["size_bytes"],
+                    "lines": files[file_path]["lines"],
+                }
 
-    except subprocess.TimeoutExpired:
         result = {
-            "status": "error",
-            "message": f"Python code execution timeout ({timeout}秒)",
-            "timeout": timeout,
+            "status": "success",
+            "message": (
+                f"Edits apply cleanly to {len(files)} file(s) (dry run)"
+                if dry_run
+                else f"Applied {len(operations)} edit(s) to {len(files)} file(s)"
+            ),
+            "dry_run": dry_run,
+            "files": files,
         }
-        log_operation("execute_python_timeout", {"timeout": timeout})
+
+        log_operation(
+            "apply_edits",
+            {
+                "files": {
+                    file_path: {
+                        "edits_applied": summary["edits_applied"],
+                        "lines_added": summary["lines_added"],
+                        "lines_removed": summary["lines_removed"],
+                    }
+                    for file_path, summary in files.items()
+                },
+                "dry_run": dry_run,
+                "status": "success",
+            },
+        )
+
         return json.dumps(result, ensure_ascii=False, indent=2)
 
+    except Exception as e:
+        result = {"status": "error", "message": f"Failed to apply edits: {str(e)}"}
+        log_operation("apply_edits_error", {"error": str(e)})
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+
+# ==================== Code Execution Tools ====================
+
+
+async def _read_stream_capped(
+    stream, head: bytearray, tail: bytearray, counts: Dict[str, int], name: str
+):
+    """
+    Read a subprocess stream to EOF, keeping at most EXECUTION_MAX_OUTPUT_BYTES:
+    half from its start and half from its end (where errors usually are)
+    """
+    limit = EXECUTION_MAX_OUTPUT_BYTES // 2
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        counts[name] += len(chunk)
+        remaining = limit - len(head)
+        if remaining > 0:
+            head.extend(chunk[:remaining])
+            chunk = chunk[remaining:]
+        if chunk:
+            tail.extend(chunk)
+            if len(tail) > limit:
+                del tail[: len(tail) - limit]
+
+
+def _kill_process_tree(process):
+    """Kill a subprocess together with any children it spawned"""
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def get_execution_rlimits() -> Dict[str, int]:
+    """setrlimit values for executed code by resource name; disabled limits are left out"""
+    if not RESOURCE_AVAILABLE:
+        return {}
+    limits = {
+        "RLIMIT_CPU": EXECUTION_CPU_SECONDS,
+        "RLIMIT_AS": EXECUTION_MEMORY_MB * 1024 * 1024,
+        "RLIMIT_NPROC": EXECUTION_MAX_PROCESSES,
+        "RLIMIT_FSIZE": EXECUTION_MAX_FILE_MB * 1024 * 1024,
+    }
+    return {
+        name: value
+        for name, value in limits.items()
+        if value > 0 and hasattr(resource, name)
+    }
+
+
+def describe_exceeded_limit(
+    return_code: Optional[int], cpu_seconds: Optional[float]
+) -> Optional[str]:
+    """Explain a run that was ended by one of its resource limits, if it was"""
+    if not RESOURCE_AVAILABLE or not return_code:
+        return None
+    # Killed directly (negative code) or reported by a shell (128 + signal)
+    signal_number = -return_code if return_code < 0 else return_code - 128
+    if signal_number == signal.SIGXCPU or (
+        signal_number == signal.SIGKILL
+        and EXECUTION_CPU_SECONDS > 0
+        and (cpu_seconds or 0) >= EXECUTION_CPU_SECONDS
+    ):
+        return f"CPU time limit exceeded ({EXECUTION_CPU_SECONDS} seconds)"
+    if signal_number == signal.SIGXFSZ:
+        return f"File size limit exceeded ({EXECUTION_MAX_FILE_MB} MB)"
+    return None
+
+
+# Source of the launcher that sandboxes run_subprocess children. It forks,
+# applies the rlimits given as JSON in argv[1] to the child, execs argv[3:]
+# there, and writes the child's exit signal, CPU time and peak RSS (which
+# include the descendants it waited for) as JSON to the fd in argv[2].
+SANDBOX_LAUNCHER_SOURCE = r"""
+import json, os, resource, sys
+
+limits, report_fd, command = json.loads(sys.argv[1]), int(sys.argv[2]), sys.argv[3:]
+
+pid = os.fork()
+if pid == 0:
+    try:
+        os.close(report_fd)
+        for name, value in limits.items():
+            limit = getattr(resource, name)
+            hard = resource.getrlimit(limit)[1]
+            # CPU: SIGXCPU at the limit, SIGKILL shortly after if it is ignored
+            new_hard = value + 5 if name == "RLIMIT_CPU" else value
+            if hard != resource.RLIM_INFINITY:
+                value, new_hard = min(value, hard), min(new_hard, hard)
+            resource.setrlimit(limit, (value, new_hard))
+        os.execvp(command[0], command)
+    except BaseException as e:
+        os.write(2, f"Sandbox launcher failed: {e}\n".encode())
+    os._exit(127)
+
+_, status, usage = os.wait4(pid, 0)
+peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+report = {
+    "signal": os.WTERMSIG(status) if os.WIFSIGNALED(status) else None,
+    "exit_code": os.WEXITSTATUS(status) if os.WIFEXITED(status) else None,
+    "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3),
+    "peak_rss_mb": round(peak, 1),
+}
+os.write(report_fd, json.dumps(report).encode())
+sys.exit(128 + report["signal"] if report["signal"] else os.WEXITSTATUS(status))
+"""
+
+
+async def _wait_fd_readable(fd: int):
+    """Wait until ``fd`` has data or reaches EOF"""
+    loop = asyncio.get_running_loop()
+    readable = loop.create_future()
+    loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+    try:
+        await readable
+    finally:
+        loop.remove_reader(fd)
+
+
+async def run_subprocess(
+    args: List[str] = None, command: str = None, timeout: int = 30
+) -> Dict[str, Any]:
+    """
+    Run a program (``args``) or shell ``command`` without blocking the event loop
+
+    Output is captured incrementally and capped per stream; on timeout the
+    whole process group is killed and the partial output is returned. On
+    POSIX the program runs under the execution rlimits through the sandbox
+    launcher, which also reports its CPU time and peak RSS.
+
+    Returns:
+        Dict with return_code, stdout, stderr, byte counts, truncation flags,
+        timed_out, duration_seconds, cpu_seconds, peak_rss_mb and
+        limit_exceeded (None when unknown or not applicable)
+    """
+    global EXECUTION_SEMAPHORE
+    if EXECUTION_SEMAPHORE is None:
+        EXECUTION_SEMAPHORE = asyncio.Semaphore(EXECUTION_MAX_CONCURRENCY)
+
+    async with EXECUTION_SEMAPHORE:
+        start_time = time.monotonic()
+        popen_kwargs = {
+            "cwd": WORKSPACE_DIR,
+            "stdin": asyncio.subprocess.DEVNULL,
+            "stdout": asyncio.subprocess.PIPE,
+            "stderr": asyncio.subprocess.PIPE,
+        }
+        if os.name == "posix":
+            popen_kwargs["start_new_session"] = True
+
+        report_fd = None
+        if RESOURCE_AVAILABLE and os.name == "posix":
+            if command is not None:
+                args, command = ["/bin/sh", "-c", command], None
+            report_fd, report_write_fd = os.pipe()
+            args = [
+                sys.executable,
+                "-I",
+                "-S",
+                "-c",
+                SANDBOX_LAUNCHER_SOURCE,
+                json.dumps(get_execution_rlimits()),
+                str(report_write_fd),
+                *args,
+            ]
+            popen_kwargs["pass_fds"] = (report_write_fd,)
+
+        try:
+            if command is not None:
+                process = await asyncio.create_subprocess_shell(command, **popen_kwargs)
+            else:
+                process = await asyncio.create_subprocess_exec(*args, **popen_kwargs)
+        except BaseException:
+            if report_fd is not None:
+                os.close(report_fd)
+            raise
+        finally:
+            if report_fd is not None:
+                os.close(report_write_fd)
+
+        buffers = {name: (bytearray(), bytearray()) for name in ("stdout", "stderr")}
+        counts = {"stdout": 0, "stderr": 0}
+        readers = asyncio.gather(
+            _read_stream_capped(process.stdout, *buffers["stdout"], counts, "stdout"),
+            _read_stream_capped(process.stderr, *buffers["stderr"], counts, "stderr"),
+        )
+
+        def _exited():
+            # Process.wait() also waits for the pipes to close, which a
+            # background job started by the command can delay indefinitely;
+            # the launcher's report fd turns readable as soon as it is done
+            if report_fd is not None:
+                return _wait_fd_readable(report_fd)
+            return process.wait()
+
+        timed_out = False
+        try:
+            await asyncio.wait_for(_exited(), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            _kill_process_tree(process)
+            await _exited()
+        except asyncio.CancelledError:
+            _kill_process_tree(process)
+            readers.cancel()
+            if report_fd is not None:
+                os.close(report_fd)
+            raise
+
+        return_code = process.returncode
+        usage = {}
+        if report_fd is not None:
+            # Written before the launcher exits; empty if it was killed
+            try:
+                os.set_blocking(report_fd, False)
+                usage = json.loads(os.read(report_fd, 65536) or b"{}")
+            except (OSError, ValueError):
+                pass
+            finally:
+                os.close(report_fd)
+            if usage.get("signal"):
+                return_code = -usage["signal"]
+            elif usage.get("exit_code") is not None:
+                return_code = usage["exit_code"]
+
+        try:
+            # Pipes close once the process (group) is gone; give background
+            # jobs that still hold them a grace period, never wait forever
+            await asyncio.wait_for(readers, EXECUTION_OUTPUT_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            readers.cancel()
+
+        def _decode(name: str) -> str:
+            head, tail = buffers[name]
+            elided = counts[name] - len(head) - len(tail)
+            marker = (
+                f"\n... [{elided} bytes of output elided] ...\n" if elided > 0 else ""
+            )
+            return (
+                head.decode("utf-8", errors="replace")
+                + marker
+                + tail.decode("utf-8", errors="replace")
+            )
+
+        return {
+            "return_code": return_code,
+            "stdout": _decode("stdout"),
+            "stderr": _decode("stderr"),
+            "stdout_bytes": counts["stdout"],
+            "stderr_bytes": counts["stderr"],
+            "output_truncated": any(
+                counts[name] > len(head) + len(tail)
+                for name, (head, tail) in buffers.items()
+            ),
+            "timed_out": timed_out,
+            "duration_seconds": round(time.monotonic() - start_time, 3),
+            "cpu_seconds": usage.get("cpu_seconds"),
+            "peak_rss_mb": usage.get("peak_rss_mb"),
+            "limit_exceeded": None
+            if timed_out
+            else describe_exceeded_limit(return_code, usage.get("cpu_seconds")),
+        }
+
+
+# Source of a warm worker interpreter. It moves the request/response
+# protocol off fds 0 and 1 onto private descriptors, applies the rlimits
+# given as JSON in argv[2] to itself (the CPU limit is renewed before every
+# run), preloads the modules named in argv[1], then runs one JSON request per
+# line in a clean __main__ namespace and answers with one JSON line. During a
+# run fds 1 and 2 point at temporary capture files, so output written by
+# child processes and C extensions is captured along with print().
+PYTHON_WORKER_SOURCE = r"""
+import io, json, logging, os, sys, tempfile, traceback
+
+# Duplicates are not inherited by child processes of the snippets
+protocol_in = os.fdopen(os.dup(0), "r", encoding="utf-8")
+protocol_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+devnull = os.open(os.devnull, os.O_RDWR)
+for fd in (0, 1, 2):
+    os.dup2(devnull, fd)
+
+# Stable stream objects: anything that keeps a reference to them (logging
+# handlers, for example) writes to the capture of whichever run is current
+sys.stdout = open(1, "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+sys.stderr = open(2, "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+stdout_stream, stderr_stream = sys.stdout, sys.stderr
+
+limits = json.loads(sys.argv[2])
+if limits:
+    import resource
+
+    for name, value in limits.items():
+        if name != "RLIMIT_CPU":
+            limit = getattr(resource, name)
+            hard = resource.getrlimit(limit)[1]
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(limit, (value, value))
+
+for module_name in filter(None, sys.argv[1].split(",")):
+    try:
+        __import__(module_name)
+    except Exception:
+        pass
+
+
+def read_capture(capture, limit):
+    # Half of the limit from the start of the output and half from its end
+    half = limit // 2
+    total = capture.seek(0, os.SEEK_END)
+    capture.seek(0)
+    if total <= 2 * half:
+        data = capture.read()
+    else:
+        data = capture.read(half)
+        capture.seek(total - half)
+        marker = f"\n... [{total - 2 * half} bytes of output elided] ...\n"
+        data += marker.encode() + capture.read(half)
+    capture.close()
+    return data.decode("utf-8", errors="replace"), total
+
+
+def cpu_seconds():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def renew_cpu_limit():
+    limit = resource.RLIMIT_CPU
+    hard = resource.getrlimit(limit)[1]
+    soft = int(cpu_seconds()) + 1 + limits["RLIMIT_CPU"]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(limit, (soft, hard))
+
+
+def reset_peak_rss():
+    # Linux: writing 5 to clear_refs resets the peak RSS (VmHWM)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def memory_status_mb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def resident_mb():
+    rss = memory_status_mb("VmRSS")
+    if rss is not None:
+        return rss
+    # Without /proc the lifetime peak is the best available bound
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return 0.0
+
+
+protocol_out.write(json.dumps({"ready": True}) + "\n")
+protocol_out.flush()
+root_logger = logging.getLogger()
+
+for line in protocol_in:
+    request = json.loads(line)
+    cwd = os.path.realpath(request["cwd"])
+    os.chdir(cwd)
+    sys.argv = ["-c"]
+
+    # Forget workspace modules imported by earlier runs so edits are seen
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if module_file and os.path.realpath(module_file).startswith(cwd + os.sep):
+            del sys.modules[name]
+
+    # State a snippet may change, restored after it ran
+    saved_environ = dict(os.environ)
+    saved_path = [cwd] + sys.path[1:]
+    sys.path[:] = saved_path[:]
+    saved_handlers, saved_level = root_logger.handlers[:], root_logger.level
+
+    captures = [tempfile.TemporaryFile(), tempfile.TemporaryFile()]
+    os.dup2(captures[0].fileno(), 1)
+    os.dup2(captures[1].fileno(), 2)
+    sys.stdin = io.StringIO("")
+    return_code = 0
+    if "RLIMIT_CPU" in limits:
+        renew_cpu_limit()
+    peak_reset = reset_peak_rss()
+    cpu_start = cpu_seconds()
+    try:
+        exec(
+            compile(request["code"], "<execute_python>", "exec"),
+            {
+                "__name__": "__main__",
+                "__file__": os.path.join(cwd, "__execute_python__.py"),
+                "__builtins__": __builtins__,
+            },
+        )
+    except SystemExit as e:
+        if isinstance(e.code, int) or e.code is None:
+            return_code = e.code or 0
+        else:
+            print(e.code, file=stderr_stream)
+            return_code = 1
+    except BaseException:
+        traceback.print_exc(file=stderr_stream)
+        return_code = 1
+    finally:
+        cpu_used = cpu_seconds() - cpu_start
+        peak_rss = memory_status_mb("VmHWM") if peak_reset else None
+        for stream in (sys.stdout, sys.stderr, stdout_stream, stderr_stream):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        sys.stdin, sys.stdout, sys.stderr = sys.__stdin__, stdout_stream, stderr_stream
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        sys.path[:] = saved_path
+        for handler in root_logger.handlers[:]:
+            if handler not in saved_handlers:
+                root_logger.removeHandler(handler)
+        root_logger.setLevel(saved_level)
+
+    stdout, stdout_bytes = read_capture(captures[0], request["max_output_bytes"])
+    stderr, stderr_bytes = read_capture(captures[1], request["max_output_bytes"])
+    protocol_out.write(
+        json.dumps(
+            {
+                "return_code": return_code,
+                "stdout": stdout,
+                "stderr": stderr,
+                "stdout_bytes": stdout_bytes,
+                "stderr_bytes": stderr_bytes,
+                "cpu_seconds": round(cpu_used, 3),
+                "peak_rss_mb": None if peak_rss is None else round(peak_rss, 1),
+                "worker_rss_mb": round(resident_mb(), 1),
+            }
+        )
+        + "\n"
+    )
+    protocol_out.flush()
+"""
+
+
+class PythonWorkerPool:
+    """
+    Pool of warm Python interpreters that run execute_python snippets
+
+    Workers are plain Popen processes: spawning never awaits, so a shutdown
+    cannot leave a half-started worker behind, and blocking pipe I/O runs in
+    the default executor.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        preload_modules: List[str],
+        max_runs: int,
+        max_rss_mb: int,
+    ):
+        self.size = size
+        self.preload_modules = preload_modules
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.idle_workers = []
+        self.semaphore = asyncio.Semaphore(size)
+
+    def _spawn_worker(self) -> subprocess.Popen:
+        """Start a worker; it preloads its modules in the background"""
+        popen_kwargs = {
+            "cwd": WORKSPACE_DIR,
+            "stdin": subprocess.PIPE,
+            "stdout": subprocess.PIPE,
+            "stderr": subprocess.DEVNULL,
+        }
+        if os.name == "posix":
+            popen_kwargs["start_new_session"] = True
+
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                PYTHON_WORKER_SOURCE,
+                ",".join(self.preload_modules),
+                json.dumps(get_execution_rlimits()),
+            ],
+            **popen_kwargs,
+        )
+        process.ready = False
+        process.runs = 0
+        return process
+
+    @staticmethod
+    def _wait_ready(process: subprocess.Popen):
+        if not process.ready:
+            if not process.stdout.readline():
+                raise RuntimeError("Python worker exited during startup")
+            process.ready = True
+
+    @staticmethod
+    def _exchange(process: subprocess.Popen, request: bytes) -> bytes:
+        process.stdin.write(request)
+        process.stdin.flush()
+        return process.stdout.readline()
+
+    def warm_up(self):
+        """Pre-fork idle workers up to the pool size"""
+        try:
+            while len(self.idle_workers) < self.size:
+                self.idle_workers.append(self._spawn_worker())
+            logger.info(f"Python worker pool started: {self.size} workers")
+        except Exception as e:
+            logger.warning(f"Python worker pool warm-up failed: {e}")
+
+    def _discard(self, process: subprocess.Popen):
+        _kill_process_tree(process)
+        process.wait()
+
+    async def run(self, code: str, timeout: int) -> Dict[str, Any]:
+        """Run a snippet on a warm worker; same result shape as run_subprocess"""
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            process = self.idle_workers.pop() if self.idle_workers else None
+            if process is None or process.poll() is not None:
+                process = self._spawn_worker()
+
+            try:
+                # Preloading does not count against the snippet's timeout
+                await loop.run_in_executor(None, self._wait_ready, process)
+            except BaseException:
+                self._discard(process)
+                raise
+
+            start_time = time.monotonic()
+            request = {
+                "code": code,
+                "cwd": str(WORKSPACE_DIR),
+                "max_output_bytes": EXECUTION_MAX_OUTPUT_BYTES,
+            }
+
+            try:
+                line = await asyncio.wait_for(
+                    loop.run_in_executor(
+                        None,
+                        self._exchange,
+                        process,
+                        (json.dumps(request) + "\n").encode("utf-8"),
+                    ),
+                    timeout,
+                )
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                # Killing the worker also unblocks the executor thread
+                self._discard(process)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                return {
+                    "return_code": None,
+                    "stdout": "",
+                    "stderr": "",
+                    "stdout_bytes": 0,
+                    "stderr_bytes": 0,
+                    "output_truncated": False,
+                    "timed_out": True,
+                    "duration_seconds": round(time.monotonic() - start_time, 3),
+                    "cpu_seconds": None,
+                    "peak_rss_mb": None,
+                    "limit_exceeded": None,
+                }
+            except OSError:
+                # Broken pipe: the worker died between runs
+                line = b""
+
+            if not line:
+                # The snippet took the whole interpreter down (os._exit, crash)
+                return_code = process.wait()
+                result = {
+                    "return_code": return_code,
+                    "stdout": "",
+                    "stderr": f"Python worker exited with code {return_code}",
+                    "stdout_bytes": 0,
+                    "stderr_bytes": 0,
+                    "cpu_seconds": None,
+                    "peak_rss_mb": None,
+                }
+            else:
+                result = json.loads(line)
+                process.runs += 1
+                # Memory freed by a snippet is rarely returned to the OS, so
+                # the worker's resident size only grows across runs
+                if (
+                    process.runs >= self.max_runs
+                    or result.pop("worker_rss_mb") > self.max_rss_mb
+                ):
+                    self._discard(process)
+                else:
+                    self.idle_workers.append(process)
+
+            result["output_truncated"] = (
+                result["stdout_bytes"] > EXECUTION_MAX_OUTPUT_BYTES
+                or result["stderr_bytes"] > EXECUTION_MAX_OUTPUT_BYTES
+            )
+            result["timed_out"] = False
+            result["duration_seconds"] = round(time.monotonic() - start_time, 3)
+            result["limit_exceeded"] = describe_exceeded_limit(
+                result["return_code"], result["cpu_seconds"]
+            )
+            return result
+
+
+def get_python_worker_pool():
+    """Return the shared worker pool, or None when warm workers are disabled"""
+    global PYTHON_WORKER_POOL
+    if PYTHON_WORKER_POOL_SIZE <= 0:
+        return None
+    if PYTHON_WORKER_POOL is None:
+        PYTHON_WORKER_POOL = PythonWorkerPool(
+            PYTHON_WORKER_POOL_SIZE,
+            PYTHON_WORKER_PRELOAD,
+            PYTHON_WORKER_MAX_RUNS,
+            PYTHON_WORKER_MAX_RSS_MB,
+        )
+    return PYTHON_WORKER_POOL
+
+
+@mcp.tool()
+async def execute_python(code: str, timeout: int = 30) -> str:
+    """
+    Execute Python code and return output
+
+    Args:
+        code: Python code to execute
+        timeout: Timeout in seconds
+
+    Returns:
+        JSON string of execution result
+    """
+    try:
+        # Ensure workspace directory exists
+        ensure_workspace_exists()
+
+        worker_pool = get_python_worker_pool()
+        if worker_pool is not None:
+            # Execute Python code on a warm worker
+            try:
+                result = await worker_pool.run(code, timeout)
+            finally:
+                mark_search_indexes_stale()
+                mark_snapshots_stale()
+        else:
+            # Create temporary file
+            with tempfile.NamedTemporaryFile(
+                mode="w", suffix=".py", delete=False, encoding="utf-8"
+            ) as f:
+                f.write(code)
+                temp_file = f.name
+
+            try:
+                # Execute Python code
+                result = await run_subprocess(
+                    [sys.executable, temp_file], timeout=timeout
+                )
+            finally:
+                # Clean up temporary file
+                os.unlink(temp_file)
+                mark_search_indexes_stale()
+                mark_snapshots_stale()
+
+        if result["timed_out"]:
+            timeout_result = {
+                "status": "error",
+                "message": f"Python code execution timeout ({timeout} seconds)",
+                "timeout": timeout,
+                "stdout": result["stdout"],
+                "stderr": result["stderr"],
+            }
+            log_operation("execute_python_timeout", {"timeout": timeout})
+            return shape_tool_result("execute_python", timeout_result)
+
+        execution_result = {
+            "status": "success" if result["return_code"] == 0 else "error",
+            "return_code": result["return_code"],
+            "stdout": result["stdout"],
+            "stderr": result["stderr"],
+            "output_truncated": result["output_truncated"],
+            "duration_seconds": result["duration_seconds"],
+            "resource_usage": {
+                "cpu_seconds": result["cpu_seconds"],
+                "peak_rss_mb": result["peak_rss_mb"],
+            },
+            "timeout": timeout,
+        }
+
+        if result["limit_exceeded"]:
+            execution_result["message"] = (
+                f"Python code execution failed: {result['limit_exceeded']}"
+            )
+            execution_result["limit_exceeded"] = result["limit_exceeded"]
+        elif result["return_code"] != 0:
+            execution_result["message"] = "Python code execution failed"
+        else:
+            execution_result["message"] = "Python code execution successful"
+
+        log_operation(
+            "execute_python",
+            {
+                "return_code": result["return_code"],
+                "stdout_length": result["stdout_bytes"],
+                "stderr_length": result["stderr_bytes"],
+                "cpu_seconds": result["cpu_seconds"],
+                "peak_rss_mb": result["peak_rss_mb"],
+                "limit_exceeded": result["limit_exceeded"],
+            },
+        )
+
+        return shape_tool_result("execute_python", execution_result)
+
     except Exception as e:
         result = {
             "status": "error",
@@ -793,26 +2226,47 @@ async def execute_bash(command: str, timeout: int = 30) -> str:
         ensure_workspace_exists()
 
         # Execute command
-        result = subprocess.run(
-            command,
-            shell=True,
-            cwd=WORKSPACE_DIR,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            encoding="utf-8",
-        )
+        try:
+            result = await run_subprocess(command=command, timeout=timeout)
+        finally:
+            mark_search_indexes_stale()
+            mark_snapshots_stale()
+
+        if result["timed_out"]:
+            timeout_result = {
+                "status": "error",
+                "message": f"Bash command execution timeout ({timeout} seconds)",
+                "command": command,
+                "timeout": timeout,
+                "stdout": result["stdout"],
+                "stderr": result["stderr"],
+            }
+            log_operation(
+                "execute_bash_timeout", {"command": command, "timeout": timeout}
+            )
+            return shape_tool_result("execute_bash", timeout_result)
 
         execution_result = {
-            "status": "success" if result.returncode == 0 else "error",
-            "return_code": result.returncode,
-            "stdout": result.stdout,
-            "stderr": result.stderr,
+            "status": "success" if result["return_code"] == 0 else "error",
+            "return_code": result["return_code"],
+            "stdout": result["stdout"],
+            "stderr": result["stderr"],
+            "output_truncated": result["output_truncated"],
+            "duration_seconds": result["duration_seconds"],
+            "resource_usage": {
+                "cpu_seconds": result["cpu_seconds"],
+                "peak_rss_mb": result["peak_rss_mb"],
+            },
             "command": command,
             "timeout": timeout,
         }
 
-        if result.returncode != 0:
+        if result["limit_exceeded"]:
+            execution_result["message"] = (
+                f"Bash command execution failed: {result['limit_exceeded']}"
+            )
+            execution_result["limit_exceeded"] = result["limit_exceeded"]
+        elif result["return_code"] != 0:
             execution_result["message"] = "Bash command execution failed"
         else:
             execution_result["message"] = "Bash command execution successful"
@@ -821,23 +2275,16 @@ async def execute_bash(command: str, timeout: int = 30) -> str:
             "execute_bash",
             {
                 "command": command,
-                "return_code": result.returncode,
-                "stdout_length": len(result.stdout),
-                "stderr_length": len(result.stderr),
+                "return_code": result["return_code"],
+                "stdout_length": result["stdout_bytes"],
+                "stderr_length": result["stderr_bytes"],
+                "cpu_seconds": result["cpu_seconds"],
+                "peak_rss_mb": result["peak_rss_mb"],
+                "limit_exceeded": result["limit_exceeded"],
             },
         )
 
-        return json.dumps(execution_result, ensure_ascii=False, indent=2)
-
-    except subprocess.TimeoutExpired:
-        result = {
-            "status": "error",
-            "message": f"Bash command execution timeout ({timeout} seconds)",
-            "command": command,
-            "timeout": timeout,
-        }
-        log_operation("execute_bash_timeout", {"command": command, "timeout": timeout})
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return shape_tool_result("execute_bash", execution_result)
 
     except Exception as e:
         result = {
@@ -894,11 +2341,10 @@ async def read_code_mem(file_paths: List[str]) -> str:
             )
             return json.dumps(result, ensure_ascii=False, indent=2)
 
-        # Read the summary file
-        with open(summary_file_path, "r", encoding="utf-8") as f:
-            summary_content = f.read()
+        # Parse new sections of the summary file (cached by mtime)
+        summary_store = get_summary_store(summary_file_path)
 
-        if not summary_content.strip():
+        if summary_store.is_empty:
             result = {
                 "status": "no_summary",
                 "file_paths": unique_file_paths,
@@ -916,10 +2362,8 @@ async def read_code_mem(file_paths: List[str]) -> str:
         summaries_found = 0
 
         for file_path in unique_file_paths:
-            # Extract file-specific section from summary
-            file_section = _extract_file_section_from_summary(
-                summary_content, file_path
-            )
+            # Look up the file-specific section from summary
+            file_section = summary_store.find_section(file_path)
 
             if file_section:
                 file_result = {
@@ -983,45 +2427,158 @@ async def read_code_mem(file_paths: List[str]) -> str:
         return json.dumps(result, ensure_ascii=False, indent=2)
 
 
-def _extract_file_section_from_summary(
-    summary_content: str, target_file_path: str
-) -> str:
-    """
-    Extract the specific section for a file from the summary content
+SUMMARY_SEPARATOR = "=" * 80
+SUMMARY_HEADER_PATTERN = re.compile(
+    rb"^## IMPLEMENTATION File ([^;\r\n]+?)(?:; ROUND [^\r\n]*)?[ \t]*\r?$",
+    re.MULTILINE,
+)
 
-    Args:
-        summary_content: Full summary content
-        target_file_path: Path of the target file
 
-    Returns:
-        File-specific section or None if not found
+class SummaryStore:
     """
-    import re
+    Path-keyed map of the sections in implement_code_summary.md
 
-    # Normalize the target path for comparison
-    normalized_target = _normalize_file_path(target_file_path)
-
-    # Pattern to match implementation sections with separator lines
-    section_pattern = r"={80}\s*\n## IMPLEMENTATION File ([^;]+); ROUND \d+\s*\n={80}(.*?)(?=\n={80}|\Z)"
-
-    matches = re.findall(section_pattern, summary_content, re.DOTALL)
-
-    for file_path_in_summary, section_content in matches:
-        file_path_in_summary = file_path_in_summary.strip()
-        section_content = section_content.strip()
-
-        # Normalize the path from summary for comparison
-        normalized_summary_path = _normalize_file_path(file_path_in_summary)
+    The memory agent only appends sections, so on a change just the bytes
+    from the last (possibly still growing) section onwards are parsed again.
+    A file that shrank or was rewritten is parsed from scratch.
+    """
 
-        # Check if paths match using multiple strategies
-        if _paths_match(
-            normalized_target,
-            normalized_summary_path,
-            target_file_path,
-            file_path_in_summary,
-        ):
-            # Return the complete section with proper formatting
-            file_section = f"""================================================================================
+    def __init__(self, summary_path: Path):
+        self.summary_path = summary_path
+        self.signature = None
+        self.has_content = False
+        # (file path in summary, section content) in file order
+        self.sections = []
+        self.section_keys = []
+        self.exact_index = {}
+        self.basename_index = {}
+        self.suffix_index = {}
+        # Byte offset and header bytes of the last section
+        self.last_offset = 0
+        self.last_header = b""
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.has_content
+
+    def refresh(self):
+        """Bring the map up to date with the file on disk"""
+        stats = self.summary_path.stat()
+        signature = (stats.st_mtime_ns, stats.st_size)
+        if signature == self.signature:
+            return
+
+        with open(self.summary_path, "rb") as f:
+            appended = self.signature is not None and stats.st_size >= self.signature[1]
+            if appended and self.last_header:
+                f.seek(self.last_offset)
+                appended = f.read(len(self.last_header)) == self.last_header
+            if appended:
+                # Re-parse the last section together with anything new
+                if self.last_header:
+                    self._pop_section()
+                f.seek(self.last_offset)
+                self._parse(f.read(), self.last_offset)
+            else:
+                self._reset()
+                self._parse(f.read(), 0)
+
+        self.signature = signature
+
+    def _reset(self):
+        self.has_content = False
+        self.sections = []
+        self.section_keys = []
+        self.exact_index = {}
+        self.basename_index = {}
+        self.suffix_index = {}
+        self.last_offset = 0
+        self.last_header = b""
+
+    def _parse(self, data: bytes, base_offset: int):
+        if data.strip():
+            self.has_content = True
+        headers = list(SUMMARY_HEADER_PATTERN.finditer(data))
+        for position, header in enumerate(headers):
+            body_end = (
+                headers[position + 1].start()
+                if position + 1 < len(headers)
+                else len(data)
+            )
+            body = data[header.end() : body_end].decode("utf-8", errors="replace")
+            self._add_section(
+                header.group(1).decode("utf-8", errors="replace").strip(), body
+            )
+            self.last_offset = base_offset + header.start()
+            self.last_header = header.group(0)
+
+    def _add_section(self, file_path_in_summary: str, body: str):
+        # Drop the separator lines around the section body
+        content = body.strip()
+        if content.startswith(SUMMARY_SEPARATOR):
+            content = content[len(SUMMARY_SEPARATOR) :].strip()
+        if content.endswith(SUMMARY_SEPARATOR):
+            content = content[: -len(SUMMARY_SEPARATOR)].strip()
+
+        section_index = len(self.sections)
+        normalized_path = _normalize_file_path(file_path_in_summary)
+        basename = os.path.basename(file_path_in_summary)
+        keys = [
+            (self.exact_index, normalized_path),
+            (self.suffix_index, _remove_common_prefixes(normalized_path)),
+        ]
+        if len(basename) > 4:
+            keys.append((self.basename_index, basename))
+
+        # The earliest section for a path wins, as with a top-down scan
+        added_keys = []
+        for index, key in keys:
+            if key not in index:
+                index[key] = section_index
+                added_keys.append((index, key))
+
+        self.sections.append((file_path_in_summary, content))
+        self.section_keys.append(added_keys)
+
+    def _pop_section(self):
+        self.sections.pop()
+        for index, key in self.section_keys.pop():
+            del index[key]
+
+    def find_section(self, target_file_path: str) -> Optional[str]:
+        """
+        Formatted section for a file, or None if it has no summary
+
+        Exact, basename and prefix-less keys are dictionary lookups; only a
+        miss falls back to the ends-with / contains rules over the section
+        paths (never over the summary text).
+        """
+        normalized_target = _normalize_file_path(target_file_path)
+        target_basename = os.path.basename(target_file_path)
+
+        section_index = self.exact_index.get(normalized_target)
+        if section_index is None and len(target_basename) > 4:
+            section_index = self.basename_index.get(target_basename)
+        if section_index is None:
+            section_index = self.suffix_index.get(
+                _remove_common_prefixes(normalized_target)
+            )
+        if section_index is None:
+            for candidate_index, (file_path_in_summary, _) in enumerate(self.sections):
+                if _paths_match(
+                    normalized_target,
+                    _normalize_file_path(file_path_in_summary),
+                    target_file_path,
+                    file_path_in_summary,
+                ) or (target_file_path and target_file_path in file_path_in_summary):
+                    section_index = candidate_index
+                    break
+        if section_index is None:
+            return None
+
+        file_path_in_summary, section_content = self.sections[section_index]
+        # Return the complete section with proper formatting
+        return f"""================================================================================
 ## IMPLEMENTATION File {file_path_in_summary}; ROUND [X]
 ================================================================================
 
@@ -1029,10 +2586,16 @@ def _extract_file_section_from_summary(
 
 ---
 *Extracted from implement_code_summary.md*"""
-            return file_section
 
-    # If no section-based match, try alternative parsing method
-    return _extract_file_section_alternative(summary_content, target_file_path)
+
+def get_summary_store(summary_path: Path) -> SummaryStore:
+    """Summary store for a summary file, refreshed from disk"""
+    key = str(summary_path.resolve())
+    if key not in SUMMARY_STORES:
+        SUMMARY_STORES[key] = SummaryStore(Path(key))
+    summary_store = SUMMARY_STORES[key]
+    summary_store.refresh()
+    return summary_store
 
 
 def _normalize_file_path(file_path: str) -> str:
@@ -1103,53 +2666,276 @@ def _remove_common_prefixes(file_path: str) -> str:
     return path
 
 
-def _extract_file_section_alternative(
-    summary_content: str, target_file_path: str
-) -> str:
-    """Alternative method to extract file section using simpler pattern matching"""
-
-    # Get the basename for fallback matching
-    target_basename = os.path.basename(target_file_path)
-
-    # Split by separator lines to get individual sections
-    sections = summary_content.split("=" * 80)
-
-    for i, section in enumerate(sections):
-        if "## IMPLEMENTATION File" in section:
-            # Extract the file path from the header
-            lines = section.strip().split("\n")
-            for line in lines:
-                if "## IMPLEMENTATION File" in line:
-                    # Extract file path between "File " and "; ROUND"
-                    try:
-                        file_part = line.split("File ")[1].split("; ROUND")[0].strip()
-
-                        # Check if this matches our target
-                        if (
-                            _normalize_file_path(target_file_path)
-                            == _normalize_file_path(file_part)
-                            or target_basename == os.path.basename(file_part)
-                            or target_file_path in file_part
-                            or file_part.endswith(target_file_path)
-                        ):
-                            # Get the next section which contains the content
-                            if i + 1 < len(sections):
-                                content_section = sections[i + 1].strip()
-                                return f"""================================================================================
-## IMPLEMENTATION File {file_part}
-================================================================================
+# ==================== Code Search Tools ====================
 
-{content_section}
 
----
-*Extracted from implement_code_summary.md using alternative method*"""
-                    except (IndexError, AttributeError):
+def _trigrams(text: str) -> Set[str]:
+    """Lowercase character trigrams of text"""
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _required_regex_literals(pattern: str) -> List[str]:
+    """
+    Literal runs every match of ``pattern`` must contain
+
+    Only top-level literal sequences are used; anything that could make a
+    literal optional (alternation, repeats, classes) just ends the run, so
+    an empty list means no narrowing is possible.
+    """
+    try:
+        try:
+            import re._parser as regex_parser
+        except ImportError:  # Python < 3.11
+            import sre_parse as regex_parser
+        parsed = regex_parser.parse(pattern)
+    except Exception:
+        return []
+
+    literals = []
+    current = []
+    for opcode, value in parsed:
+        if str(opcode) == "LITERAL":
+            current.append(chr(value))
+            continue
+        if len(current) >= 3:
+            literals.append("".join(current))
+        current = []
+    if len(current) >= 3:
+        literals.append("".join(current))
+    return literals
+
+
+def _walk_text_candidates(root: Path):
+    """Yield (relative_path, stat) for visible files, like a recursive glob"""
+    root = str(root)
+    prefix_length = len(root.rstrip(os.sep)) + 1
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
                         continue
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        relative_path = entry.path[prefix_length:]
+                        if os.sep != "/":
+                            relative_path = relative_path.replace(os.sep, "/")
+                        yield relative_path, entry.stat()
+        except OSError:
+            continue
 
-    return None
 
+def _file_pattern_matcher(file_pattern: str):
+    """Predicate on relative paths; basename-only patterns match like **/<pattern>"""
+    name_regex = re.compile(fnmatch.translate(file_pattern))
 
-# ==================== Code Search Tools ====================
+    def matches_pattern(relative_path: str) -> bool:
+        if "/" in file_pattern:
+            return PurePosixPath(relative_path).match(file_pattern)
+        return name_regex.match(relative_path.rsplit("/", 1)[-1]) is not None
+
+    return matches_pattern
+
+
+def _read_search_lines(full_path: Path) -> List[str]:
+    """Lines of a text file for searching; binary files have none"""
+    try:
+        with open(full_path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except UnicodeDecodeError:
+        return []
+    lines = content.split("\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+class WorkspaceSearchIndex:
+    """
+    Trigram postings over the text files below one search root
+
+    Files are re-read only when their mtime or size changes, and write_file
+    updates the index directly. Paths are relative, with forward slashes;
+    postings hold integer file ids in compact arrays, and a file's trigrams
+    are recomputed from its content when it is removed.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.stale = True
+        self.last_refresh = 0.0
+        self.signatures: Dict[str, tuple] = {}
+        self.file_ids: Dict[str, int] = {}
+        self.paths: Dict[int, str] = {}
+        self.contents: Dict[int, str] = {}
+        self.postings: Dict[str, array] = {}
+        self.large_files: Set[str] = set()
+        self.next_id = 0
+
+    def _remove(self, relative_path: str):
+        self.signatures.pop(relative_path, None)
+        self.large_files.discard(relative_path)
+        file_id = self.file_ids.pop(relative_path, None)
+        if file_id is None:
+            return
+        del self.paths[file_id]
+        for trigram in _trigrams(self.contents.pop(file_id)):
+            posting = self.postings.get(trigram)
+            if posting is not None:
+                posting.remove(file_id)
+                if not posting:
+                    del self.postings[trigram]
+
+    def _add(self, relative_path: str, signature: tuple, content: Optional[str]):
+        self._remove(relative_path)
+        self.signatures[relative_path] = signature
+        if content is None:
+            self.large_files.add(relative_path)
+            return
+        file_id = self.next_id
+        self.next_id += 1
+        self.file_ids[relative_path] = file_id
+        self.paths[file_id] = relative_path
+        self.contents[file_id] = content
+        postings = self.postings
+        for trigram in _trigrams(content):
+            posting = postings.get(trigram)
+            if posting is None:
+                posting = postings[trigram] = array("I")
+            posting.append(file_id)
+
+    def refresh(self):
+        """Bring the index up to date with the files on disk"""
+        self.stale = False
+        self.last_refresh = time.monotonic()
+        seen = set()
+        for relative_path, stats in _walk_text_candidates(self.root):
+            seen.add(relative_path)
+            signature = (stats.st_mtime_ns, stats.st_size)
+            if self.signatures.get(relative_path) == signature:
+                continue
+            if stats.st_size > SEARCH_INDEX_MAX_FILE_BYTES:
+                self._add(relative_path, signature, None)
+                continue
+            try:
+                with open(self.root / relative_path, "r", encoding="utf-8") as f:
+                    self._add(relative_path, signature, f.read())
+            except (OSError, UnicodeDecodeError):
+                # Binary or unreadable files are not searchable
+                self._remove(relative_path)
+                self.signatures[relative_path] = signature
+        for relative_path in set(self.signatures) - seen:
+            self._remove(relative_path)
+
+    def update_file(self, full_path: Path, content: str):
+        """Index content that was just written to full_path"""
+        relative_path = full_path.relative_to(self.root).as_posix()
+        if any(part.startswith(".") for part in relative_path.split("/")):
+            return
+        stats = full_path.stat()
+        signature = (stats.st_mtime_ns, stats.st_size)
+        self._add(
+            relative_path,
+            signature,
+            content if stats.st_size <= SEARCH_INDEX_MAX_FILE_BYTES else None,
+        )
+
+    def candidates(self, required_literals: List[str], file_pattern: str) -> List[str]:
+        """Files matching file_pattern that contain every required trigram"""
+        candidate_ids = None
+        required_trigrams = set()
+        for literal in required_literals:
+            required_trigrams |= _trigrams(literal)
+        for trigram in sorted(
+            required_trigrams, key=lambda t: len(self.postings.get(t, ()))
+        ):
+            posting = self.postings.get(trigram, ())
+            if candidate_ids is None:
+                candidate_ids = set(posting)
+            else:
+                candidate_ids.intersection_update(posting)
+            if not candidate_ids:
+                break
+        if candidate_ids is None:
+            candidate_files = set(self.file_ids)
+        else:
+            candidate_files = {self.paths[file_id] for file_id in candidate_ids}
+        candidate_files |= self.large_files
+
+        matches_pattern = _file_pattern_matcher(file_pattern)
+        return sorted(
+            relative_path
+            for relative_path in candidate_files
+            if matches_pattern(relative_path)
+        )
+
+    def read_lines(self, relative_path: str) -> List[str]:
+        file_id = self.file_ids.get(relative_path)
+        if file_id is None:
+            return _read_search_lines(self.root / relative_path)
+        lines = self.contents[file_id].split("\n")
+        if lines and not lines[-1]:
+            lines.pop()
+        return lines
+
+
+def get_search_index(search_path: Path) -> Optional[WorkspaceSearchIndex]:
+    """
+    Return the refreshed search index of a search root, or None when the
+    root should be scanned directly (see record_direct_search)
+    """
+    root = search_path.resolve()
+    key = str(root)
+    search_index = SEARCH_INDEXES.get(key)
+    if search_index is None:
+        in_workspace = WORKSPACE_DIR is not None and root.is_relative_to(
+            WORKSPACE_DIR.resolve()
+        )
+        scans, tree_bytes = SEARCHED_ROOTS.get(key, (0, 0))
+        if not in_workspace and (
+            scans < SEARCH_INDEX_MIN_SCANS or tree_bytes > SEARCH_INDEX_MAX_TREE_BYTES
+        ):
+            return None
+        SEARCHED_ROOTS.pop(key, None)
+        search_index = SEARCH_INDEXES[key] = WorkspaceSearchIndex(root)
+        while len(SEARCH_INDEXES) > SEARCH_INDEX_CACHE_SIZE:
+            SEARCH_INDEXES.popitem(last=False)
+    SEARCH_INDEXES.move_to_end(key)
+    if (
+        search_index.stale
+        or time.monotonic() - search_index.last_refresh > SEARCH_INDEX_REFRESH_SECONDS
+    ):
+        search_index.refresh()
+    return search_index
+
+
+def record_direct_search(root: Path, tree_bytes: int):
+    """Remember a direct scan of a root outside the workspace"""
+    key = str(root)
+    scans = SEARCHED_ROOTS.pop(key, (0, 0))[0]
+    SEARCHED_ROOTS[key] = (scans + 1, tree_bytes)
+    while len(SEARCHED_ROOTS) > SEARCHED_ROOTS_SIZE:
+        SEARCHED_ROOTS.popitem(last=False)
+
+
+def mark_search_indexes_stale():
+    """Force a re-stat on the next search, e.g. after code execution wrote files"""
+    for search_index in SEARCH_INDEXES.values():
+        search_index.stale = True
+
+
+def update_search_indexes(full_path: Path, content: str):
+    """Keep every search index covering full_path in sync with a write"""
+    for search_index in SEARCH_INDEXES.values():
+        if full_path.is_relative_to(search_index.root):
+            try:
+                search_index.update_file(full_path, content)
+            except OSError as e:
+                logger.warning(f"Failed to update search index for {full_path}: {e}")
 
 
 @mcp.tool()
@@ -1158,6 +2944,7 @@ async def search_code(
     file_pattern: str = "*.json",
     use_regex: bool = False,
     search_directory: str = None,
+    max_results: int = 50,
 ) -> str:
     """
     Search patterns in code files
@@ -1167,6 +2954,7 @@ async def search_code(
         file_pattern: File pattern (e.g., '*.py')
         use_regex: Whether to use regular expressions
         search_directory: Specify search directory (optional, uses WORKSPACE_DIR if not specified)
+        max_results: Stop searching once this many matches were found
 
     Returns:
         JSON string of search results
@@ -1194,48 +2982,70 @@ async def search_code(
             }
             return json.dumps(result, ensure_ascii=False, indent=2)
 
-        import glob
+        if use_regex:
+            compiled_pattern = re.compile(pattern)
+            required_literals = _required_regex_literals(pattern)
+        else:
+            lowered_pattern = pattern.lower()
+            required_literals = [lowered_pattern]
+
+        # Narrow candidate files with the trigram index, or scan a root that
+        # is searched for the first time without building one
+        search_index = get_search_index(search_path)
+        if search_index is not None:
+            candidate_files = search_index.candidates(required_literals, file_pattern)
+            read_lines = search_index.read_lines
+        else:
+            search_root = search_path.resolve()
+            matches_pattern = _file_pattern_matcher(file_pattern)
+            walked = list(_walk_text_candidates(search_root))
+            record_direct_search(
+                search_root,
+                sum(
+                    stats.st_size
+                    for _, stats in walked
+                    if stats.st_size <= SEARCH_INDEX_MAX_FILE_BYTES
+                ),
+            )
+            candidate_files = sorted(
+                relative_path
+                for relative_path, _ in walked
+                if matches_pattern(relative_path)
+            )
 
-        # Get matching files
-        file_paths = glob.glob(str(search_path / "**" / file_pattern), recursive=True)
+            def read_lines(relative_path: str) -> List[str]:
+                return _read_search_lines(search_root / relative_path)
 
         matches = []
         total_files_searched = 0
 
-        for file_path in file_paths:
+        for relative_path in candidate_files:
+            if len(matches) >= max_results:
+                break
             try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-
-                total_files_searched += 1
-                relative_path = os.path.relpath(file_path, search_path)
-
-                for line_num, line in enumerate(lines, 1):
-                    if use_regex:
-                        if re.search(pattern, line):
-                            matches.append(
-                                {
-                                    "file": relative_path,
-                                    "line_number": line_num,
-                                    "line_content": line.strip(),
-                                    "match_type": "regex",
-                                }
-                            )
-                    else:
-                        if pattern.lower() in line.lower():
-                            matches.append(
-                                {
-                                    "file": relative_path,
-                                    "line_number": line_num,
-                                    "line_content": line.strip(),
-                                    "match_type": "substring",
-                                }
-                            )
-
+                lines = read_lines(relative_path)
             except Exception as e:
-                logger.warning(f"Error searching file {file_path}: {e}")
+                logger.warning(f"Error searching file {relative_path}: {e}")
                 continue
 
+            total_files_searched += 1
+            for line_num, line in enumerate(lines, 1):
+                if use_regex:
+                    matched = compiled_pattern.search(line) is not None
+                else:
+                    matched = lowered_pattern in line.lower()
+                if matched:
+                    matches.append(
+                        {
+                            "file": relative_path,
+                            "line_number": line_num,
+                            "line_content": line.strip(),
+                            "match_type": "regex" if use_regex else "substring",
+                        }
+                    )
+                    if len(matches) >= max_results:
+                        break
+
         result = {
             "status": "success",
             "pattern": pattern,
@@ -1244,11 +3054,12 @@ async def search_code(
             "search_directory": str(search_path),
             "total_matches": len(matches),
             "total_files_searched": total_files_searched,
-            "matches": matches[:50],  # 限制返回前50个匹配
+            "candidate_files": len(candidate_files),
+            "matches": matches,
         }
 
-        if len(matches) > 50:
-            result["note"] = f"显示前50个匹配，总共找到{len(matches)}个匹配"
+        if len(matches) >= max_results:
+            result["note"] = f"Stopped after the first {max_results} matches"
 
         log_operation(
             "search_code",
@@ -1278,13 +3089,16 @@ async def search_code(
 
 
 @mcp.tool()
-async def get_file_structure(directory: str = ".", max_depth: int = 5) -> str:
+async def get_file_structure(
+    directory: str = ".", max_depth: int = 5, since_version: int = None
+) -> str:
     """
     Get directory file structure
 
     Args:
         directory: Directory path, relative to workspace
         max_depth: 最大遍历深度
+        since_version: Only list files changed after this snapshot version (optional)
 
     Returns:
         JSON string of file structure
@@ -1304,40 +3118,38 @@ async def get_file_structure(directory: str = ".", max_depth: int = 5) -> str:
             }
             return json.dumps(result, ensure_ascii=False, indent=2)
 
-        def scan_directory(path: Path, current_depth: int = 0) -> Dict[str, Any]:
-            """Recursively scan directory"""
-            if current_depth >= max_depth:
-                return {"type": "directory", "name": path.name, "truncated": True}
+        if not target_dir.is_dir():
+            result = {
+                "status": "error",
+                "message": f"Not a directory: {directory}",
+            }
+            return json.dumps(result, ensure_ascii=False, indent=2)
 
-            items = []
-            try:
-                for item in sorted(path.iterdir()):
-                    relative_path = os.path.relpath(item, WORKSPACE_DIR)
-
-                    if item.is_file():
-                        file_info = {
-                            "type": "file",
-                            "name": item.name,
-                            "path": relative_path,
-                            "size_bytes": item.stat().st_size,
-                            "extension": item.suffix,
-                        }
-                        items.append(file_info)
-                    elif item.is_dir() and not item.name.startswith("."):
-                        dir_info = scan_directory(item, current_depth + 1)
-                        dir_info["path"] = relative_path
-                        items.append(dir_info)
-            except PermissionError:
-                pass
+        # Served from the incrementally maintained workspace snapshot
+        snapshot = get_workspace_snapshot(WORKSPACE_DIR)
+        snapshot.refresh()
 
-            return {
-                "type": "directory",
-                "name": path.name,
-                "items": items,
-                "item_count": len(items),
-            }
+        if since_version is not None:
+            result = {"status": "success", **snapshot.changes_since(since_version)}
+            log_operation(
+                "get_file_structure",
+                {
+                    "since_version": since_version,
+                    "version": result["version"],
+                    "changed_files": len(result["changes"]),
+                },
+            )
+            return json.dumps(result, ensure_ascii=False, indent=2)
 
-        structure = scan_directory(target_dir)
+        relative_dir = os.path.relpath(target_dir, WORKSPACE_DIR).replace(os.sep, "/")
+        relative_dir = "" if relative_dir == "." else relative_dir
+        if relative_dir in snapshot.directories:
+            structure = snapshot.tree(relative_dir, max_depth)
+        else:
+            # Hidden and excluded directories are not part of the workspace snapshot
+            directory_snapshot = get_workspace_snapshot(target_dir)
+            directory_snapshot.refresh()
+            structure = directory_snapshot.tree("", max_depth, f"{relative_dir}/")
 
         # 统计信息
         def count_items(node):
@@ -1357,6 +3169,7 @@ async def get_file_structure(directory: str = ".", max_depth: int = 5) -> str:
             "status": "success",
             "directory": directory,
             "max_depth": max_depth,
+            "version": snapshot.version,
             "structure": structure,
             "summary": {
                 "total_files": counts["files"],
@@ -1414,10 +3227,17 @@ async def set_workspace(workspace_path: str) -> str:
         new_workspace.mkdir(parents=True, exist_ok=True)
 
         old_workspace = WORKSPACE_DIR
+        # Journal what happened so far next to the old workspace
+        OPERATION_HISTORY.flush()
         WORKSPACE_DIR = new_workspace
 
         logger.info(f"New Workspace: {WORKSPACE_DIR}")
 
+        # Start warm Python workers while the agent plans its first files
+        worker_pool = get_python_worker_pool()
+        if worker_pool is not None:
+            worker_pool.warm_up()
+
         result = {
             "status": "success",
             "message": f"Workspace setup successful: {workspace_path}",
@@ -1448,29 +3268,42 @@ async def set_workspace(workspace_path: str) -> str:
 
 
 @mcp.tool()
-async def get_operation_history(last_n: int = 10) -> str:
+async def get_operation_history(
+    last_n: int = 10, action: str = "", file_path: str = "", stats_only: bool = False
+) -> str:
     """
     Get operation history
 
     Args:
         last_n: Return the last N operations
+        action: Only return operations of this action, e.g. "write_file" (optional)
+        file_path: Only return operations on this file (optional)
+        stats_only: Only return the aggregate counters
 
     Returns:
         JSON string of operation history
     """
     try:
-        recent_history = (
-            OPERATION_HISTORY[-last_n:] if last_n > 0 else OPERATION_HISTORY
-        )
-
         result = {
             "status": "success",
-            "total_operations": len(OPERATION_HISTORY),
-            "returned_operations": len(recent_history),
+            "total_operations": OPERATION_HISTORY.total_operations,
             "workspace": str(WORKSPACE_DIR) if WORKSPACE_DIR else None,
-            "history": recent_history,
+            "stats": OPERATION_HISTORY.stats(),
         }
 
+        if not stats_only:
+            recent_history = OPERATION_HISTORY.query(last_n, action, file_path)
+            result["returned_operations"] = len(recent_history)
+            result["history"] = recent_history
+
+        # Make the journal complete for anyone reading it alongside
+        OPERATION_HISTORY.flush()
+        result["journal_path"] = (
+            str(OPERATION_HISTORY.journal_path)
+            if OPERATION_HISTORY.journal_path
+            else None
+        )
+
         return json.dumps(result, ensure_ascii=False, indent=2)
 
     except Exception as e:
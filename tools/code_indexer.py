@@ -13,11 +13,17 @@ Features:
 - Automatic LLM provider selection based on API key availability
 """
 
+import ast
 import asyncio
+import hashlib
 import json
 import logging
+import math
 import os
 import re
+import sqlite3
+import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from dataclasses import dataclass, asdict
@@ -26,6 +32,134 @@ from typing import List, Dict, Any
 # MCP Agent imports for LLM
 from utils.llm_utils import get_preferred_llm_class, get_default_models
 
+# Bump whenever the analysis or relationship prompts change so that persisted
+# cache entries produced by older prompts are no longer served
+ANALYSIS_PROMPT_VERSION = "2"
+
+# Analysis cache writes (stores and access-time updates) are committed in
+# batches, at the latest after this many seconds; eviction trims the cache to
+# this fraction of its limits so it does not run again on the next store
+ANALYSIS_CACHE_COMMIT_BATCH = 64
+ANALYSIS_CACHE_COMMIT_SECONDS = 5.0
+ANALYSIS_CACHE_EVICTION_TARGET = 0.9
+# Seconds to wait for another process holding the cache's write lock
+ANALYSIS_CACHE_BUSY_TIMEOUT_SECONDS = 30.0
+
+# Data and configuration formats that are summarized without an LLM call
+STATIC_CONFIG_EXTENSIONS = {".json", ".yaml", ".yml", ".toml", ".xml"}
+
+# Tokens too common in paths and target structures to carry ranking signal
+PRE_FILTER_STOPWORDS = set(
+    "a an and as at be by file files for from in is it of on or"
+    " the this to with py js ts src lib main init txt md yaml yml json".split()
+)
+
+# Lightweight (symbol patterns, import patterns) extractors for languages
+# without a parser in the standard library
+_C_FAMILY_PATTERNS = (
+    [
+        r"^\s*(?:class|struct|enum|union|namespace)\s+(\w+)",
+        r"^[\w\*&:<>,\s]*?\b(\w+)\s*\([^;{}()]*\)\s*(?:const\s*)?\{",
+        r"^\s*@(?:interface|implementation|protocol)\s+(\w+)",
+    ],
+    [r"^\s*#\s*(?:include|import)\s*[<\"]([^>\"]+)[>\"]"],
+)
+_JVM_PATTERNS = (
+    [
+        r"^\s*(?:[\w@]+\s+)*(?:class|interface|enum|record|object|trait|struct)\s+(\w+)",
+        r"^\s*(?:[\w@]+\s+)*(?:fun|def)\s+(?:<[^>]*>\s*)?(?:\w+\.)?(\w+)",
+        r"^\s*(?:(?:public|private|protected|internal|static|final|abstract|synchronized|async|override|virtual)\s+)+[\w<>\[\],\s\?]+\s+(\w+)\s*\([^;]*$",
+    ],
+    [r"^\s*import\s+(?:static\s+)?([\w.*]+)", r"^\s*using\s+([\w.]+)\s*;"],
+)
+STATIC_REGEX_PATTERNS = {
+    ".js": (
+        [
+            r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(\w+)",
+            r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(\w+)",
+            r"^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*=>",
+            r"^\s*(?:export\s+)?(?:interface|type|enum)\s+(\w+)",
+        ],
+        [
+            r"^\s*import\s+(?:[^'\"]*\s+from\s+)?['\"]([^'\"]+)['\"]",
+            r"require\(\s*['\"]([^'\"]+)['\"]\s*\)",
+        ],
+    ),
+    ".java": _JVM_PATTERNS,
+    ".c": _C_FAMILY_PATTERNS,
+    ".go": (
+        [
+            r"^func\s+(?:\([^)]*\)\s*)?(\w+)",
+            r"^type\s+(\w+)\s+(?:struct|interface)",
+        ],
+        [r"^\s*import\s+(?:\w+\s+)?\"([^\"]+)\"", r"^\s+(?:\w+\s+)?\"([^\"]+)\"\s*$"],
+    ),
+    ".rs": (
+        [
+            r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+(\w+)",
+            r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|mod)\s+(\w+)",
+        ],
+        [r"^\s*(?:pub\s+)?use\s+([\w:]+)", r"^\s*extern\s+crate\s+(\w+)"],
+    ),
+    ".rb": (
+        [r"^\s*def\s+(?:self\.)?(\w+[?!]?)", r"^\s*(?:class|module)\s+([\w:]+)"],
+        [r"^\s*require(?:_relative)?\s+['\"]([^'\"]+)['\"]"],
+    ),
+    ".php": (
+        [
+            r"^\s*(?:[\w]+\s+)*function\s+(\w+)",
+            r"^\s*(?:abstract\s+|final\s+)?(?:class|interface|trait)\s+(\w+)",
+        ],
+        [
+            r"^\s*use\s+([\w\\]+)",
+            r"^\s*(?:require|include)(?:_once)?\s*\(?\s*['\"]([^'\"]+)['\"]",
+        ],
+    ),
+    ".swift": (
+        [
+            r"^\s*(?:[\w@]+\s+)*func\s+(\w+)",
+            r"^\s*(?:[\w@]+\s+)*(?:class|struct|protocol|enum|extension)\s+(\w+)",
+        ],
+        [r"^\s*import\s+(\w+)"],
+    ),
+    ".r": (
+        [r"^\s*([\w.]+)\s*(?:<-|=)\s*function\b"],
+        [r"\b(?:library|require)\(\s*['\"]?([\w.]+)['\"]?\s*\)"],
+    ),
+    ".matlab": ([r"^\s*function\s+(?:[^=\n]*=\s*)?(\w+)"], []),
+    ".sql": (
+        [
+            r"(?i)^\s*create\s+(?:or\s+replace\s+)?(?:temporary\s+)?(?:table|view|function|procedure|index|trigger)\s+(?:if\s+not\s+exists\s+)?([\w.\"`]+)"
+        ],
+        [],
+    ),
+    ".sh": (
+        [r"^\s*(?:function\s+)?([\w-]+)\s*\(\)\s*\{?", r"^\s*function\s+([\w-]+)"],
+        [r"^\s*(?:source|\.)\s+([\w./-]+)"],
+    ),
+    ".ps1": ([r"(?i)^\s*function\s+([\w-]+)"], [r"(?i)^\s*Import-Module\s+([\w.-]+)"]),
+    ".bat": ([r"^:(\w+)"], [r"(?i)^\s*call\s+([\w./\\-]+)"]),
+}
+for _extension, _alias in (
+    (".ts", ".js"),
+    (".kt", ".java"),
+    (".scala", ".java"),
+    (".cs", ".java"),
+    (".cpp", ".c"),
+    (".h", ".c"),
+    (".hpp", ".c"),
+    (".m", ".c"),
+    (".mm", ".c"),
+):
+    STATIC_REGEX_PATTERNS[_extension] = STATIC_REGEX_PATTERNS[_alias]
+STATIC_REGEX_PATTERNS = {
+    extension: (
+        [re.compile(pattern, re.MULTILINE) for pattern in symbol_patterns],
+        [re.compile(pattern, re.MULTILINE) for pattern in import_patterns],
+    )
+    for extension, (symbol_patterns, import_patterns) in STATIC_REGEX_PATTERNS.items()
+}
+
 
 @dataclass
 class FileRelationship:
@@ -65,6 +199,239 @@ class RepoIndex:
     analysis_metadata: Dict[str, Any]
 
 
+@dataclass
+class RepoSnapshot:
+    """Single-pass scan of a repository shared by tree rendering and discovery"""
+
+    repo_path: Path
+    # Visible children of each directory ("" is the root), in tree order
+    children: Dict[str, List[str]]
+    # stat results of every scanned entry, keyed by repo-relative POSIX path
+    stats: Dict[str, os.stat_result]
+    directories: set
+    # Supported source files in tree order
+    files: List[Path]
+    # Directories that could not be listed, mapped to the error message
+    errors: Dict[str, str]
+    scan_seconds: float = 0.0
+
+
+class AnalysisCache:
+    """
+    Persistent, content-addressed store for LLM analysis results
+
+    Entries are keyed by the SHA-256 of the file content combined with the
+    prompt version and model, so identical files across repositories, forks
+    and re-runs are only analyzed once. Least recently used entries are evicted
+    once the configured entry or size limits are exceeded.
+
+    Stores and access-time updates are buffered and written in one short
+    transaction per batch, so several processes can share a cache file (WAL
+    mode, busy timeout). Entry count and total size are re-read at each
+    batch commit and tracked in memory in between. Database errors are
+    logged and treated as cache misses; they never fail an analysis.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_entries: int = 50000,
+        max_size_mb: float = 256,
+        logger: logging.Logger = None,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.logger = logger or logging.getLogger("CodeIndexer")
+
+        self.connection = sqlite3.connect(
+            str(self.db_path), timeout=ANALYSIS_CACHE_BUSY_TIMEOUT_SECONDS
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_cache_access "
+            "ON analysis_cache (last_access)"
+        )
+        self.connection.commit()
+
+        self.entry_count, self.total_size = self._read_totals()
+        # cache_key -> (kind, serialized payload) not yet written to the table
+        self.pending_puts: Dict[str, tuple] = {}
+        # cache_key -> last access time not yet written to the table
+        self.pending_access: Dict[str, float] = {}
+        self.last_commit = time.monotonic()
+
+    def _read_totals(self) -> tuple:
+        return self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM analysis_cache"
+        ).fetchone()
+
+    @staticmethod
+    def make_key(kind: str, *parts: str) -> str:
+        """Build a cache key from the entry kind and its identifying parts"""
+        digest = hashlib.sha256()
+        for part in (kind, ANALYSIS_PROMPT_VERSION, *parts):
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return f"{kind}:{digest.hexdigest()}"
+
+    def get(self, cache_key: str) -> Any:
+        """Return the cached payload for a key, or None if absent"""
+        if cache_key in self.pending_puts:
+            return json.loads(self.pending_puts[cache_key][1])
+
+        try:
+            row = self.connection.execute(
+                "SELECT payload FROM analysis_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Analysis cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+
+        self.pending_access[cache_key] = time.time()
+        self._maybe_commit()
+        return json.loads(row[0])
+
+    def put(self, cache_key: str, kind: str, payload: Any):
+        """Store a payload and evict old entries if limits are exceeded"""
+        serialized = json.dumps(payload, ensure_ascii=False)
+        previous = self.pending_puts.get(cache_key)
+        if previous is not None:
+            self.total_size -= len(previous[1])
+        else:
+            try:
+                row = self.connection.execute(
+                    "SELECT size_bytes FROM analysis_cache WHERE cache_key = ?",
+                    (cache_key,),
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.entry_count += 1
+            else:
+                self.total_size -= row[0]
+        self.total_size += len(serialized)
+        self.pending_puts[cache_key] = (kind, serialized)
+        self.pending_access.pop(cache_key, None)
+
+        if self.entry_count > self.max_entries or self.total_size > self.max_size_bytes:
+            self.evict()
+        else:
+            self._maybe_commit()
+
+    def _maybe_commit(self):
+        """Commit once enough writes are pending or the last commit is old"""
+        if (
+            len(self.pending_puts) + len(self.pending_access)
+            >= ANALYSIS_CACHE_COMMIT_BATCH
+            or time.monotonic() - self.last_commit >= ANALYSIS_CACHE_COMMIT_SECONDS
+        ):
+            self.commit()
+
+    def commit(self) -> bool:
+        """
+        Write pending stores and access times in one transaction and re-read
+        the totals, which other processes may have changed
+
+        Returns False when the database could not be written; the pending
+        changes are kept for the next attempt.
+        """
+        self.last_commit = time.monotonic()
+        if not self.pending_puts and not self.pending_access:
+            return True
+
+        now = time.time()
+        try:
+            with self.connection:
+                self.connection.executemany(
+                    """
+                    INSERT OR REPLACE INTO analysis_cache
+                        (cache_key, kind, payload, size_bytes, last_access)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (cache_key, kind, serialized, len(serialized), now)
+                        for cache_key, (kind, serialized) in self.pending_puts.items()
+                    ],
+                )
+                self.connection.executemany(
+                    "UPDATE analysis_cache SET last_access = ? WHERE cache_key = ?",
+                    [
+                        (last_access, cache_key)
+                        for cache_key, last_access in self.pending_access.items()
+                    ],
+                )
+                self.entry_count, self.total_size = self._read_totals()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Analysis cache write failed, will retry: {e}")
+            return False
+
+        self.pending_puts.clear()
+        self.pending_access.clear()
+        return True
+
+    def evict(self) -> int:
+        """
+        Evict least recently used entries once a limit is exceeded, down to
+        ANALYSIS_CACHE_EVICTION_TARGET of the limits
+        """
+        # Access order and totals must include everything not written yet
+        if not self.commit() or (
+            self.entry_count <= self.max_entries
+            and self.total_size <= self.max_size_bytes
+        ):
+            return 0
+
+        target_entries = int(self.max_entries * ANALYSIS_CACHE_EVICTION_TARGET)
+        target_size = int(self.max_size_bytes * ANALYSIS_CACHE_EVICTION_TARGET)
+        entry_count, total_size = self.entry_count, self.total_size
+        stale_keys = []
+        try:
+            with self.connection:
+                rows = self.connection.execute(
+                    "SELECT cache_key, size_bytes FROM analysis_cache "
+                    "ORDER BY last_access ASC"
+                )
+                for cache_key, size_bytes in rows:
+                    if entry_count <= target_entries and total_size <= target_size:
+                        break
+                    stale_keys.append((cache_key,))
+                    entry_count -= 1
+                    total_size -= size_bytes
+
+                self.connection.executemany(
+                    "DELETE FROM analysis_cache WHERE cache_key = ?", stale_keys
+                )
+        except sqlite3.Error as e:
+            self.logger.warning(f"Analysis cache eviction failed: {e}")
+            return 0
+
+        self.entry_count, self.total_size = entry_count, total_size
+        return len(stale_keys)
+
+    def close(self):
+        """Commit pending changes and close the database connection"""
+        try:
+            self.commit()
+            self.connection.close()
+        except sqlite3.Error:
+            pass
+
+
 class CodeIndexer:
     """Main class for building code repository indexes"""
 
@@ -161,6 +528,25 @@ class CodeIndexer:
 
         self.max_file_size = file_analysis_config.get("max_file_size", 1048576)  # 1MB
         self.max_content_length = file_analysis_config.get("max_content_length", 3000)
+        self.enable_static_analysis = file_analysis_config.get(
+            "enable_static_analysis", True
+        )
+        self.skeleton_min_chars = file_analysis_config.get("skeleton_min_chars", 1500)
+
+        # "lexical" ranks files locally, "hybrid" adds an LLM re-rank of the
+        # top candidates, "llm" sends the whole file tree to the LLM
+        self.pre_filter_mode = file_analysis_config.get("pre_filter_mode", "lexical")
+        # At least pre_filter_top_k files are kept, more in large repositories
+        self.pre_filter_top_k = file_analysis_config.get("pre_filter_top_k", 60)
+        self.pre_filter_top_fraction = file_analysis_config.get(
+            "pre_filter_top_fraction", 0.2
+        )
+        self.pre_filter_rerank_top_k = file_analysis_config.get(
+            "pre_filter_rerank_top_k", 30
+        )
+        self.pre_filter_content_bytes = file_analysis_config.get(
+            "pre_filter_content_bytes", 4096
+        )
 
         # Load LLM configuration
         llm_config = self.indexer_config.get("llm", {})
@@ -174,6 +560,9 @@ class CodeIndexer:
         self.request_delay = llm_config.get("request_delay", 0.1)
         self.max_retries = llm_config.get("max_retries", 3)
         self.retry_delay = llm_config.get("retry_delay", 1.0)
+        # "combined" asks for summary and relationships in one call per file,
+        # "separate" keeps the original two-call analysis
+        self.analysis_mode = llm_config.get("analysis_mode", "combined")
 
         # Load relationship configuration
         relationship_config = self.indexer_config.get("relationships", {})
@@ -197,10 +586,36 @@ class CodeIndexer:
             "enable_concurrent_analysis", False
         )
         self.max_concurrent_files = performance_config.get("max_concurrent_files", 5)
+        self.max_concurrent_repositories = performance_config.get(
+            "max_concurrent_repositories", 4
+        )
+        self.file_analysis_semaphore = None
+        self.enable_batch_analysis = performance_config.get(
+            "enable_batch_analysis", True
+        )
+        self.batch_max_file_size = performance_config.get("batch_max_file_size", 2048)
+        self.batch_token_budget = performance_config.get("batch_token_budget", 6000)
+        self.batch_max_files = performance_config.get("batch_max_files", 8)
         self.enable_content_caching = performance_config.get(
             "enable_content_caching", False
         )
         self.max_cache_size = performance_config.get("max_cache_size", 100)
+        self.enable_persistent_cache = performance_config.get(
+            "enable_persistent_cache", True
+        )
+        self.persistent_cache_path = performance_config.get(
+            "persistent_cache_path", None
+        )
+        self.persistent_cache_max_entries = performance_config.get(
+            "persistent_cache_max_entries", 50000
+        )
+        self.persistent_cache_max_size_mb = performance_config.get(
+            "persistent_cache_max_size_mb", 256
+        )
+        self.enable_incremental_indexing = performance_config.get(
+            "enable_incremental_indexing", True
+        )
+        self.enable_index_journal = performance_config.get("enable_index_journal", True)
 
         # Load debug configuration
         debug_config = self.indexer_config.get("debug", {})
@@ -225,9 +640,26 @@ class CodeIndexer:
         self.stats_filename = output_config.get(
             "stats_filename", "indexing_statistics.json"
         )
+        # Manifests deliberately avoid the .json suffix so that index loaders
+        # globbing "*.json" in the output directory do not pick them up
+        self.manifest_filename_pattern = output_config.get(
+            "manifest_filename_pattern", "{repo_name}_index.manifest"
+        )
+        self.journal_filename_pattern = output_config.get(
+            "journal_filename_pattern", "{repo_name}_index.journal.jsonl"
+        )
 
         # Initialize caching if enabled
-        self.content_cache = {} if self.enable_content_caching else None
+        self.content_cache = OrderedDict() if self.enable_content_caching else None
+        self.analysis_cache = None
+        self.cache_stats: Dict[str, Dict[str, int]] = {}
+        self.content_hashes: Dict[str, str] = {}
+        # Files whose last relationship discovery failed (not "no relationships")
+        self.relationship_failures: set = set()
+        self.incremental_states: Dict[str, Dict[str, Any]] = {}
+        self.journal_handles: Dict[str, Any] = {}
+        self.repo_snapshots: Dict[str, RepoSnapshot] = {}
+        self.llm_call_stats: Dict[str, Dict[str, int]] = {}
 
         # Create debug directory if needed
         if self.save_raw_responses:
@@ -464,7 +896,60 @@ class CodeIndexer:
 
     def _generate_mock_response(self, prompt: str) -> str:
         """Generate mock LLM response for testing"""
-        if "JSON format" in prompt and "file_type" in prompt:
+        batch_paths = re.findall(r"^\s*### File: (.+)$", prompt, re.MULTILINE)
+        if batch_paths:
+            # Packed multi-file analysis mock
+            return json.dumps(
+                {
+                    "files": [
+                        {
+                            "file_path": path.strip(),
+                            "file_type": "Python module",
+                            "main_functions": ["main_function"],
+                            "key_concepts": ["configuration"],
+                            "dependencies": [],
+                            "summary": "Mock analysis of a small file.",
+                            "relationships": [
+                                {
+                                    "target_file_path": "src/core/mock.py",
+                                    "relationship_type": "utility",
+                                    "confidence_score": 0.5,
+                                    "helpful_aspects": ["helpers"],
+                                    "potential_contributions": ["utility methods"],
+                                    "usage_suggestions": "Mock batch suggestion.",
+                                }
+                            ],
+                        }
+                        for path in batch_paths
+                    ]
+                }
+            )
+        elif (
+            "JSON format" in prompt
+            and "file_type" in prompt
+            and "relationships" in prompt
+        ):
+            # Combined analysis and relationship mock
+            return """
+            {
+                "file_type": "Python module",
+                "main_functions": ["main_function", "helper_function"],
+                "key_concepts": ["data_processing", "algorithm"],
+                "dependencies": ["numpy", "pandas"],
+                "summary": "Mock analysis of code file functionality.",
+                "relationships": [
+                    {
+                        "target_file_path": "src/core/mock.py",
+                        "relationship_type": "partial_match",
+                        "confidence_score": 0.8,
+                        "helpful_aspects": ["algorithm implementation", "data structures"],
+                        "potential_contributions": ["core functionality", "utility methods"],
+                        "usage_suggestions": "Mock relationship suggestion for testing."
+                    }
+                ]
+            }
+            """
+        elif "JSON format" in prompt and "file_type" in prompt:
             # File analysis mock
             return """
             {
@@ -539,79 +1024,360 @@ class CodeIndexer:
         except Exception as e:
             self.logger.warning(f"Failed to save debug response: {e}")
 
-    def get_all_repo_files(self, repo_path: Path) -> List[Path]:
-        """Recursively get all supported files in a repository"""
+    def scan_repository(self, repo_path: Path) -> RepoSnapshot:
+        """
+        Scan a repository once with os.scandir and cache the snapshot
+
+        The snapshot serves the file tree, the supported file list and the
+        per-file size/mtime lookups of the current run, so the repository is
+        not walked or stat'ed again.
+        """
+        start_time = time.perf_counter()
+        children: Dict[str, List[str]] = {}
+        stats: Dict[str, os.stat_result] = {}
+        directories = set()
         files = []
+        errors: Dict[str, str] = {}
 
-        try:
-            for root, dirs, filenames in os.walk(repo_path):
-                # Skip common non-code directories
-                dirs[:] = [
-                    d
-                    for d in dirs
-                    if not d.startswith(".") and d not in self.skip_directories
-                ]
+        def scan(directory: str, relative_directory: str):
+            prefix = f"{relative_directory}/" if relative_directory else ""
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = list(iterator)
+            except PermissionError:
+                errors[relative_directory] = "Permission Denied"
+                return
+            except OSError as e:
+                errors[relative_directory] = f"Error: {str(e)}"
+                return
 
-                for filename in filenames:
-                    file_path = Path(root) / filename
-                    if file_path.suffix.lower() in self.supported_extensions:
-                        files.append(file_path)
+            found_directories = []
+            found_files = []
+            for entry in entries:
+                hidden = (
+                    entry.name.startswith(".") or entry.name in self.skip_directories
+                )
+                try:
+                    if entry.is_dir():
+                        # Skipped directories are neither listed nor descended into
+                        if not hidden:
+                            found_directories.append((entry.name.lower(), entry))
+                        continue
+                    file_stats = entry.stat()
+                except OSError:
+                    continue
+                found_files.append((entry.name.lower(), entry.name, hidden))
+                stats[f"{prefix}{entry.name}"] = file_stats
+
+            # Directories first, then files, case-insensitively sorted
+            found_directories.sort(key=lambda item: item[0])
+            found_files.sort()
+            children[relative_directory] = [
+                entry.name for _, entry in found_directories
+            ] + [name for _, name, hidden in found_files if not hidden]
+
+            for _, entry in found_directories:
+                directories.add(f"{prefix}{entry.name}")
+                if not entry.is_symlink():
+                    scan(entry.path, f"{prefix}{entry.name}")
+            # Supported files include dotfiles that the tree does not display
+            for _, name, _ in found_files:
+                if os.path.splitext(name)[1].lower() in self.supported_extensions:
+                    files.append(repo_path / f"{prefix}{name}")
+
+        scan(str(repo_path), "")
+
+        snapshot = RepoSnapshot(
+            repo_path=repo_path,
+            children=children,
+            stats=stats,
+            directories=directories,
+            files=files,
+            errors=errors,
+            scan_seconds=round(time.perf_counter() - start_time, 4),
+        )
+        self.repo_snapshots[repo_path.name] = snapshot
+        return snapshot
+
+    def _get_repo_snapshot(self, repo_path: Path) -> RepoSnapshot:
+        """Return the snapshot of the current run, scanning on first use"""
+        snapshot = self.repo_snapshots.get(repo_path.name)
+        if snapshot is None or snapshot.repo_path != repo_path:
+            snapshot = self.scan_repository(repo_path)
+        return snapshot
+
+    def _stat_file(self, file_path: Path) -> os.stat_result:
+        """stat() a repository file, served from the scan snapshot when possible"""
+        try:
+            relative_path = file_path.relative_to(self.code_base_path).as_posix()
+        except ValueError:
+            return file_path.stat()
+        repo_name, _, repo_relative_path = relative_path.partition("/")
+        snapshot = self.repo_snapshots.get(repo_name)
+        if snapshot is not None and repo_relative_path in snapshot.stats:
+            return snapshot.stats[repo_relative_path]
+        return file_path.stat()
 
+    def get_all_repo_files(self, repo_path: Path) -> List[Path]:
+        """Recursively get all supported files in a repository"""
+        try:
+            return list(self._get_repo_snapshot(repo_path).files)
         except Exception as e:
             self.logger.error(f"Error traversing {repo_path}: {e}")
-
-        return files
+            return []
 
     def generate_file_tree(self, repo_path: Path, max_depth: int = 5) -> str:
         """Generate file tree structure string for the repository"""
+        snapshot = self._get_repo_snapshot(repo_path)
         tree_lines = []
 
-        def add_to_tree(current_path: Path, prefix: str = "", depth: int = 0):
+        def add_to_tree(relative_directory: str, prefix: str = "", depth: int = 0):
             if depth > max_depth:
                 return
 
-            try:
-                items = sorted(
-                    current_path.iterdir(), key=lambda x: (x.is_file(), x.name.lower())
+            if relative_directory in snapshot.errors:
+                tree_lines.append(
+                    f"{prefix}├── [{snapshot.errors[relative_directory]}]"
                 )
-                # Filter out irrelevant directories and files
-                items = [
-                    item
-                    for item in items
-                    if not item.name.startswith(".")
-                    and item.name not in self.skip_directories
-                ]
-
-                for i, item in enumerate(items):
-                    is_last = i == len(items) - 1
-                    current_prefix = "└── " if is_last else "├── "
-                    tree_lines.append(f"{prefix}{current_prefix}{item.name}")
-
-                    if item.is_dir():
-                        extension_prefix = "    " if is_last else "│   "
-                        add_to_tree(item, prefix + extension_prefix, depth + 1)
-                    elif item.suffix.lower() in self.supported_extensions:
-                        # Add file size information
-                        try:
-                            size = item.stat().st_size
-                            if size > 1024:
-                                size_str = f" ({size // 1024}KB)"
-                            else:
-                                size_str = f" ({size}B)"
-                            tree_lines[-1] += size_str
-                        except (OSError, PermissionError):
-                            pass
+                return
 
-            except PermissionError:
-                tree_lines.append(f"{prefix}├── [Permission Denied]")
-            except Exception as e:
-                tree_lines.append(f"{prefix}├── [Error: {str(e)}]")
+            items = snapshot.children.get(relative_directory, [])
+            for i, name in enumerate(items):
+                relative_path = (
+                    f"{relative_directory}/{name}" if relative_directory else name
+                )
+                is_last = i == len(items) - 1
+                current_prefix = "└── " if is_last else "├── "
+                tree_lines.append(f"{prefix}{current_prefix}{name}")
+
+                if relative_path in snapshot.directories:
+                    extension_prefix = "    " if is_last else "│   "
+                    add_to_tree(relative_path, prefix + extension_prefix, depth + 1)
+                elif os.path.splitext(name)[1].lower() in self.supported_extensions:
+                    # Add file size information
+                    size = snapshot.stats[relative_path].st_size
+                    if size > 1024:
+                        size_str = f" ({size // 1024}KB)"
+                    else:
+                        size_str = f" ({size}B)"
+                    tree_lines[-1] += size_str
 
         tree_lines.append(f"{repo_path.name}/")
-        add_to_tree(repo_path)
+        add_to_tree("")
         return "\n".join(tree_lines)
 
-    async def pre_filter_files(self, repo_path: Path, file_tree: str) -> List[str]:
+    async def pre_filter_files(
+        self, repo_path: Path, file_tree: str, all_files: List[Path] = None
+    ) -> List[str]:
+        """
+        Select files relevant to the target structure
+
+        The default "lexical" mode ranks files locally with BM25 over path
+        tokens, file-name stems and identifiers from the head of each file.
+        "hybrid" additionally lets the LLM re-rank the top candidates, and
+        "llm" keeps the original whole-tree LLM selection.
+        """
+        if self.pre_filter_mode == "llm":
+            return await self._llm_pre_filter_files(repo_path, file_tree)
+
+        if all_files is None:
+            all_files = self.get_all_repo_files(repo_path)
+
+        start_time = time.perf_counter()
+        ranked_files = self._rank_files_lexically(repo_path, all_files)
+        self.logger.info(
+            f"Lexical pre-filtering ranked {len(ranked_files)} of {len(all_files)} files "
+            f"in {(time.perf_counter() - start_time) * 1000:.1f} ms"
+        )
+        limit = max(
+            self.pre_filter_top_k,
+            math.ceil(len(all_files) * self.pre_filter_top_fraction),
+        )
+        selected_files = [path for path, _ in ranked_files[:limit]]
+        unmatched_count = len(all_files) - len(ranked_files)
+        over_limit_count = len(ranked_files) - len(selected_files)
+        if unmatched_count or over_limit_count:
+            self.logger.info(
+                f"Pre-filtering kept {len(selected_files)} of {len(all_files)} files: "
+                f"{unmatched_count} share no terms with the target structure, "
+                f"{over_limit_count} ranked below the limit of {limit} "
+                f"(pre_filter_top_k={self.pre_filter_top_k}, "
+                f"pre_filter_top_fraction={self.pre_filter_top_fraction})"
+            )
+
+        if self.pre_filter_mode == "hybrid" and selected_files:
+            reranked_files = await self._llm_rerank_files(
+                repo_path, ranked_files[: self.pre_filter_rerank_top_k]
+            )
+            if reranked_files:
+                head = set(
+                    path for path, _ in ranked_files[: self.pre_filter_rerank_top_k]
+                )
+                selected_files = reranked_files + [
+                    path for path in selected_files if path not in head
+                ]
+
+        return selected_files
+
+    @staticmethod
+    def _tokenize_for_ranking(text: str) -> List[str]:
+        """Split identifiers and paths into lowercase word tokens"""
+        # camelCase and PascalCase boundaries become separators
+        text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+        text = re.sub(r"([A-Z]+)([A-Z][a-z])", r"\1 \2", text)
+        return [
+            token
+            for token in re.split(r"[^a-z0-9]+", text.lower())
+            if len(token) > 1 and token not in PRE_FILTER_STOPWORDS
+        ]
+
+    def _rank_files_lexically(
+        self, repo_path: Path, all_files: List[Path]
+    ) -> List[tuple]:
+        """Score repository files against the target structure with BM25"""
+        target_files = self.extract_target_files()
+        target_names = {Path(target).name.lower() for target in target_files}
+        target_stems = {Path(target).stem.lower() for target in target_files}
+
+        query_counts: Dict[str, int] = {}
+        for token in self._tokenize_for_ranking(self.target_structure or ""):
+            query_counts[token] = query_counts.get(token, 0) + 1
+        # File-name stems in the target structure are the strongest signal
+        for stem in target_stems:
+            for token in self._tokenize_for_ranking(stem):
+                query_counts[token] = query_counts.get(token, 0) + 2
+        if not query_counts:
+            return []
+
+        documents = []
+        document_frequency: Dict[str, int] = {}
+        for file_path in all_files:
+            relative_path = str(file_path.relative_to(repo_path)).replace("\\", "/")
+            term_counts: Dict[str, int] = {}
+            tokens = (
+                self._tokenize_for_ranking(str(Path(relative_path).parent))
+                + self._tokenize_for_ranking(file_path.stem) * 3
+                + self._read_ranking_signals(file_path)
+            )
+            for token in tokens:
+                term_counts[token] = term_counts.get(token, 0) + 1
+            for token in term_counts:
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+            documents.append((file_path, relative_path, term_counts, len(tokens)))
+
+        if not documents:
+            return []
+
+        # Okapi BM25 with the usual k1/b parameters
+        k1, b = 1.5, 0.75
+        document_count = len(documents)
+        average_length = sum(length for *_, length in documents) / document_count or 1
+        query_weights = {
+            token: 1 + math.log(count) for token, count in query_counts.items()
+        }
+        idf = {
+            token: math.log(
+                1
+                + (document_count - document_frequency.get(token, 0) + 0.5)
+                / (document_frequency.get(token, 0) + 0.5)
+            )
+            for token in query_weights
+        }
+
+        ranked_files = []
+        for file_path, relative_path, term_counts, length in documents:
+            score = 0.0
+            for token, query_weight in query_weights.items():
+                frequency = term_counts.get(token)
+                if frequency:
+                    score += (
+                        query_weight
+                        * idf[token]
+                        * frequency
+                        * (k1 + 1)
+                        / (frequency + k1 * (1 - b + b * length / average_length))
+                    )
+            if file_path.name.lower() in target_names:
+                score += 5.0
+            elif file_path.stem.lower() in target_stems:
+                score += 2.5
+            if score > 0:
+                ranked_files.append((relative_path, round(score, 4)))
+
+        ranked_files.sort(key=lambda item: (-item[1], item[0]))
+        return ranked_files
+
+    def _read_ranking_signals(self, file_path: Path) -> List[str]:
+        """Tokenize identifiers from the head of a file as cheap content signals"""
+        if self.pre_filter_content_bytes <= 0:
+            return []
+        try:
+            with open(file_path, "rb") as f:
+                head = f.read(self.pre_filter_content_bytes)
+        except OSError:
+            return []
+        identifiers = re.findall(
+            r"[A-Za-z_][A-Za-z0-9_]{2,}", head.decode("utf-8", errors="ignore")
+        )
+        # Distinct identifiers only, so long files do not dominate on repetition
+        return self._tokenize_for_ranking(" ".join(dict.fromkeys(identifiers)))
+
+    async def _llm_rerank_files(
+        self, repo_path: Path, candidates: List[tuple]
+    ) -> List[str]:
+        """Let the LLM re-rank lexical candidates; empty list keeps the lexical order"""
+        candidate_lines = "\n".join(
+            f"- {path} (lexical score {score})" for path, score in candidates
+        )
+        rerank_prompt = f"""
+        You are a code analysis expert. The following candidate files from a code repository were pre-selected for implementing the target project structure.
+
+        Target Project Structure:
+        {self.target_structure}
+
+        Candidate Files:
+        {candidate_lines}
+
+        Re-rank the candidates by how helpful they are for implementing the target project and drop irrelevant ones.
+
+        Please return the filtering results in JSON format, ordered from most to least relevant:
+        {{
+            "relevant_files": [
+                {{
+                    "file_path": "candidate file path exactly as listed",
+                    "relevance_reason": "why this file is relevant",
+                    "confidence": 0.0-1.0
+                }}
+            ]
+        }}
+
+        Only return files with confidence > {self.min_confidence_score}.
+        """
+
+        try:
+            self._record_llm_call(repo_path.name, "pre_filter")
+            llm_response = await self._call_llm(rerank_prompt, max_tokens=2000)
+            match = re.search(r"\{.*\}", llm_response, re.DOTALL)
+            if not match:
+                return []
+
+            candidate_paths = {path for path, _ in candidates}
+            reranked_files = []
+            for file_info in json.loads(match.group(0)).get("relevant_files", []):
+                file_path = str(file_info.get("file_path", "")).replace("\\", "/")
+                if (
+                    file_path in candidate_paths
+                    and file_path not in reranked_files
+                    and file_info.get("confidence", 0.0) > self.min_confidence_score
+                ):
+                    reranked_files.append(file_path)
+            return reranked_files
+
+        except Exception as e:
+            self.logger.warning(f"LLM re-ranking failed, keeping lexical order: {e}")
+            return []
+
+    async def _llm_pre_filter_files(self, repo_path: Path, file_tree: str) -> List[str]:
         """Use LLM to pre-filter relevant files based on target structure"""
         filter_prompt = f"""
         You are a code analysis expert. Please analyze the following code repository file tree based on the target project structure and filter out files that may be relevant to the target project.
@@ -652,6 +1418,7 @@ class CodeIndexer:
 
         try:
             self.logger.info("Starting LLM pre-filtering of files...")
+            self._record_llm_call(repo_path.name, "pre_filter")
             llm_response = await self._call_llm(
                 filter_prompt,
                 system_prompt="You are a professional code analysis and project architecture expert, skilled at identifying code file functionality and relevance.",
@@ -693,38 +1460,59 @@ class CodeIndexer:
             self.logger.info("Will fallback to analyzing all files")
             return []
 
+    @staticmethod
+    def _normalize_selected_path(path: str) -> str:
+        """Normalize a selected or relative path for set lookups"""
+        path = path.strip().replace("\\", "/")
+        while path.startswith("./"):
+            path = path[2:]
+        return path.strip("/")
+
     def filter_files_by_paths(
         self, all_files: List[Path], selected_paths: List[str], repo_path: Path
     ) -> List[Path]:
-        """Filter file list based on LLM-selected paths"""
+        """Filter file list based on selected file or directory paths"""
         if not selected_paths:
             return all_files
 
-        filtered_files = []
-
-        for file_path in all_files:
-            # Get path relative to repository root
-            relative_path = str(file_path.relative_to(repo_path))
+        relative_paths = [
+            self._normalize_selected_path(str(file_path.relative_to(repo_path)))
+            for file_path in all_files
+        ]
+        known_paths = set(relative_paths)
+        for relative_path in relative_paths:
+            parts = relative_path.split("/")
+            known_paths.update(
+                "/".join(parts[:depth]) for depth in range(1, len(parts))
+            )
 
-            # Check if it's in the selected list
-            for selected_path in selected_paths:
-                # Normalize path comparison
-                if (
-                    relative_path == selected_path
-                    or relative_path.replace("\\", "/")
-                    == selected_path.replace("\\", "/")
-                    or selected_path in relative_path
-                    or relative_path in selected_path
-                ):
-                    filtered_files.append(file_path)
+        # Resolve each selection to a known file or directory, dropping leading
+        # components such as the repository name when needed
+        selected = set()
+        for selected_path in selected_paths:
+            parts = self._normalize_selected_path(selected_path).split("/")
+            for start in range(len(parts)):
+                candidate = "/".join(parts[start:])
+                if candidate in known_paths:
+                    selected.add(candidate)
                     break
 
+        filtered_files = []
+        for file_path, relative_path in zip(all_files, relative_paths):
+            parts = relative_path.split("/")
+            # A file matches itself or any selected ancestor directory
+            if any(
+                "/".join(parts[:depth]) in selected
+                for depth in range(1, len(parts) + 1)
+            ):
+                filtered_files.append(file_path)
+
         return filtered_files
 
     def _get_cache_key(self, file_path: Path) -> str:
         """Generate cache key for file content"""
         try:
-            stats = file_path.stat()
+            stats = self._stat_file(file_path)
             return f"{file_path}:{stats.st_mtime}:{stats.st_size}"
         except (OSError, PermissionError):
             return str(file_path)
@@ -735,23 +1523,146 @@ class CodeIndexer:
             return
 
         if len(self.content_cache) > self.max_cache_size:
-            # Remove oldest entries (simple FIFO strategy)
+            # Remove least recently used entries (hits are moved to the end)
             excess_count = len(self.content_cache) - self.max_cache_size + 10
-            keys_to_remove = list(self.content_cache.keys())[:excess_count]
-
-            for key in keys_to_remove:
-                del self.content_cache[key]
+            for _ in range(min(excess_count, len(self.content_cache))):
+                self.content_cache.popitem(last=False)
 
             if self.verbose_output:
                 self.logger.info(
                     f"Cache cleaned: removed {excess_count} entries, {len(self.content_cache)} entries remaining"
                 )
 
+    def _get_analysis_cache(self) -> AnalysisCache:
+        """Lazily open the persistent analysis cache if it is enabled"""
+        if not self.enable_persistent_cache:
+            return None
+
+        if self.analysis_cache is None:
+            cache_path = Path(
+                self.persistent_cache_path
+                or self.output_dir / ".analysis_cache.sqlite3"
+            )
+            try:
+                self.analysis_cache = AnalysisCache(
+                    cache_path,
+                    max_entries=self.persistent_cache_max_entries,
+                    max_size_mb=self.persistent_cache_max_size_mb,
+                    logger=self.logger,
+                )
+                if self.verbose_output:
+                    self.logger.info(f"Using persistent analysis cache: {cache_path}")
+            except Exception as e:
+                self.logger.warning(
+                    f"Persistent analysis cache unavailable, continuing without it: {e}"
+                )
+                self.enable_persistent_cache = False
+                return None
+
+        return self.analysis_cache
+
+    def close_analysis_cache(self):
+        """Close the persistent analysis cache connection"""
+        if self.analysis_cache is not None:
+            self.analysis_cache.close()
+            self.analysis_cache = None
+
+    def _get_cache_model_id(self) -> str:
+        """Identify the model whose responses are being cached"""
+        if self.mock_llm_responses:
+            return "mock"
+
+        client_type = self.llm_client_type
+        if client_type is None:
+            # Mirror the provider selection order of _initialize_llm_client
+            anthropic_key = self.api_config.get("anthropic", {}).get("api_key", "")
+            client_type = (
+                "anthropic" if anthropic_key and anthropic_key.strip() else "openai"
+            )
+
+        return f"{client_type}:{self.default_models.get(client_type, 'unknown')}"
+
+    def _get_static_analysis_settings(self) -> str:
+        """Static analysis settings that change what the LLM is shown"""
+        if not self.enable_static_analysis:
+            return "static:off"
+        return f"static:on:{self.skeleton_min_chars}"
+
+    def _summary_cache_key(self, content_hash: str) -> str:
+        """Persistent cache key of a file summary"""
+        return AnalysisCache.make_key(
+            "summary",
+            content_hash,
+            self._get_cache_model_id(),
+            self.max_content_length,
+            self._get_static_analysis_settings(),
+        )
+
+    def _relationships_cache_key(self, content_hash: str) -> str:
+        """Persistent cache key of a file's relationships to the target structure"""
+        return AnalysisCache.make_key(
+            "relationships",
+            content_hash,
+            self._get_cache_model_id(),
+            self.max_content_length,
+            self._get_static_analysis_settings(),
+            self.target_structure,
+            json.dumps(self.relationship_types, sort_keys=True),
+            self.min_confidence_score,
+        )
+
+    def _record_llm_call(self, file_path: str, kind: str):
+        """Count an LLM round trip against the repository the file belongs to"""
+        repo_name = Path(file_path).parts[0] if Path(file_path).parts else ""
+        repo_calls = self.llm_call_stats.setdefault(repo_name, {})
+        repo_calls[kind] = repo_calls.get(kind, 0) + 1
+
+    def _get_repo_llm_call_stats(
+        self, repo_name: str, files_analyzed: int
+    ) -> Dict[str, Any]:
+        """Return LLM call counts collected for a repository"""
+        repo_calls = dict(self.llm_call_stats.get(repo_name, {}))
+        total_calls = sum(
+            count
+            for kind, count in repo_calls.items()
+            if not kind.endswith(("_fallbacks", "_files"))
+        )
+        return {
+            "analysis_mode": self.analysis_mode,
+            **repo_calls,
+            "total": total_calls,
+            "per_analyzed_file": round(total_calls / files_analyzed, 3)
+            if files_analyzed
+            else 0,
+        }
+
+    def _record_cache_event(self, file_path: str, event: str):
+        """Count a cache event against the repository the file belongs to"""
+        repo_name = Path(file_path).parts[0] if Path(file_path).parts else ""
+        repo_stats = self.cache_stats.setdefault(
+            repo_name,
+            {"memory_hits": 0, "persistent_hits": 0, "misses": 0},
+        )
+        repo_stats[event] = repo_stats.get(event, 0) + 1
+
+    def _get_repo_cache_stats(self, repo_name: str) -> Dict[str, int]:
+        """Return cache statistics collected for a repository"""
+        repo_stats = self.cache_stats.get(
+            repo_name, {"memory_hits": 0, "persistent_hits": 0, "misses": 0}
+        )
+        total_hits = repo_stats["memory_hits"] + repo_stats["persistent_hits"]
+        lookups = total_hits + repo_stats["misses"]
+        return {
+            **repo_stats,
+            "hits": total_hits,
+            "hit_rate": round(total_hits / lookups, 3) if lookups else 0,
+        }
+
     async def analyze_file_content(self, file_path: Path) -> FileSummary:
         """Analyze a single file and create summary with caching support"""
         try:
             # Check file size before reading
-            file_size = file_path.stat().st_size
+            file_size = self._stat_file(file_path).st_size
             if file_size > self.max_file_size:
                 self.logger.warning(
                     f"Skipping file {file_path} - size {file_size} bytes exceeds limit {self.max_file_size}"
@@ -765,38 +1676,80 @@ class CodeIndexer:
                     summary=f"File skipped - size {file_size} bytes exceeds {self.max_file_size} byte limit",
                     lines_of_code=0,
                     last_modified=datetime.fromtimestamp(
-                        file_path.stat().st_mtime
+                        self._stat_file(file_path).st_mtime
                     ).isoformat(),
                 )
 
+            relative_path = str(file_path.relative_to(self.code_base_path))
+
             # Check cache if enabled
             cache_key = None
             if self.enable_content_caching:
+                if self.content_cache is None:
+                    self.content_cache = OrderedDict()
                 cache_key = self._get_cache_key(file_path)
                 if cache_key in self.content_cache:
                     if self.verbose_output:
                         self.logger.info(f"Using cached analysis for {file_path.name}")
+                    self.content_cache.move_to_end(cache_key)
+                    self._record_cache_event(relative_path, "memory_hits")
                     return self.content_cache[cache_key]
 
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
+            with open(file_path, "rb") as f:
+                raw_content = f.read()
+            content = raw_content.decode("utf-8", errors="ignore")
+            content_hash = hashlib.sha256(raw_content).hexdigest()
+            self.content_hashes[relative_path] = content_hash
 
             # Get file stats
-            stats = file_path.stat()
+            stats = self._stat_file(file_path)
             lines_of_code = len([line for line in content.split("\n") if line.strip()])
 
-            # Truncate content based on config
-            content_for_analysis = content[: self.max_content_length]
-            content_suffix = "..." if len(content) > self.max_content_length else ""
+            # Deterministic symbols, imports and prompt skeleton
+            static_analysis = self._static_pre_analysis(relative_path, content)
+            if static_analysis and static_analysis["trivial"]:
+                self._record_llm_call(relative_path, "static_files")
+                return self._build_file_summary(
+                    relative_path,
+                    static_analysis["trivial"],
+                    lines_of_code,
+                    stats.st_mtime,
+                )
+
+            # Check persistent content-addressed cache
+            analysis_cache = self._get_analysis_cache()
+            persistent_key = None
+            if analysis_cache is not None:
+                persistent_key = self._summary_cache_key(content_hash)
+                cached_analysis = analysis_cache.get(persistent_key)
+                if cached_analysis is not None:
+                    self._record_cache_event(relative_path, "persistent_hits")
+                    file_summary = self._build_file_summary(
+                        relative_path,
+                        self._apply_static_analysis(cached_analysis, static_analysis),
+                        lines_of_code,
+                        stats.st_mtime,
+                    )
+                    if self.enable_content_caching and cache_key:
+                        self.content_cache[cache_key] = file_summary
+                        self._manage_cache_size()
+                    return file_summary
+
+            self._record_cache_event(relative_path, "misses")
+
+            # Send a signature skeleton for long files, truncated content otherwise
+            content_label, content_for_analysis = self._content_for_prompt(
+                content, static_analysis
+            )
 
             # Create analysis prompt
             analysis_prompt = f"""
             Analyze this code file and provide a structured summary:
 
             File: {file_path.name}
-            Content:
+            {content_label}:
             ```
-            {content_for_analysis}{content_suffix}
+            {content_for_analysis}
             ```
 
             Please provide analysis in this JSON format:
@@ -812,12 +1765,17 @@ class CodeIndexer:
             """
 
             # Get LLM analysis with configured parameters
+            self._record_llm_call(relative_path, "analysis")
             llm_response = await self._call_llm(analysis_prompt, max_tokens=1000)
 
             try:
                 # Try to parse JSON response
                 match = re.search(r"\{.*\}", llm_response, re.DOTALL)
                 analysis_data = json.loads(match.group(0))
+
+                # Only successfully parsed analyses are worth persisting
+                if persistent_key is not None:
+                    analysis_cache.put(persistent_key, "summary", analysis_data)
             except json.JSONDecodeError:
                 # Fallback to basic analysis if JSON parsing fails
                 analysis_data = {
@@ -828,15 +1786,11 @@ class CodeIndexer:
                     "summary": "File analysis failed - JSON parsing error",
                 }
 
-            file_summary = FileSummary(
-                file_path=str(file_path.relative_to(self.code_base_path)),
-                file_type=analysis_data.get("file_type", "unknown"),
-                main_functions=analysis_data.get("main_functions", []),
-                key_concepts=analysis_data.get("key_concepts", []),
-                dependencies=analysis_data.get("dependencies", []),
-                summary=analysis_data.get("summary", "No summary available"),
-                lines_of_code=lines_of_code,
-                last_modified=datetime.fromtimestamp(stats.st_mtime).isoformat(),
+            file_summary = self._build_file_summary(
+                relative_path,
+                self._apply_static_analysis(analysis_data, static_analysis),
+                lines_of_code,
+                stats.st_mtime,
             )
 
             # Cache the result if caching is enabled
@@ -859,33 +1813,370 @@ class CodeIndexer:
                 last_modified="",
             )
 
-    async def find_relationships(
-        self, file_summary: FileSummary
-    ) -> List[FileRelationship]:
-        """Find relationships between a repo file and target structure"""
+    def _static_pre_analysis(self, relative_path: str, content: str) -> Dict[str, Any]:
+        """
+        Extract symbols, imports and a compact skeleton without an LLM call
 
-        # Build relationship type description from config
-        relationship_type_desc = []
-        for rel_type, weight in self.relationship_types.items():
-            relationship_type_desc.append(f"- {rel_type} (priority: {weight})")
+        Returns a dict with "main_functions", "dependencies", "skeleton",
+        "exact" (True when produced by a real parser) and "trivial" (a complete
+        analysis for files that need no LLM call), or None when disabled or the
+        file type is unknown.
+        """
+        if not self.enable_static_analysis:
+            return None
 
-        relationship_prompt = f"""
-        Analyze the relationship between this existing code file and the target project structure.
+        path = Path(relative_path)
+        suffix = path.suffix.lower()
+        try:
+            if not content.strip():
+                return {
+                    "main_functions": [],
+                    "dependencies": [],
+                    "skeleton": "",
+                    "exact": True,
+                    "trivial": {
+                        "file_type": f"empty {suffix or 'text'} file",
+                        "main_functions": [],
+                        "key_concepts": [],
+                        "dependencies": [],
+                        "summary": "Empty file.",
+                    },
+                }
+            if suffix in STATIC_CONFIG_EXTENSIONS:
+                return self._static_analyze_config(suffix, content)
+            if suffix == ".py":
+                return self._static_analyze_python(path, content)
+            if suffix in STATIC_REGEX_PATTERNS:
+                return self._static_analyze_with_patterns(suffix, content)
+        except Exception as e:
+            self.logger.debug(f"Static analysis failed for {relative_path}: {e}")
+        return None
 
-        Existing File Analysis:
-        - Path: {file_summary.file_path}
-        - Type: {file_summary.file_type}
-        - Functions: {', '.join(file_summary.main_functions)}
-        - Concepts: {', '.join(file_summary.key_concepts)}
-        - Summary: {file_summary.summary}
+    def _static_analyze_python(self, path: Path, content: str) -> Dict[str, Any]:
+        """Extract definitions, imports and signatures from Python source with ast"""
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            # Python 2 sources and templates still get regex-free LLM analysis
+            return None
+
+        lines = content.split("\n")
+        main_functions = []
+        dependencies = []
+        skeleton = []
+
+        def add_docstring(node: ast.AST, indent: str):
+            docstring = ast.get_docstring(node)
+            if docstring:
+                skeleton.append(f'{indent}"""{docstring.strip().splitlines()[0]}"""')
+
+        def add_definition(node: ast.AST, indent: str):
+            first_line = min(
+                [node.lineno] + [decorator.lineno for decorator in node.decorator_list]
+            )
+            body_line = node.body[0].lineno if node.body else node.lineno + 1
+            header = lines[first_line - 1 : max(body_line - 1, node.lineno)]
+            # One-line definitions such as "def f(): pass" keep their first line only
+            if body_line == node.lineno:
+                header = [lines[node.lineno - 1]]
+            skeleton.extend(line.rstrip() for line in header)
+            add_docstring(node, indent + "    ")
+            if isinstance(node, ast.ClassDef):
+                for child in node.body:
+                    if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        add_definition(child, indent + "    ")
+            else:
+                skeleton.append(f"{indent}    ...")
+
+        add_docstring(tree, "")
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                dependencies.extend(alias.name for alias in node.names)
+                skeleton.extend(lines[node.lineno - 1 : node.end_lineno])
+            elif isinstance(node, ast.ImportFrom):
+                dependencies.append("." * node.level + (node.module or ""))
+                skeleton.extend(lines[node.lineno - 1 : node.end_lineno])
+            elif isinstance(
+                node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+            ):
+                main_functions.append(node.name)
+                add_definition(node, "")
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = (
+                    node.targets if isinstance(node, ast.Assign) else [node.target]
+                )
+                if any(
+                    isinstance(target, ast.Name) and target.id.isupper()
+                    for target in targets
+                ):
+                    skeleton.append(lines[node.lineno - 1].rstrip())
+
+        # Imports nested in functions (optional dependencies) are dependencies too
+        for node in (
+            child
+            for top_level_node in tree.body
+            if not isinstance(top_level_node, (ast.Import, ast.ImportFrom))
+            for child in ast.walk(top_level_node)
+        ):
+            if isinstance(node, ast.Import):
+                dependencies.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                dependencies.append("." * node.level + (node.module or ""))
+
+        result = {
+            "main_functions": main_functions,
+            "dependencies": list(dict.fromkeys(dep for dep in dependencies if dep)),
+            "skeleton": "\n".join(skeleton),
+            "exact": True,
+            "trivial": None,
+        }
 
-        Target Project Structure:
-        {self.target_structure}
+        # Package markers and re-export modules carry no logic worth an LLM call
+        if path.name == "__init__.py" and not main_functions:
+            result["trivial"] = {
+                "file_type": "Python package initializer",
+                "main_functions": [],
+                "key_concepts": ["package initialization"],
+                "dependencies": result["dependencies"],
+                "summary": (
+                    f"Package initializer for '{path.parent.name}'"
+                    + (
+                        f" re-exporting from {', '.join(result['dependencies'][:5])}."
+                        if result["dependencies"]
+                        else "."
+                    )
+                ),
+            }
+        return result
+
+    def _static_analyze_with_patterns(
+        self, suffix: str, content: str
+    ) -> Dict[str, Any]:
+        """Extract symbols and imports with the lightweight regex extractors"""
+        symbol_patterns, import_patterns = STATIC_REGEX_PATTERNS[suffix]
+        main_functions = []
+        dependencies = []
+        skeleton_lines = set()
+
+        for patterns, collected in (
+            (symbol_patterns, main_functions),
+            (import_patterns, dependencies),
+        ):
+            for pattern in patterns:
+                for match in pattern.finditer(content):
+                    name = match.group(1).strip('"`')
+                    if name in ("if", "for", "while", "switch", "return", "catch"):
+                        continue
+                    collected.append(name)
+                    skeleton_lines.add(content.count("\n", 0, match.start()))
+
+        lines = content.split("\n")
+        skeleton = [lines[index].rstrip()[:200] for index in sorted(skeleton_lines)]
+        return {
+            "main_functions": list(dict.fromkeys(main_functions)),
+            "dependencies": list(dict.fromkeys(dependencies)),
+            "skeleton": "\n".join(skeleton),
+            "exact": False,
+            "trivial": None,
+        }
 
-        Available relationship types (with priority weights):
-        {chr(10).join(relationship_type_desc)}
+    def _static_analyze_config(self, suffix: str, content: str) -> Dict[str, Any]:
+        """Summarize configuration and data files from their top-level structure"""
+        format_name = {
+            ".json": "JSON",
+            ".yaml": "YAML",
+            ".yml": "YAML",
+            ".toml": "TOML",
+            ".xml": "XML",
+        }[suffix]
+        keys = []
+        description = None
+
+        if suffix == ".json":
+            try:
+                data = json.loads(content)
+                if isinstance(data, dict):
+                    keys = [str(key) for key in data.keys()]
+                elif isinstance(data, list):
+                    description = (
+                        f"{format_name} data file containing {len(data)} records"
+                    )
+            except json.JSONDecodeError:
+                pass
+        elif suffix in (".yaml", ".yml"):
+            keys = re.findall(r"^([A-Za-z_][\w.\-]*)\s*:", content, re.MULTILINE)
+        elif suffix == ".toml":
+            keys = re.findall(
+                r"^\s*\[+([^\]]+)\]+", content, re.MULTILINE
+            ) or re.findall(r"^([A-Za-z_][\w.\-]*)\s*=", content, re.MULTILINE)
+        else:
+            root = re.search(
+                r"<([A-Za-z_][\w:.\-]*)[\s>/]", re.sub(r"<[?!][^>]*>", "", content)
+            )
+            if root:
+                description = (
+                    f"{format_name} document with root element <{root.group(1)}>"
+                )
 
-        Identify potential relationships and provide analysis in this JSON format:
+        keys = list(dict.fromkeys(keys))[:20]
+        if description is None:
+            description = f"{format_name} configuration file" + (
+                f" with top-level keys: {', '.join(keys)}" if keys else ""
+            )
+
+        return {
+            "main_functions": keys,
+            "dependencies": [],
+            "skeleton": "",
+            "exact": True,
+            "trivial": {
+                "file_type": f"{format_name} configuration/data file",
+                "main_functions": keys,
+                "key_concepts": ["configuration"],
+                "dependencies": [],
+                "summary": description + ".",
+            },
+        }
+
+    def _apply_static_analysis(
+        self, analysis_data: Dict[str, Any], static_analysis: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prefer deterministic symbols and imports over LLM-reported ones"""
+        if not static_analysis:
+            return analysis_data
+        analysis_data = dict(analysis_data)
+        for key in ("main_functions", "dependencies"):
+            if static_analysis["exact"] or static_analysis[key]:
+                analysis_data[key] = static_analysis[key]
+        return analysis_data
+
+    def _content_for_prompt(
+        self, content: str, static_analysis: Dict[str, Any]
+    ) -> tuple:
+        """Return (label, text) to embed in an analysis prompt"""
+        skeleton = (static_analysis or {}).get("skeleton", "")
+        if skeleton and len(content) > self.skeleton_min_chars:
+            suffix = "..." if len(skeleton) > self.max_content_length else ""
+            return (
+                "Skeleton (imports, signatures and docstrings)",
+                skeleton[: self.max_content_length] + suffix,
+            )
+        suffix = "..." if len(content) > self.max_content_length else ""
+        return "Content", content[: self.max_content_length] + suffix
+
+    def _build_static_result(
+        self,
+        relative_path: str,
+        static_analysis: Dict[str, Any],
+        lines_of_code: int,
+        mtime: float,
+    ) -> tuple:
+        """Build (FileSummary, relationships) for a file that needs no LLM call"""
+        self._record_llm_call(relative_path, "static_files")
+        file_summary = self._build_file_summary(
+            relative_path, static_analysis["trivial"], lines_of_code, mtime
+        )
+
+        # Configuration files only relate to target files of the same name
+        relationships = []
+        file_name = Path(relative_path).name
+        if Path(relative_path).suffix.lower() in STATIC_CONFIG_EXTENSIONS:
+            confidence = self.relationship_types.get("reference", 0.6)
+            for target_file in sorted(self.extract_target_files()):
+                if (
+                    Path(target_file).name == file_name
+                    and confidence > self.min_confidence_score
+                ):
+                    relationships.append(
+                        FileRelationship(
+                            repo_file_path=relative_path,
+                            target_file_path=target_file,
+                            relationship_type="reference",
+                            confidence_score=confidence,
+                            helpful_aspects=file_summary.main_functions[:5],
+                            potential_contributions=[f"starting point for {file_name}"],
+                            usage_suggestions=f"Adapt {relative_path} as {target_file}",
+                        )
+                    )
+        return file_summary, relationships
+
+    def _analyze_trivial_file(self, file_path: Path) -> tuple:
+        """Return (FileSummary, relationships) for trivial files, or None"""
+        if not self.enable_static_analysis:
+            return None
+        try:
+            stats = self._stat_file(file_path)
+            if stats.st_size > self.max_file_size:
+                return None
+            # Only configs, package initializers and near-empty files can be trivial
+            if not (
+                file_path.suffix.lower() in STATIC_CONFIG_EXTENSIONS
+                or file_path.name == "__init__.py"
+                or stats.st_size < 64
+            ):
+                return None
+            relative_path = self._relative_file_path(file_path)
+            with open(file_path, "rb") as f:
+                raw_content = f.read()
+            content = raw_content.decode("utf-8", errors="ignore")
+            static_analysis = self._static_pre_analysis(relative_path, content)
+            if not static_analysis or not static_analysis["trivial"]:
+                return None
+            self.content_hashes[relative_path] = hashlib.sha256(raw_content).hexdigest()
+            lines_of_code = len([line for line in content.split("\n") if line.strip()])
+            return self._build_static_result(
+                relative_path, static_analysis, lines_of_code, stats.st_mtime
+            )
+        except Exception as e:
+            self.logger.debug(f"Trivial file check failed for {file_path}: {e}")
+            return None
+
+    def _build_file_summary(
+        self,
+        relative_path: str,
+        analysis_data: Dict[str, Any],
+        lines_of_code: int,
+        mtime: float,
+    ) -> FileSummary:
+        """Create a FileSummary from parsed (or cached) analysis data"""
+        return FileSummary(
+            file_path=relative_path,
+            file_type=analysis_data.get("file_type", "unknown"),
+            main_functions=analysis_data.get("main_functions", []),
+            key_concepts=analysis_data.get("key_concepts", []),
+            dependencies=analysis_data.get("dependencies", []),
+            summary=analysis_data.get("summary", "No summary available"),
+            lines_of_code=lines_of_code,
+            last_modified=datetime.fromtimestamp(mtime).isoformat(),
+        )
+
+    async def find_relationships(
+        self, file_summary: FileSummary
+    ) -> List[FileRelationship]:
+        """Find relationships between a repo file and target structure"""
+
+        # Build relationship type description from config
+        relationship_type_desc = []
+        for rel_type, weight in self.relationship_types.items():
+            relationship_type_desc.append(f"- {rel_type} (priority: {weight})")
+
+        relationship_prompt = f"""
+        Analyze the relationship between this existing code file and the target project structure.
+
+        Existing File Analysis:
+        - Path: {file_summary.file_path}
+        - Type: {file_summary.file_type}
+        - Functions: {', '.join(file_summary.main_functions)}
+        - Concepts: {', '.join(file_summary.key_concepts)}
+        - Summary: {file_summary.summary}
+
+        Target Project Structure:
+        {self.target_structure}
+
+        Available relationship types (with priority weights):
+        {chr(10).join(relationship_type_desc)}
+
+        Identify potential relationships and provide analysis in this JSON format:
         {{
             "relationships": [
                 {{
@@ -903,111 +2194,1054 @@ class CodeIndexer:
         Only include relationships with confidence > {self.min_confidence_score}. Focus on concrete, actionable connections.
         """
 
+        # Relationships depend on the file content and the target structure
+        analysis_cache = self._get_analysis_cache()
+        content_hash = self.content_hashes.get(file_summary.file_path)
+        persistent_key = None
+        if analysis_cache is not None and content_hash:
+            persistent_key = self._relationships_cache_key(content_hash)
+            cached_relationships = analysis_cache.get(persistent_key)
+            if cached_relationships is not None:
+                self._record_cache_event(file_summary.file_path, "persistent_hits")
+                self.relationship_failures.discard(file_summary.file_path)
+                return self._build_relationships(
+                    file_summary.file_path, cached_relationships
+                )
+            self._record_cache_event(file_summary.file_path, "misses")
+
         try:
+            self._record_llm_call(file_summary.file_path, "relationship")
             llm_response = await self._call_llm(relationship_prompt, max_tokens=1500)
 
             match = re.search(r"\{.*\}", llm_response, re.DOTALL)
             relationship_data = json.loads(match.group(0))
+            raw_relationships = relationship_data.get("relationships", [])
 
-            relationships = []
-            for rel_data in relationship_data.get("relationships", []):
-                confidence_score = float(rel_data.get("confidence_score", 0.0))
-                relationship_type = rel_data.get("relationship_type", "reference")
+            relationships = self._build_relationships(
+                file_summary.file_path, raw_relationships
+            )
 
-                # Validate relationship type is in config
-                if relationship_type not in self.relationship_types:
-                    if self.verbose_output:
-                        self.logger.warning(
-                            f"Unknown relationship type '{relationship_type}', using 'reference'"
-                        )
-                    relationship_type = "reference"
-
-                # Apply configured minimum confidence filter
-                if confidence_score > self.min_confidence_score:
-                    relationship = FileRelationship(
-                        repo_file_path=file_summary.file_path,
-                        target_file_path=rel_data.get("target_file_path", ""),
-                        relationship_type=relationship_type,
-                        confidence_score=confidence_score,
-                        helpful_aspects=rel_data.get("helpful_aspects", []),
-                        potential_contributions=rel_data.get(
-                            "potential_contributions", []
-                        ),
-                        usage_suggestions=rel_data.get("usage_suggestions", ""),
-                    )
-                    relationships.append(relationship)
+            if persistent_key is not None:
+                analysis_cache.put(persistent_key, "relationships", raw_relationships)
 
+            self.relationship_failures.discard(file_summary.file_path)
             return relationships
 
         except Exception as e:
             self.logger.error(
                 f"Error finding relationships for {file_summary.file_path}: {e}"
             )
+            # Recorded so manifests mark the empty result for a retry
+            self.relationship_failures.add(file_summary.file_path)
             return []
 
+    async def analyze_file_combined(self, file_path: Path) -> tuple:
+        """
+        Analyze a file and discover its relationships in a single LLM call
+
+        Returns (FileSummary, relationships), or None when the two-call path
+        should be used instead (oversized files, partially cached results or
+        malformed responses).
+        """
+        try:
+            stats = self._stat_file(file_path)
+            if stats.st_size > self.max_file_size:
+                return None
+
+            relative_path = self._relative_file_path(file_path)
+            with open(file_path, "rb") as f:
+                raw_content = f.read()
+            content = raw_content.decode("utf-8", errors="ignore")
+            content_hash = hashlib.sha256(raw_content).hexdigest()
+            self.content_hashes[relative_path] = content_hash
+            lines_of_code = len([line for line in content.split("\n") if line.strip()])
+
+            static_analysis = self._static_pre_analysis(relative_path, content)
+            if static_analysis and static_analysis["trivial"]:
+                return self._build_static_result(
+                    relative_path, static_analysis, lines_of_code, stats.st_mtime
+                )
+
+            analysis_cache = self._get_analysis_cache()
+            summary_key = relationships_key = None
+            if analysis_cache is not None:
+                summary_key = self._summary_cache_key(content_hash)
+                relationships_key = self._relationships_cache_key(content_hash)
+                cached_analysis = analysis_cache.get(summary_key)
+                if cached_analysis is not None:
+                    cached_relationships = analysis_cache.get(relationships_key)
+                    if cached_relationships is None:
+                        # Only the relationships are missing, one call suffices
+                        return None
+                    # Both the summary and the relationships were cached
+                    self._record_cache_event(relative_path, "persistent_hits")
+                    self._record_cache_event(relative_path, "persistent_hits")
+                    return (
+                        self._build_file_summary(
+                            relative_path,
+                            self._apply_static_analysis(
+                                cached_analysis, static_analysis
+                            ),
+                            lines_of_code,
+                            stats.st_mtime,
+                        ),
+                        self._build_relationships(relative_path, cached_relationships),
+                    )
+                self._record_cache_event(relative_path, "misses")
+
+            # Send a signature skeleton for long files, truncated content otherwise
+            content_label, content_for_analysis = self._content_for_prompt(
+                content, static_analysis
+            )
+
+            relationship_type_desc = []
+            for rel_type, weight in self.relationship_types.items():
+                relationship_type_desc.append(f"- {rel_type} (priority: {weight})")
+
+            combined_prompt = f"""
+            Analyze this code file, summarize it and identify how it relates to the target project structure.
+
+            File: {relative_path}
+            {content_label}:
+            ```
+            {content_for_analysis}
+            ```
+
+            Target Project Structure:
+            {self.target_structure}
+
+            Available relationship types (with priority weights):
+            {chr(10).join(relationship_type_desc)}
+
+            Please provide analysis in this JSON format:
+            {{
+                "file_type": "description of what type of file this is",
+                "main_functions": ["list", "of", "main", "functions", "or", "classes"],
+                "key_concepts": ["important", "concepts", "algorithms", "patterns"],
+                "dependencies": ["external", "libraries", "or", "imports"],
+                "summary": "2-3 sentence summary of what this file does",
+                "relationships": [
+                    {{
+                        "target_file_path": "path/in/target/structure",
+                        "relationship_type": "direct_match|partial_match|reference|utility",
+                        "confidence_score": 0.0-1.0,
+                        "helpful_aspects": ["specific", "aspects", "that", "could", "help"],
+                        "potential_contributions": ["how", "this", "could", "contribute"],
+                        "usage_suggestions": "detailed suggestion on how to use this file"
+                    }}
+                ]
+            }}
+
+            Focus on the core functionality and potential reusability.
+            Consider the priority weights when determining relationship types. Higher weight types should be preferred when multiple types apply.
+            Only include relationships with confidence > {self.min_confidence_score}. Use an empty list if there are none.
+            """
+
+            self._record_llm_call(relative_path, "combined")
+            llm_response = await self._call_llm(combined_prompt, max_tokens=2000)
+
+            match = re.search(r"\{.*\}", llm_response, re.DOTALL)
+            if not match:
+                return None
+            combined_data = json.loads(match.group(0))
+            raw_relationships = combined_data.get("relationships")
+            if "summary" not in combined_data or not isinstance(
+                raw_relationships, list
+            ):
+                return None
+
+            analysis_data = {
+                key: combined_data[key]
+                for key in (
+                    "file_type",
+                    "main_functions",
+                    "key_concepts",
+                    "dependencies",
+                    "summary",
+                )
+                if key in combined_data
+            }
+            file_summary = self._build_file_summary(
+                relative_path,
+                self._apply_static_analysis(analysis_data, static_analysis),
+                lines_of_code,
+                stats.st_mtime,
+            )
+            relationships = self._build_relationships(relative_path, raw_relationships)
+
+            if analysis_cache is not None:
+                analysis_cache.put(summary_key, "summary", analysis_data)
+                analysis_cache.put(
+                    relationships_key, "relationships", raw_relationships
+                )
+
+            return file_summary, relationships
+
+        except Exception as e:
+            self.logger.warning(
+                f"Combined analysis failed for {file_path}, falling back to separate calls: {e}"
+            )
+            return None
+
+    async def _analyze_small_files_in_batches(
+        self, files_to_analyze: List[Path]
+    ) -> Dict[str, tuple]:
+        """
+        Analyze small files by packing several of them into one LLM request
+
+        Returns a mapping from relative file path to (FileSummary, relationships).
+        Files that are not small, already covered by the manifest or cache, or
+        that could not be analyzed in a batch are left to the per-file path.
+        """
+        analysis_cache = self._get_analysis_cache()
+        candidates = []
+
+        for file_path in files_to_analyze:
+            try:
+                stats = self._stat_file(file_path)
+                if stats.st_size > self.batch_max_file_size:
+                    continue
+                if self._get_reusable_entry(file_path) is not None:
+                    continue
+
+                relative_path = self._relative_file_path(file_path)
+                with open(file_path, "rb") as f:
+                    raw_content = f.read()
+                content = raw_content.decode("utf-8", errors="ignore")
+                content_hash = hashlib.sha256(raw_content).hexdigest()
+                self.content_hashes[relative_path] = content_hash
+
+                # Trivial files are summarized statically on the per-file path
+                static_analysis = self._static_pre_analysis(relative_path, content)
+                if static_analysis and static_analysis["trivial"]:
+                    continue
+
+                # Fully cached files are cheaper on the per-file path
+                if (
+                    analysis_cache is not None
+                    and analysis_cache.get(self._summary_cache_key(content_hash))
+                    is not None
+                    and analysis_cache.get(self._relationships_cache_key(content_hash))
+                    is not None
+                ):
+                    continue
+
+                candidates.append(
+                    {
+                        "file_path": file_path,
+                        "relative_path": relative_path,
+                        "content": content,
+                        "content_hash": content_hash,
+                        "static_analysis": static_analysis,
+                        "mtime": stats.st_mtime,
+                    }
+                )
+            except OSError as e:
+                self.logger.warning(f"Skipping {file_path} for batch analysis: {e}")
+
+        if len(candidates) < 2:
+            return {}
+
+        # Pack candidates greedily up to the token budget (~4 characters per token)
+        batches = []
+        current_batch = []
+        current_tokens = 0
+        for candidate in candidates:
+            estimated_tokens = len(candidate["content"]) // 4 + 50
+            if current_batch and (
+                current_tokens + estimated_tokens > self.batch_token_budget
+                or len(current_batch) >= self.batch_max_files
+            ):
+                batches.append(current_batch)
+                current_batch = []
+                current_tokens = 0
+            current_batch.append(candidate)
+            current_tokens += estimated_tokens
+        if current_batch:
+            batches.append(current_batch)
+
+        self.logger.info(
+            f"Packing {len(candidates)} small files into {len(batches)} batched LLM requests"
+        )
+
+        semaphore = self.file_analysis_semaphore or asyncio.Semaphore(
+            self.max_concurrent_files if self.enable_concurrent_analysis else 1
+        )
+
+        async def _run_batch(batch: List[Dict[str, Any]]) -> Dict[str, tuple]:
+            async with semaphore:
+                return await self._analyze_file_batch(batch)
+
+        batched_results = {}
+        for batch_result in await asyncio.gather(
+            *[_run_batch(batch) for batch in batches]
+        ):
+            batched_results.update(batch_result)
+
+        return batched_results
+
+    async def _analyze_file_batch(
+        self, batch: List[Dict[str, Any]]
+    ) -> Dict[str, tuple]:
+        """Analyze one packed batch, splitting and retrying on malformed responses"""
+        if len(batch) < 2:
+            # Single files go through the regular per-file path
+            return {}
+
+        file_sections = []
+        for candidate in batch:
+            file_sections.append(
+                f"### File: {candidate['relative_path']}\n```\n{candidate['content']}\n```"
+            )
+
+        relationship_type_desc = []
+        for rel_type, weight in self.relationship_types.items():
+            relationship_type_desc.append(f"- {rel_type} (priority: {weight})")
+
+        batch_prompt = f"""
+        Analyze each of the following {len(batch)} small code files, summarize them and identify how they relate to the target project structure.
+
+        {chr(10).join(file_sections)}
+
+        Target Project Structure:
+        {self.target_structure}
+
+        Available relationship types (with priority weights):
+        {chr(10).join(relationship_type_desc)}
+
+        Please provide analysis for every file in this JSON format, using the exact file paths given above:
+        {{
+            "files": [
+                {{
+                    "file_path": "path exactly as given after 'File:'",
+                    "file_type": "description of what type of file this is",
+                    "main_functions": ["list", "of", "main", "functions", "or", "classes"],
+                    "key_concepts": ["important", "concepts", "algorithms", "patterns"],
+                    "dependencies": ["external", "libraries", "or", "imports"],
+                    "summary": "1-2 sentence summary of what this file does",
+                    "relationships": [
+                        {{
+                            "target_file_path": "path/in/target/structure",
+                            "relationship_type": "direct_match|partial_match|reference|utility",
+                            "confidence_score": 0.0-1.0,
+                            "helpful_aspects": ["specific", "aspects"],
+                            "potential_contributions": ["how", "this", "could", "contribute"],
+                            "usage_suggestions": "suggestion on how to use this file"
+                        }}
+                    ]
+                }}
+            ]
+        }}
+
+        Only include relationships with confidence > {self.min_confidence_score}. Use an empty list if there are none.
+        """
+
+        self._record_llm_call(batch[0]["relative_path"], "batch")
+        llm_response = await self._call_llm(
+            batch_prompt, max_tokens=min(8000, 500 * len(batch) + 500)
+        )
+
+        parsed_files = {}
+        try:
+            match = re.search(r"\{.*\}", llm_response, re.DOTALL)
+            batch_data = json.loads(match.group(0))
+            for file_data in batch_data.get("files", []):
+                if isinstance(file_data, dict) and "summary" in file_data:
+                    file_key = str(file_data.get("file_path", "")).replace("\\", "/")
+                    parsed_files[file_key.strip("/")] = file_data
+        except Exception as e:
+            self.logger.warning(f"Malformed batch response for {len(batch)} files: {e}")
+
+        results = {}
+        missing = []
+        analysis_cache = self._get_analysis_cache()
+        for candidate in batch:
+            file_data = parsed_files.get(candidate["relative_path"].replace("\\", "/"))
+            raw_relationships = (file_data or {}).get("relationships", [])
+            if file_data is None or not isinstance(raw_relationships, list):
+                missing.append(candidate)
+                continue
+
+            analysis_data = {
+                key: file_data[key]
+                for key in (
+                    "file_type",
+                    "main_functions",
+                    "key_concepts",
+                    "dependencies",
+                    "summary",
+                )
+                if key in file_data
+            }
+            lines_of_code = len(
+                [line for line in candidate["content"].split("\n") if line.strip()]
+            )
+            relative_path = candidate["relative_path"]
+            results[relative_path] = (
+                self._build_file_summary(
+                    relative_path,
+                    self._apply_static_analysis(
+                        analysis_data, candidate["static_analysis"]
+                    ),
+                    lines_of_code,
+                    candidate["mtime"],
+                ),
+                self._build_relationships(relative_path, raw_relationships),
+            )
+            self._record_llm_call(relative_path, "batched_files")
+            self.relationship_failures.discard(relative_path)
+            self._append_journal_entry(candidate["file_path"], *results[relative_path])
+            if analysis_cache is not None:
+                analysis_cache.put(
+                    self._summary_cache_key(candidate["content_hash"]),
+                    "summary",
+                    analysis_data,
+                )
+                analysis_cache.put(
+                    self._relationships_cache_key(candidate["content_hash"]),
+                    "relationships",
+                    raw_relationships,
+                )
+
+        if missing:
+            self._record_llm_call(batch[0]["relative_path"], "batch_fallbacks")
+            if len(missing) == len(batch):
+                # Nothing usable came back: split the batch and retry both halves
+                middle = len(batch) // 2
+                for half in (batch[:middle], batch[middle:]):
+                    results.update(await self._analyze_file_batch(half))
+            else:
+                # Retry only the files the response left out
+                results.update(await self._analyze_file_batch(missing))
+
+        return results
+
+    def _merge_batched_results(
+        self,
+        files_to_analyze: List[Path],
+        file_summaries: List[FileSummary],
+        all_relationships: List[FileRelationship],
+        batched_results: Dict[str, tuple],
+    ) -> tuple:
+        """Merge batched and per-file results back into the original file order"""
+        summaries_by_path = {
+            file_summary.file_path: file_summary for file_summary in file_summaries
+        }
+        relationships_by_path: Dict[str, List[FileRelationship]] = {}
+        for relationship in all_relationships:
+            relationships_by_path.setdefault(relationship.repo_file_path, []).append(
+                relationship
+            )
+        for relative_path, (file_summary, relationships) in batched_results.items():
+            summaries_by_path[relative_path] = file_summary
+            relationships_by_path[relative_path] = relationships
+
+        merged_summaries = []
+        merged_relationships = []
+        for file_path in files_to_analyze:
+            relative_path = self._relative_file_path(file_path)
+            if relative_path in summaries_by_path:
+                merged_summaries.append(summaries_by_path[relative_path])
+                merged_relationships.extend(
+                    relationships_by_path.get(relative_path, [])
+                )
+
+        return merged_summaries, merged_relationships
+
+    def _build_relationships(
+        self, repo_file_path: str, raw_relationships: List[Dict[str, Any]]
+    ) -> List[FileRelationship]:
+        """Validate raw relationship data and convert it to FileRelationship objects"""
+        relationships = []
+        for rel_data in raw_relationships:
+            confidence_score = float(rel_data.get("confidence_score", 0.0))
+            relationship_type = rel_data.get("relationship_type", "reference")
+
+            # Validate relationship type is in config
+            if relationship_type not in self.relationship_types:
+                if self.verbose_output:
+                    self.logger.warning(
+                        f"Unknown relationship type '{relationship_type}', using 'reference'"
+                    )
+                relationship_type = "reference"
+
+            # Apply configured minimum confidence filter
+            if confidence_score > self.min_confidence_score:
+                relationship = FileRelationship(
+                    repo_file_path=repo_file_path,
+                    target_file_path=rel_data.get("target_file_path", ""),
+                    relationship_type=relationship_type,
+                    confidence_score=confidence_score,
+                    helpful_aspects=rel_data.get("helpful_aspects", []),
+                    potential_contributions=rel_data.get("potential_contributions", []),
+                    usage_suggestions=rel_data.get("usage_suggestions", ""),
+                )
+                relationships.append(relationship)
+
+        return relationships
+
     async def _analyze_single_file_with_relationships(
         self, file_path: Path, index: int, total: int
     ) -> tuple:
         """Analyze a single file and its relationships (for concurrent processing)"""
         if self.verbose_output:
             self.logger.info(f"Analyzing file {index}/{total}: {file_path.name}")
+        self.relationship_failures.discard(self._relative_file_path(file_path))
+
+        # Reuse results recorded in the manifest for unchanged files
+        reused_result = await self._reuse_manifest_entry(file_path)
+        if reused_result is not None:
+            return reused_result
+
+        # Configs, package initializers and empty files need no LLM call
+        result = self._analyze_trivial_file(file_path)
+
+        # Ask for summary and relationships in a single round trip when enabled
+        if result is None and self.analysis_mode == "combined":
+            result = await self.analyze_file_combined(file_path)
+            if result is None:
+                self._record_llm_call(
+                    self._relative_file_path(file_path), "combined_fallbacks"
+                )
+
+        if result is None:
+            # Get file summary
+            file_summary = await self.analyze_file_content(file_path)
+
+            # Find relationships
+            relationships = await self.find_relationships(file_summary)
+            result = (file_summary, relationships)
+
+        # Journal the result right away so an interrupted run can resume
+        self._append_journal_entry(file_path, *result)
+        return result
+
+    def _relative_file_path(self, file_path: Path) -> str:
+        """Return a file path relative to the code base, as stored in indexes"""
+        return str(file_path.relative_to(self.code_base_path))
+
+    def _hash_file(self, file_path: Path) -> str:
+        """Compute the SHA-256 of a file's content"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _hash_text(self, text: str) -> str:
+        """Compute the SHA-256 of a text value"""
+        return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+    def extract_target_files(self, target_structure: str = None) -> set:
+        """Extract the file paths declared in a target structure tree"""
+        target_structure = (
+            self.target_structure if target_structure is None else target_structure
+        )
+        target_files = set()
+        directory_stack = []
+
+        for raw_line in (target_structure or "").splitlines():
+            line = raw_line.split("#", 1)[0].rstrip()
+            name_match = re.search(r"[A-Za-z0-9_.\-]", line)
+            if not name_match:
+                continue
+
+            indent = name_match.start()
+            name = line[indent:].split()[0].rstrip(":,")
+            while directory_stack and directory_stack[-1][0] >= indent:
+                directory_stack.pop()
+
+            if name.endswith("/"):
+                directory_stack.append((indent, name.strip("/")))
+            elif Path(name).suffix:
+                parts = [directory for _, directory in directory_stack] + [name]
+                target_files.add(re.sub(r"^(\./)+", "", "/".join(parts)))
 
-        # Get file summary
-        file_summary = await self.analyze_file_content(file_path)
+        return target_files
 
-        # Find relationships
-        relationships = await self.find_relationships(file_summary)
+    def _get_manifest_path(self, repo_name: str) -> Path:
+        """Return the manifest path stored next to a repository index"""
+        return self.output_dir / self.manifest_filename_pattern.format(
+            repo_name=repo_name
+        )
+
+    def _load_manifest(self, repo_name: str) -> Dict[str, Any]:
+        """Load a repository manifest if it is compatible with the current run"""
+        manifest_path = self._get_manifest_path(repo_name)
+        if not manifest_path.exists():
+            return {}
 
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable manifest {manifest_path}: {e}")
+            return {}
+
+        if (
+            manifest.get("prompt_version") != ANALYSIS_PROMPT_VERSION
+            or manifest.get("model") != self._get_cache_model_id()
+            or manifest.get("max_content_length") != self.max_content_length
+            or manifest.get("static_analysis") != self._get_static_analysis_settings()
+        ):
+            self.logger.info(
+                f"Manifest for {repo_name} was built with different analysis settings, rebuilding"
+            )
+            return {}
+
+        return manifest
+
+    def _save_manifest(self, repo_path: Path, repo_index: RepoIndex):
+        """Record per-file hashes, summaries and relationships next to the index"""
+        relationships_by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for relationship in repo_index.relationships:
+            relationships_by_file.setdefault(relationship.repo_file_path, []).append(
+                asdict(relationship)
+            )
+
+        files = {}
+        for file_summary in repo_index.file_summaries:
+            if not self._is_reusable_summary(file_summary):
+                continue
+
+            file_path = self.code_base_path / file_summary.file_path
+            try:
+                stats = self._stat_file(file_path)
+            except OSError:
+                continue
+
+            files[file_summary.file_path] = {
+                "content_hash": self.content_hashes.get(file_summary.file_path),
+                "size": stats.st_size,
+                "mtime_ns": stats.st_mtime_ns,
+                "summary": asdict(file_summary),
+                "relationships": relationships_by_file.get(file_summary.file_path, []),
+                "relationships_failed": file_summary.file_path
+                in self.relationship_failures,
+            }
+
+        repo_files = sorted(
+            self._relative_file_path(file_path)
+            for file_path in self.get_all_repo_files(repo_path)
+        )
+        manifest = {
+            "manifest_version": 1,
+            "repo_name": repo_index.repo_name,
+            "updated_at": datetime.now().isoformat(),
+            "prompt_version": ANALYSIS_PROMPT_VERSION,
+            "model": self._get_cache_model_id(),
+            "max_content_length": self.max_content_length,
+            "static_analysis": self._get_static_analysis_settings(),
+            "target_structure_hash": self._hash_text(self.target_structure),
+            "target_files": sorted(self.extract_target_files()),
+            "repo_files_hash": self._hash_text("\n".join(repo_files)),
+            "selected_files": sorted(
+                file_summary.file_path for file_summary in repo_index.file_summaries
+            ),
+            "files": files,
+        }
+
+        manifest_path = self._get_manifest_path(repo_index.repo_name)
+        temp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(temp_path, manifest_path)
+        except Exception as e:
+            self.logger.warning(f"Failed to save manifest {manifest_path}: {e}")
+
+    @staticmethod
+    def _is_reusable_summary(file_summary: FileSummary) -> bool:
+        """Only successful analyses are worth reusing in later runs"""
+        return file_summary.file_type != "error" and not (
+            file_summary.summary.startswith("File analysis failed")
+        )
+
+    def _prepare_incremental_state(
+        self, repo_name: str, all_files: List[Path]
+    ) -> Dict[str, Any]:
+        """Compare the previous manifest with the current repository state"""
+        self.incremental_states.pop(repo_name, None)
+        if not self.enable_incremental_indexing:
+            return {}
+
+        manifest = self._load_manifest(repo_name)
+        if not manifest:
+            return {}
+
+        current_files = sorted(
+            self._relative_file_path(file_path) for file_path in all_files
+        )
+        entries = manifest.get("files", {})
+        target_unchanged = manifest.get("target_structure_hash") == self._hash_text(
+            self.target_structure
+        )
+
+        # Relationship discovery is only re-run when target files were added;
+        # relationships to removed target files are simply dropped
+        previous_targets = set(manifest.get("target_files", []))
+        current_targets = self.extract_target_files()
+        added_targets = current_targets - previous_targets
+        removed_targets = previous_targets - current_targets
+
+        state = {
+            "entries": entries,
+            "selected_files": set(manifest.get("selected_files", entries)),
+            "selection_reusable": target_unchanged
+            and manifest.get("repo_files_hash")
+            == self._hash_text("\n".join(current_files)),
+            "rerun_relationships": not target_unchanged and bool(added_targets),
+            "removed_targets": removed_targets,
+            "checked": {},
+            "reused_files": set(),
+            "relationships_rerun": 0,
+            "deleted_files": len(set(entries) - set(current_files)),
+            "manifest_used": True,
+            "journaled_files": set(),
+        }
+        self.incremental_states[repo_name] = state
+
+        self.logger.info(
+            f"Loaded manifest for {repo_name}: {len(entries)} files recorded, "
+            f"{state['deleted_files']} deleted, target structure "
+            f"{'unchanged' if target_unchanged else 'changed'}"
+        )
+        return state
+
+    def _get_reusable_entry(self, file_path: Path) -> Dict[str, Any]:
+        """Return the manifest entry of a file if its content is unchanged"""
+        relative_path = self._relative_file_path(file_path)
+        state = self.incremental_states.get(Path(relative_path).parts[0])
+        if not state:
+            return None
+
+        if relative_path in state["checked"]:
+            return state["checked"][relative_path]
+
+        entry = state["entries"].get(relative_path)
+        reusable_entry = None
+        if entry:
+            try:
+                stats = self._stat_file(file_path)
+                if stats.st_size == entry.get("size"):
+                    if stats.st_mtime_ns == entry.get("mtime_ns"):
+                        reusable_entry = entry
+                    elif entry.get("content_hash") and entry[
+                        "content_hash"
+                    ] == self._hash_file(file_path):
+                        reusable_entry = entry
+            except OSError:
+                reusable_entry = None
+
+        state["checked"][relative_path] = reusable_entry
+        return reusable_entry
+
+    def _was_reused(self, file_path: Path) -> bool:
+        """Check whether a file's results were taken from the manifest"""
+        relative_path = self._relative_file_path(file_path)
+        state = self.incremental_states.get(Path(relative_path).parts[0])
+        return bool(state) and relative_path in state["reused_files"]
+
+    async def _reuse_manifest_entry(self, file_path: Path) -> tuple:
+        """Rebuild summary and relationships of an unchanged file from the manifest"""
+        entry = self._get_reusable_entry(file_path)
+        if entry is None:
+            return None
+
+        relative_path = self._relative_file_path(file_path)
+        state = self.incremental_states[Path(relative_path).parts[0]]
+
+        try:
+            file_summary = FileSummary(**entry["summary"])
+        except TypeError:
+            return None
+
+        if entry.get("content_hash"):
+            self.content_hashes[relative_path] = entry["content_hash"]
+
+        # Relationships are discovered again for new target files, and when the
+        # recorded discovery failed
+        if entry.get("relationships_failed") or (
+            state["rerun_relationships"]
+            and relative_path not in state["journaled_files"]
+        ):
+            relationships = await self.find_relationships(file_summary)
+            state["relationships_rerun"] += 1
+        else:
+            relationships = [
+                FileRelationship(**relationship)
+                for relationship in entry.get("relationships", [])
+                if not self._is_removed_target(
+                    relationship.get("target_file_path", ""), state["removed_targets"]
+                )
+            ]
+
+        state["reused_files"].add(relative_path)
         return file_summary, relationships
 
+    @staticmethod
+    def _is_removed_target(target_file_path: str, removed_targets: set) -> bool:
+        """Check whether a relationship points at a target file that was removed"""
+        target = target_file_path.replace("\\", "/").strip("/")
+        return any(
+            target == removed
+            or removed.endswith("/" + target)
+            or target.endswith("/" + removed)
+            for removed in removed_targets
+        )
+
+    def _get_incremental_statistics(
+        self, repo_name: str, files_analyzed: int
+    ) -> Dict[str, Any]:
+        """Summarize how much work the manifest saved for a repository"""
+        state = self.incremental_states.get(repo_name)
+        if not state:
+            return {
+                "enabled": self.enable_incremental_indexing,
+                "manifest_used": False,
+                "reused_files": 0,
+                "reanalyzed_files": files_analyzed,
+                "resumed_from_journal": 0,
+            }
+
+        return {
+            "enabled": self.enable_incremental_indexing,
+            "manifest_used": state["manifest_used"],
+            "resumed_from_journal": len(
+                state["reused_files"] & state["journaled_files"]
+            ),
+            "reused_files": len(state["reused_files"]),
+            "reanalyzed_files": files_analyzed - len(state["reused_files"]),
+            "deleted_files": state["deleted_files"],
+            "relationships_rerun": state["relationships_rerun"],
+            "file_selection_reused": state["selection_reusable"],
+        }
+
+    def _get_journal_path(self, repo_name: str) -> Path:
+        """Return the path of a repository's in-progress results journal"""
+        return self.output_dir / self.journal_filename_pattern.format(
+            repo_name=repo_name
+        )
+
+    def _get_journal_header(self, repo_name: str) -> Dict[str, Any]:
+        """Analysis settings a journal must match to be resumed"""
+        return {
+            "journal_version": 1,
+            "repo_name": repo_name,
+            "prompt_version": ANALYSIS_PROMPT_VERSION,
+            "model": self._get_cache_model_id(),
+            "max_content_length": self.max_content_length,
+            "static_analysis": self._get_static_analysis_settings(),
+            "target_structure_hash": self._hash_text(self.target_structure),
+        }
+
+    def _open_journal(self, repo_name: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Open a repository journal for appending and return its resumable entries
+
+        Entries left by an interrupted run are only returned when they were
+        produced with the current analysis settings and target structure;
+        otherwise the journal is started afresh.
+        """
+        self._close_journal(repo_name)
+        if not self.enable_index_journal:
+            return {}
+
+        journal_path = self._get_journal_path(repo_name)
+        header = self._get_journal_header(repo_name)
+        entries: Dict[str, Dict[str, Any]] = {}
+
+        if journal_path.exists():
+            try:
+                with open(journal_path, "r", encoding="utf-8") as f:
+                    previous_header = json.loads(f.readline() or "{}")
+                    if previous_header == header:
+                        for line in f:
+                            try:
+                                record = json.loads(line)
+                            except json.JSONDecodeError:
+                                # A crash can leave a truncated last line
+                                continue
+                            entries[record.pop("file_path")] = record
+            except Exception as e:
+                self.logger.warning(f"Ignoring unreadable journal {journal_path}: {e}")
+                entries = {}
+
+        if entries:
+            self.logger.info(
+                f"Resuming {repo_name} from journal with {len(entries)} analyzed files"
+            )
+            handle = open(journal_path, "a", encoding="utf-8")
+        else:
+            handle = open(journal_path, "w", encoding="utf-8")
+            handle.write(json.dumps(header) + "\n")
+            handle.flush()
+
+        self.journal_handles[repo_name] = handle
+        return entries
+
+    def _append_journal_entry(
+        self,
+        file_path: Path,
+        file_summary: FileSummary,
+        relationships: List[FileRelationship],
+    ):
+        """Append a freshly analyzed file to its repository journal"""
+        relative_path = self._relative_file_path(file_path)
+        handle = self.journal_handles.get(Path(relative_path).parts[0])
+        if handle is None or not self._is_reusable_summary(file_summary):
+            return
+
+        try:
+            stats = self._stat_file(file_path)
+            record = {
+                "file_path": relative_path,
+                "content_hash": self.content_hashes.get(relative_path),
+                "size": stats.st_size,
+                "mtime_ns": stats.st_mtime_ns,
+                "summary": asdict(file_summary),
+                "relationships": [
+                    asdict(relationship) for relationship in relationships
+                ],
+                "relationships_failed": relative_path in self.relationship_failures,
+            }
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+            handle.flush()
+        except Exception as e:
+            self.logger.warning(f"Failed to journal {relative_path}: {e}")
+
+    def _close_journal(self, repo_name: str, remove: bool = False):
+        """Close a repository journal, removing it once the index is compacted"""
+        handle = self.journal_handles.pop(repo_name, None)
+        if handle is not None:
+            handle.close()
+        if remove:
+            self._get_journal_path(repo_name).unlink(missing_ok=True)
+
+    def _merge_journal_entries(
+        self, repo_name: str, journal_entries: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Make journaled results reusable through the incremental state"""
+        state = self.incremental_states.get(repo_name)
+        if not journal_entries:
+            return state or {}
+
+        if not state:
+            state = {
+                "entries": {},
+                "selected_files": set(),
+                "selection_reusable": False,
+                "rerun_relationships": False,
+                "removed_targets": set(),
+                "checked": {},
+                "reused_files": set(),
+                "relationships_rerun": 0,
+                "deleted_files": 0,
+                "manifest_used": False,
+                "journaled_files": set(),
+            }
+            self.incremental_states[repo_name] = state
+
+        # Journaled results are newer than the manifest and already match the
+        # current target structure
+        state["entries"] = {**state["entries"], **journal_entries}
+        state["journaled_files"] = set(journal_entries)
+        state["checked"] = {}
+        return state
+
     async def process_repository(self, repo_path: Path) -> RepoIndex:
         """Process a single repository and create complete index with optional concurrent processing"""
         repo_name = repo_path.name
         self.logger.info(f"Processing repository: {repo_name}")
 
-        # Step 1: Generate file tree
+        # Step 1: Scan the repository once and generate file tree
         self.logger.info("Generating file tree structure...")
+        snapshot = self.scan_repository(repo_path)
+        self.logger.info(
+            f"Scanned {len(snapshot.stats)} files in {snapshot.scan_seconds:.3f}s"
+        )
         file_tree = self.generate_file_tree(repo_path)
 
         # Step 2: Get all files
         all_files = self.get_all_repo_files(repo_path)
         self.logger.info(f"Found {len(all_files)} files in {repo_name}")
 
+        # Load the manifest of the previous run for incremental re-indexing,
+        # plus any results journaled by an interrupted run
+        incremental_state = self._prepare_incremental_state(repo_name, all_files)
+        incremental_state = self._merge_journal_entries(
+            repo_name, self._open_journal(repo_name)
+        )
+
         # Step 3: LLM pre-filtering of relevant files
-        if self.enable_pre_filtering:
-            self.logger.info("Using LLM for file pre-filtering...")
-            selected_file_paths = await self.pre_filter_files(repo_path, file_tree)
+        if incremental_state and incremental_state["selection_reusable"]:
+            self.logger.info(
+                "Repository file set and target structure unchanged, reusing previous file selection"
+            )
+            selected_file_paths = []
+        elif self.enable_pre_filtering:
+            self.logger.info(f"Pre-filtering files ({self.pre_filter_mode} mode)...")
+            selected_file_paths = await self.pre_filter_files(
+                repo_path, file_tree, all_files
+            )
         else:
             self.logger.info("Pre-filtering is disabled, will analyze all files")
             selected_file_paths = []
 
         # Step 4: Filter file list based on filtering results
-        if selected_file_paths:
+        if incremental_state and incremental_state["selection_reusable"]:
+            files_to_analyze = [
+                file_path
+                for file_path in all_files
+                if self._relative_file_path(file_path)
+                in incremental_state["selected_files"]
+            ]
+        elif selected_file_paths:
             files_to_analyze = self.filter_files_by_paths(
                 all_files, selected_file_paths, repo_path
             )
             self.logger.info(
-                f"After LLM filtering, will analyze {len(files_to_analyze)} relevant files (from {len(all_files)} total)"
+                f"After pre-filtering, will analyze {len(files_to_analyze)} relevant files (from {len(all_files)} total)"
             )
         else:
             files_to_analyze = all_files
-            self.logger.info("LLM filtering failed, will analyze all files")
+            self.logger.info(
+                "No files selected by pre-filtering, will analyze all files"
+            )
+
+        # Step 5a: Pack small files into shared LLM requests
+        batched_results = {}
+        if self.enable_batch_analysis:
+            batched_results = await self._analyze_small_files_in_batches(
+                files_to_analyze
+            )
+        remaining_files = [
+            file_path
+            for file_path in files_to_analyze
+            if self._relative_file_path(file_path) not in batched_results
+        ]
 
-        # Step 5: Analyze filtered files (concurrent or sequential)
-        if self.enable_concurrent_analysis and len(files_to_analyze) > 1:
+        # Step 5b: Analyze remaining files (concurrent or sequential)
+        if self.enable_concurrent_analysis and len(remaining_files) > 1:
             self.logger.info(
                 f"Using concurrent analysis with max {self.max_concurrent_files} parallel files"
             )
             file_summaries, all_relationships = await self._process_files_concurrently(
-                files_to_analyze
+                remaining_files
             )
         else:
             self.logger.info("Using sequential file analysis")
             file_summaries, all_relationships = await self._process_files_sequentially(
-                files_to_analyze
+                remaining_files
+            )
+
+        if batched_results:
+            file_summaries, all_relationships = self._merge_batched_results(
+                files_to_analyze, file_summaries, all_relationships, batched_results
             )
 
         # Step 6: Create repository index
+        cache_stats = self._get_repo_cache_stats(repo_name)
         repo_index = RepoIndex(
             repo_name=repo_name,
             total_files=len(all_files),  # Record original file count
@@ -1026,6 +3260,8 @@ class CodeIndexer:
                 ),
                 "analyzer_version": "1.4.0",  # Updated version to reflect augmented LLM support
                 "pre_filtering_enabled": self.enable_pre_filtering,
+                "pre_filter_mode": self.pre_filter_mode,
+                "repository_scan_seconds": snapshot.scan_seconds,
                 "files_before_filtering": len(all_files),
                 "files_after_filtering": len(files_to_analyze),
                 "filtering_efficiency": round(
@@ -1038,7 +3274,16 @@ class CodeIndexer:
                 "high_confidence_threshold": self.high_confidence_threshold,
                 "concurrent_analysis_used": self.enable_concurrent_analysis,
                 "content_caching_enabled": self.enable_content_caching,
-                "cache_hits": len(self.content_cache) if self.content_cache else 0,
+                "persistent_cache_enabled": self.enable_persistent_cache,
+                "cache_hits": cache_stats["hits"],
+                "cache_misses": cache_stats["misses"],
+                "cache_statistics": cache_stats,
+                "incremental_indexing": self._get_incremental_statistics(
+                    repo_name, len(files_to_analyze)
+                ),
+                "llm_calls": self._get_repo_llm_call_stats(
+                    repo_name, len(files_to_analyze)
+                ),
             },
         )
 
@@ -1060,7 +3305,8 @@ class CodeIndexer:
             all_relationships.extend(relationships)
 
             # Add configured delay to avoid overwhelming the LLM API
-            await asyncio.sleep(self.request_delay)
+            if not self._was_reused(file_path):
+                await asyncio.sleep(self.request_delay)
 
         return file_summaries, all_relationships
 
@@ -1069,14 +3315,16 @@ class CodeIndexer:
         file_summaries = []
         all_relationships = []
 
-        # Create semaphore to limit concurrent tasks
-        semaphore = asyncio.Semaphore(self.max_concurrent_files)
+        # Use the global file budget shared across repositories when available
+        semaphore = self.file_analysis_semaphore or asyncio.Semaphore(
+            self.max_concurrent_files
+        )
         tasks = []
 
         async def _process_with_semaphore(file_path: Path, index: int, total: int):
             async with semaphore:
                 # Add a small delay to space out concurrent requests
-                if index > 1:
+                if index > 1 and self._get_reusable_entry(file_path) is None:
                     await asyncio.sleep(
                         self.request_delay * 0.5
                     )  # Reduced delay for concurrent processing
@@ -1087,7 +3335,9 @@ class CodeIndexer:
         try:
             # Create tasks for all files
             tasks = [
-                _process_with_semaphore(file_path, i, len(files_to_analyze))
+                asyncio.ensure_future(
+                    _process_with_semaphore(file_path, i, len(files_to_analyze))
+                )
                 for i, file_path in enumerate(files_to_analyze, 1)
             ]
 
@@ -1183,6 +3433,65 @@ class CodeIndexer:
 
             gc.collect()
 
+    async def _index_repository(self, repo_dir: Path) -> tuple:
+        """Process a repository and write its index as soon as it is finished"""
+        try:
+            # Process repository
+            repo_index = await self.process_repository(repo_dir)
+
+            # Generate output filename using configured pattern
+            output_filename = self.index_filename_pattern.format(
+                repo_name=repo_index.repo_name
+            )
+            output_file = self.output_dir / output_filename
+
+            # Get output configuration
+            output_config = self.indexer_config.get("output", {})
+            json_indent = output_config.get("json_indent", 2)
+            ensure_ascii = not output_config.get("ensure_ascii", False)
+
+            # Save to JSON file, atomically so readers never see a partial index
+            temp_file = output_file.with_name(output_file.name + ".tmp")
+            with open(temp_file, "w", encoding="utf-8") as f:
+                if self.include_metadata:
+                    json.dump(
+                        asdict(repo_index),
+                        f,
+                        indent=json_indent,
+                        ensure_ascii=ensure_ascii,
+                    )
+                else:
+                    # Save without metadata if disabled
+                    index_data = asdict(repo_index)
+                    index_data.pop("analysis_metadata", None)
+                    json.dump(
+                        index_data, f, indent=json_indent, ensure_ascii=ensure_ascii
+                    )
+            os.replace(temp_file, output_file)
+
+            self.logger.info(f"Saved index for {repo_index.repo_name} to {output_file}")
+
+            if self.enable_incremental_indexing:
+                self._save_manifest(repo_dir, repo_index)
+
+            # The index now holds everything the journal recorded
+            self._close_journal(repo_index.repo_name, remove=True)
+            self.repo_snapshots.pop(repo_dir.name, None)
+
+            # Collect statistics for report
+            stats = None
+            if self.generate_statistics:
+                stats = self._extract_repository_statistics(repo_index)
+
+            return repo_index.repo_name, str(output_file), stats
+
+        except Exception as e:
+            self.logger.error(f"Failed to process repository {repo_dir.name}: {e}")
+            # Keep the journal so the next run resumes where this one stopped
+            self._close_journal(repo_dir.name)
+            self.repo_snapshots.pop(repo_dir.name, None)
+            return None
+
     async def build_all_indexes(self) -> Dict[str, str]:
         """Build indexes for all repositories in code_base"""
         if not self.code_base_path.exists():
@@ -1202,56 +3511,45 @@ class CodeIndexer:
 
         self.logger.info(f"Found {len(repo_dirs)} repositories to process")
 
-        # Process each repository
+        # Process repositories; with concurrent analysis enabled, repositories
+        # run side by side and share one global file-analysis budget so the
+        # LLM pipe stays full across repository boundaries
         output_files = {}
         statistics_data = []
 
-        for repo_dir in repo_dirs:
-            try:
-                # Process repository
-                repo_index = await self.process_repository(repo_dir)
+        if self.enable_concurrent_analysis and len(repo_dirs) > 1:
+            self.logger.info(
+                f"Indexing up to {self.max_concurrent_repositories} repositories concurrently "
+                f"with a global limit of {self.max_concurrent_files} parallel files"
+            )
+            self.file_analysis_semaphore = asyncio.Semaphore(self.max_concurrent_files)
+            repo_semaphore = asyncio.Semaphore(self.max_concurrent_repositories)
 
-                # Generate output filename using configured pattern
-                output_filename = self.index_filename_pattern.format(
-                    repo_name=repo_index.repo_name
-                )
-                output_file = self.output_dir / output_filename
-
-                # Get output configuration
-                output_config = self.indexer_config.get("output", {})
-                json_indent = output_config.get("json_indent", 2)
-                ensure_ascii = not output_config.get("ensure_ascii", False)
-
-                # Save to JSON file
-                with open(output_file, "w", encoding="utf-8") as f:
-                    if self.include_metadata:
-                        json.dump(
-                            asdict(repo_index),
-                            f,
-                            indent=json_indent,
-                            ensure_ascii=ensure_ascii,
-                        )
-                    else:
-                        # Save without metadata if disabled
-                        index_data = asdict(repo_index)
-                        index_data.pop("analysis_metadata", None)
-                        json.dump(
-                            index_data, f, indent=json_indent, ensure_ascii=ensure_ascii
-                        )
+            async def _index_with_semaphore(repo_dir: Path):
+                async with repo_semaphore:
+                    return await self._index_repository(repo_dir)
 
-                output_files[repo_index.repo_name] = str(output_file)
-                self.logger.info(
-                    f"Saved index for {repo_index.repo_name} to {output_file}"
+            try:
+                results = await asyncio.gather(
+                    *[_index_with_semaphore(repo_dir) for repo_dir in repo_dirs]
                 )
+            finally:
+                self.file_analysis_semaphore = None
+        else:
+            results = []
+            for repo_dir in repo_dirs:
+                results.append(await self._index_repository(repo_dir))
 
-                # Collect statistics for report
-                if self.generate_statistics:
-                    stats = self._extract_repository_statistics(repo_index)
-                    statistics_data.append(stats)
-
-            except Exception as e:
-                self.logger.error(f"Failed to process repository {repo_dir.name}: {e}")
+        # Collect results in repository order regardless of completion order
+        for result in results:
+            if result is None:
                 continue
+            repo_name, output_file, stats = result
+            output_files[repo_name] = output_file
+            if stats is not None:
+                statistics_data.append(stats)
+
+        self.close_analysis_cache()
 
         # Generate additional reports if configured
         if self.generate_summary:
@@ -1313,6 +3611,8 @@ class CodeIndexer:
             "filtering_efficiency": metadata.get("filtering_efficiency", 0),
             "concurrent_analysis_used": metadata.get("concurrent_analysis_used", False),
             "cache_hits": metadata.get("cache_hits", 0),
+            "cache_misses": metadata.get("cache_misses", 0),
+            "llm_calls": metadata.get("llm_calls", {}).get("total", 0),
             "analysis_date": metadata.get("analysis_date", "unknown"),
         }
 
@@ -1359,6 +3659,7 @@ class CodeIndexer:
                 "config_file": self.indexer_config_path,
                 "concurrent_analysis_enabled": self.enable_concurrent_analysis,
                 "content_caching_enabled": self.enable_content_caching,
+                "persistent_cache_enabled": self.enable_persistent_cache,
                 "pre_filtering_enabled": self.enable_pre_filtering,
                 "min_confidence_score": self.min_confidence_score,
                 "high_confidence_threshold": self.high_confidence_threshold,
@@ -1378,6 +3679,7 @@ class CodeIndexer:
             "file_type_distribution": aggregated_file_types,
             "repository_details": statistics_data,
             "performance_metrics": {
+                "total_llm_calls": sum(s.get("llm_calls", 0) for s in statistics_data),
                 "concurrent_processing_repos": sum(
                     1
                     for s in statistics_data
@@ -1387,6 +3689,9 @@ class CodeIndexer:
                     "total_cache_hits": sum(
                         s.get("cache_hits", 0) for s in statistics_data
                     ),
+                    "total_cache_misses": sum(
+                        s.get("cache_misses", 0) for s in statistics_data
+                    ),
                     "repositories_with_caching": sum(
                         1 for s in statistics_data if s.get("cache_hits", 0) > 0
                     ),
@@ -1624,6 +3929,7 @@ def print_usage_example():
     4. Enable caching:
        - Set performance.enable_content_caching: true
        - Adjust performance.max_cache_size as needed
+       - Set performance.persistent_cache_path to share analyses across runs
 
     5. Mock mode for testing:
        - Set debug.mock_llm_responses: true
@@ -15,14 +15,33 @@ Key Improvement:
 - Single tool call that handles all steps internally
 - Agent only needs to provide indexes_path and target_file
 - No dependency on calling order or global state management
+- Parsed indexes stay resident per directory and are only re-read when an
+  index file's mtime or size changes
+- References are ranked with a BM25 inverted index built once per loaded
+  index, so query latency depends on matching postings, not index size
+- An optional offline semantic signal compares feature-hashed word and
+  character n-gram vectors (weight: REFERENCE_SEMANTIC_WEIGHT, 0 disables it)
 """
 
+import heapq
 import json
+import math
+import os
+import re
+import zlib
 from pathlib import Path
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Tuple
+from dataclasses import dataclass, field
 import logging
 
+# NumPy is optional; it vectorizes BM25 scoring over the posting lists
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # Import MCP modules
 from mcp.server.fastmcp import FastMCP
 
@@ -33,6 +52,40 @@ logger = logging.getLogger(__name__)
 # Create FastMCP server instance
 mcp = FastMCP("code-reference-indexer")
 
+# Suffix of the per-repository results journal written while indexing
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+# Leading directories ignored when matching relationship target paths
+RELATIONSHIP_PATH_PREFIXES = ("src/", "core/", "lib/", "main/")
+
+# Batch lookup results persisted next to the indexes (not picked up as an index)
+REFERENCE_PACKS_FILENAME = "reference_packs.jsonl"
+
+# BM25 parameters and per-field term weights of the reference search index
+BM25_K1 = 1.2
+BM25_B = 0.75
+SEARCH_FIELD_WEIGHTS = {
+    "key_concepts": 2.0,
+    "main_functions": 2.0,
+    "path": 1.5,
+    "summary": 1.0,
+    "file_type": 0.5,
+}
+
+# Weight of the hashed-embedding similarity in reference relevance (0 disables it)
+SEMANTIC_WEIGHT = float(os.environ.get("REFERENCE_SEMANTIC_WEIGHT", "0.3"))
+SEMANTIC_MIN_SIMILARITY = 0.1
+EMBEDDING_DIMENSIONS = 512
+# Query words up to this length may be acronyms of multi-word phrases
+ACRONYM_MAX_LENGTH = 5
+ACRONYM_FEATURE_WEIGHT = 2.0
+
+# Tokens too common in file paths and summaries to help ranking
+SEARCH_STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the this to "
+    "with src lib main core py file files code module class function".split()
+)
+
 
 @dataclass
 class CodeReference:
@@ -62,27 +115,443 @@ class RelationshipInfo:
     usage_suggestions: str
 
 
-def load_index_files_from_directory(indexes_directory: str) -> Dict[str, Dict]:
-    """Load all index files from specified directory"""
+@dataclass
+class ReferenceEntry:
+    """A code reference with the lookup fields precomputed at load time"""
+
+    reference: CodeReference
+    stem: str
+    suffix: str
+    searchable_text: str
+    directories: FrozenSet[str] = frozenset()
+
+
+@dataclass
+class LoadedIndex:
+    """A parsed index file kept resident between tool calls"""
+
+    index_key: str
+    source_path: Path
+    signature: Tuple[int, int]  # (mtime_ns, size) of the source file
+    data: Dict[str, Any]
+    references: List[ReferenceEntry] = field(default_factory=list)
+    relationships: List[RelationshipInfo] = field(default_factory=list)
+    search_index: "ReferenceSearchIndex" = None
+    # Relationships keyed by normalized target path, and the same relationships
+    # bucketed by target basename for fuzzy matching
+    relationships_by_target: Dict[str, List[RelationshipInfo]] = field(
+        default_factory=dict
+    )
+    relationships_by_basename: Dict[str, List[Tuple[str, RelationshipInfo]]] = field(
+        default_factory=dict
+    )
+    embedding_index: "ReferenceEmbeddingIndex" = None
+
+
+# Parsed indexes per resolved indexes directory, invalidated per file by
+# mtime and size so repeated searches do not re-read and re-parse JSON
+INDEX_DIRECTORY_CACHE: Dict[str, Dict[str, LoadedIndex]] = {}
+
+
+def tokenize_search_text(text: str) -> List[str]:
+    """Split text into lowercase search terms, breaking camelCase and snake_case"""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return [
+        token
+        for token in re.split(r"[^a-z0-9]+", text.lower())
+        if len(token) > 1 and token not in SEARCH_STOPWORDS
+    ]
+
+
+def reference_search_fields(reference: CodeReference) -> Dict[str, str]:
+    """Text of the reference fields used for retrieval, keyed by field name"""
+    path = Path(reference.file_path)
+    return {
+        "key_concepts": " ".join(reference.key_concepts),
+        "main_functions": " ".join(reference.main_functions),
+        "path": " ".join(path.parent.parts + (path.stem,)),
+        "summary": reference.summary,
+        "file_type": reference.file_type,
+    }
+
+
+def hashed_text_features(
+    text: str, phrases: List[str] = (), expand_acronyms: bool = False
+) -> Dict[int, float]:
+    """
+    Embed text as an L2-normalized feature-hashed vector (sparse dict form)
+
+    Features are words and character trigrams of each word. The initials of
+    every run of 2-3 consecutive words in ``phrases`` are acronym features;
+    queries (``expand_acronyms``) match them with their short words and
+    those words minus the last letter, so "gcn" finds a summary saying
+    "graph convolution" or a function GraphConvNet.
+    """
+    features: Dict[int, float] = {}
+
+    def add_feature(feature: str, weight: float):
+        digest = zlib.crc32(feature.encode("utf-8"))
+        index = digest % EMBEDDING_DIMENSIONS
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        features[index] = features.get(index, 0.0) + sign * weight
+
+    for word in tokenize_search_text(text):
+        add_feature("w:" + word, 1.0)
+        padded = f"#{word}#"
+        for start in range(len(padded) - 2):
+            add_feature("c:" + padded[start : start + 3], 0.3)
+        if expand_acronyms and 2 <= len(word) <= ACRONYM_MAX_LENGTH:
+            add_feature("a:" + word, ACRONYM_FEATURE_WEIGHT)
+            if len(word) > 2:
+                add_feature("a:" + word[:-1], ACRONYM_FEATURE_WEIGHT)
+    for phrase in phrases:
+        words = tokenize_search_text(phrase)
+        for size in (2, 3):
+            for start in range(len(words) - size + 1):
+                initials = "".join(word[0] for word in words[start : start + size])
+                add_feature("a:" + initials, ACRONYM_FEATURE_WEIGHT)
+
+    norm = math.sqrt(sum(value * value for value in features.values()))
+    if not norm:
+        return {}
+    return {index: value / norm for index, value in features.items()}
+
+
+class ReferenceEmbeddingIndex:
+    """
+    Hashed-embedding vectors of the references of one loaded index
+
+    With NumPy the vectors form one matrix and a query is a single
+    matrix-vector product; otherwise sparse dot products are used.
+    """
+
+    def __init__(self, entries: List[ReferenceEntry]):
+        self.entries = entries
+        vectors = [
+            hashed_text_features(
+                " ".join(reference_search_fields(entry.reference).values()),
+                [
+                    *entry.reference.key_concepts,
+                    *entry.reference.main_functions,
+                    entry.reference.summary,
+                ],
+            )
+            for entry in entries
+        ]
+        if NUMPY_AVAILABLE:
+            self.matrix = np.zeros((len(entries), EMBEDDING_DIMENSIONS), np.float32)
+            for row, vector in enumerate(vectors):
+                for index, value in vector.items():
+                    self.matrix[row, index] = value
+        else:
+            self.vectors = vectors
+
+    def search(
+        self, query_features: Dict[int, float], limit: int
+    ) -> List[Tuple[ReferenceEntry, float]]:
+        """Return up to ``limit`` (entry, cosine_similarity) above the noise floor"""
+        if not query_features or not self.entries:
+            return []
+
+        if NUMPY_AVAILABLE:
+            query = np.zeros(EMBEDDING_DIMENSIONS, np.float32)
+            for index, value in query_features.items():
+                query[index] = value
+            similarities = self.matrix @ query
+            candidates = np.flatnonzero(similarities >= SEMANTIC_MIN_SIMILARITY)
+            if len(candidates) > limit:
+                top = np.argpartition(similarities[candidates], -limit)[-limit:]
+                candidates = candidates[top]
+            return [
+                (self.entries[doc_id], float(similarities[doc_id]))
+                for doc_id in candidates
+            ]
+
+        similarities = {}
+        for doc_id, vector in enumerate(self.vectors):
+            similarity = sum(
+                value * vector.get(index, 0.0)
+                for index, value in query_features.items()
+            )
+            if similarity >= SEMANTIC_MIN_SIMILARITY:
+                similarities[doc_id] = similarity
+        top_ids = heapq.nlargest(limit, similarities, key=similarities.__getitem__)
+        return [(self.entries[doc_id], similarities[doc_id]) for doc_id in top_ids]
+
+
+class ReferenceSearchIndex:
+    """
+    BM25 inverted index over the references of one loaded index
+
+    Each posting stores the query-independent BM25 weight of a term in a
+    reference, so a query only sums the postings of its own terms.
+    """
+
+    def __init__(self, entries: List[ReferenceEntry]):
+        self.entries = entries
+        term_frequencies: Dict[str, Dict[int, float]] = {}
+        document_lengths = []
+
+        for doc_id, entry in enumerate(entries):
+            weighted_terms: Dict[str, float] = {}
+            for field_name, text in reference_search_fields(entry.reference).items():
+                field_weight = SEARCH_FIELD_WEIGHTS[field_name]
+                for token in tokenize_search_text(text):
+                    weighted_terms[token] = (
+                        weighted_terms.get(token, 0.0) + field_weight
+                    )
+            document_lengths.append(sum(weighted_terms.values()))
+            for token, frequency in weighted_terms.items():
+                term_frequencies.setdefault(token, {})[doc_id] = frequency
+
+        total_documents = len(entries)
+        average_length = (sum(document_lengths) / max(total_documents, 1)) or 1.0
+        self.postings: Dict[str, Tuple[Any, Any]] = {}
+
+        for token, documents in term_frequencies.items():
+            idf = math.log(
+                1 + (total_documents - len(documents) + 0.5) / (len(documents) + 0.5)
+            )
+            doc_ids = list(documents)
+            weights = [
+                idf
+                * frequency
+                * (BM25_K1 + 1)
+                / (
+                    frequency
+                    + BM25_K1
+                    * (1 - BM25_B + BM25_B * document_lengths[doc_id] / average_length)
+                )
+                for doc_id, frequency in documents.items()
+            ]
+            if NUMPY_AVAILABLE:
+                self.postings[token] = (
+                    np.array(doc_ids, dtype=np.int32),
+                    np.array(weights, dtype=np.float32),
+                )
+            else:
+                self.postings[token] = (doc_ids, weights)
+
+    def search(
+        self, query_terms: Dict[str, float], limit: int
+    ) -> List[Tuple[ReferenceEntry, float, float]]:
+        """
+        Return up to ``limit`` (entry, bm25_score, matched_query_weight) tuples
+
+        ``query_terms`` maps each term to its query weight.
+        """
+        query_postings = [
+            (self.postings[term], query_weight)
+            for term, query_weight in query_terms.items()
+            if term in self.postings
+        ]
+        if not query_postings:
+            return []
+
+        if NUMPY_AVAILABLE:
+            scores = np.zeros(len(self.entries), dtype=np.float32)
+            matched = np.zeros(len(self.entries), dtype=np.float32)
+            for (doc_ids, weights), query_weight in query_postings:
+                scores[doc_ids] += weights * query_weight
+                matched[doc_ids] += query_weight
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > limit:
+                top = np.argpartition(scores[candidates], -limit)[-limit:]
+                candidates = candidates[top]
+            return [
+                (self.entries[doc_id], float(scores[doc_id]), float(matched[doc_id]))
+                for doc_id in candidates
+            ]
+
+        scores: Dict[int, float] = {}
+        matched: Dict[int, float] = {}
+        for (doc_ids, weights), query_weight in query_postings:
+            for doc_id, weight in zip(doc_ids, weights):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * query_weight
+                matched[doc_id] = matched.get(doc_id, 0.0) + query_weight
+        top_ids = heapq.nlargest(limit, scores, key=scores.__getitem__)
+        return [
+            (self.entries[doc_id], scores[doc_id], matched[doc_id])
+            for doc_id in top_ids
+        ]
+
+
+def normalize_relationship_target(target_file: str) -> str:
+    """Normalize a target path: forward slashes, no './' and no common prefix"""
+    normalized = target_file.replace("\\", "/").strip().strip("/")
+    while normalized.startswith("./"):
+        normalized = normalized[2:].lstrip("/")
+    for prefix in RELATIONSHIP_PATH_PREFIXES:
+        if normalized.startswith(prefix):
+            normalized = normalized[len(prefix) :]
+            break
+    return normalized
+
+
+def group_relationships(
+    relationships: List[RelationshipInfo],
+) -> Tuple[
+    Dict[str, List[RelationshipInfo]], Dict[str, List[Tuple[str, RelationshipInfo]]]
+]:
+    """Group relationships by normalized target path and by target basename"""
+    by_target: Dict[str, List[RelationshipInfo]] = {}
+    by_basename: Dict[str, List[Tuple[str, RelationshipInfo]]] = {}
+    for relationship in relationships:
+        normalized = normalize_relationship_target(relationship.target_file_path)
+        by_target.setdefault(normalized, []).append(relationship)
+        by_basename.setdefault(normalized.rsplit("/", 1)[-1], []).append(
+            (normalized, relationship)
+        )
+    return by_target, by_basename
+
+
+def make_reference_entry(reference: CodeReference) -> ReferenceEntry:
+    """Precompute the fields used when scoring a reference"""
+    return ReferenceEntry(
+        reference=reference,
+        stem=Path(reference.file_path).stem.lower(),
+        suffix=Path(reference.file_path).suffix,
+        searchable_text=(
+            " ".join(reference.key_concepts)
+            + " "
+            + " ".join(reference.main_functions)
+            + " "
+            + reference.summary
+            + " "
+            + reference.file_type
+        ).lower(),
+        directories=frozenset(
+            part.lower() for part in Path(reference.file_path).parent.parts
+        ),
+    )
+
+
+def build_loaded_index(
+    index_key: str, source_path: Path, signature: Tuple[int, int], index_data: Dict
+) -> LoadedIndex:
+    """Extract references, relationships and the lookup structures once per parse"""
+    references = [
+        make_reference_entry(reference)
+        for reference in extract_code_references(index_data)
+    ]
+    relationships = extract_relationships(index_data)
+    relationships_by_target, relationships_by_basename = group_relationships(
+        relationships
+    )
+    return LoadedIndex(
+        index_key=index_key,
+        source_path=source_path,
+        signature=signature,
+        data=index_data,
+        references=references,
+        relationships=relationships,
+        search_index=ReferenceSearchIndex(references),
+        relationships_by_target=relationships_by_target,
+        relationships_by_basename=relationships_by_basename,
+        embedding_index=ReferenceEmbeddingIndex(references)
+        if SEMANTIC_WEIGHT > 0
+        else None,
+    )
+
+
+def get_loaded_indexes(indexes_directory: str) -> Dict[str, LoadedIndex]:
+    """Return the resident indexes of a directory, reloading only changed files"""
     indexes_path = Path(indexes_directory).resolve()
 
     if not indexes_path.exists():
         logger.warning(f"Indexes directory does not exist: {indexes_path}")
+        INDEX_DIRECTORY_CACHE.pop(str(indexes_path), None)
         return {}
 
-    index_cache = {}
-
-    for index_file in indexes_path.glob("*.json"):
+    cached_indexes = INDEX_DIRECTORY_CACHE.get(str(indexes_path), {})
+    loaded_indexes = {}
+
+    # Repositories still being indexed only have a results journal; expose
+    # what has been analyzed so far as a partial index
+    sources = [
+        (index_file.stem, index_file) for index_file in indexes_path.glob("*.json")
+    ]
+    finished_keys = {index_key for index_key, _ in sources}
+    sources += [
+        (journal_file.name[: -len(JOURNAL_SUFFIX)], journal_file)
+        for journal_file in indexes_path.glob(f"*{JOURNAL_SUFFIX}")
+        if journal_file.name[: -len(JOURNAL_SUFFIX)] not in finished_keys
+    ]
+
+    reloaded = 0
+    for index_key, source_path in sources:
         try:
-            with open(index_file, "r", encoding="utf-8") as f:
-                index_data = json.load(f)
-                index_cache[index_file.stem] = index_data
-                logger.info(f"Loaded index file: {index_file.name}")
+            stats = source_path.stat()
+            signature = (stats.st_mtime_ns, stats.st_size)
+            cached = cached_indexes.get(index_key)
+            if (
+                cached is not None
+                and cached.source_path == source_path
+                and cached.signature == signature
+            ):
+                loaded_indexes[index_key] = cached
+                continue
+
+            if source_path.name.endswith(JOURNAL_SUFFIX):
+                index_data = load_partial_index_from_journal(source_path)
+                logger.info(f"Loaded partial index from journal: {source_path.name}")
+            else:
+                with open(source_path, "r", encoding="utf-8") as f:
+                    index_data = json.load(f)
+                logger.info(f"Loaded index file: {source_path.name}")
+
+            loaded_indexes[index_key] = build_loaded_index(
+                index_key, source_path, signature, index_data
+            )
+            reloaded += 1
         except Exception as e:
-            logger.error(f"Failed to load index file {index_file.name}: {e}")
+            logger.error(f"Failed to load index file {source_path.name}: {e}")
 
-    logger.info(f"Loaded {len(index_cache)} index files from {indexes_path}")
-    return index_cache
+    INDEX_DIRECTORY_CACHE[str(indexes_path)] = loaded_indexes
+    if reloaded:
+        logger.info(
+            f"Loaded {len(loaded_indexes)} index files from {indexes_path} "
+            f"({reloaded} parsed, {len(loaded_indexes) - reloaded} cached)"
+        )
+    return loaded_indexes
+
+
+def load_index_files_from_directory(indexes_directory: str) -> Dict[str, Dict]:
+    """Load all index files from specified directory"""
+    return {
+        index_key: loaded_index.data
+        for index_key, loaded_index in get_loaded_indexes(indexes_directory).items()
+    }
+
+
+def load_partial_index_from_journal(journal_file: Path) -> Dict:
+    """Build an index dict from the JSONL results journal of an in-progress run"""
+    file_summaries = {}
+    relationships = {}
+
+    with open(journal_file, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The writer may be in the middle of appending this line
+                continue
+            file_path = record.get("file_path", "")
+            file_summaries[file_path] = record.get("summary", {})
+            relationships[file_path] = record.get("relationships", [])
+
+    return {
+        "repo_name": header.get("repo_name", journal_file.name.split("_index")[0]),
+        "total_files": len(file_summaries),
+        "file_summaries": list(file_summaries.values()),
+        "relationships": [
+            relationship
+            for file_relationships in relationships.values()
+            for relationship in file_relationships
+        ],
+        "analysis_metadata": {"partial": True, "source": journal_file.name},
+    }
 
 
 def extract_code_references(index_data: Dict) -> List[CodeReference]:
@@ -133,100 +602,170 @@ def calculate_relevance_score(
     target_file: str, reference: CodeReference, keywords: List[str] = None
 ) -> float:
     """Calculate relevance score between reference code and target file"""
+    return score_reference_entry(
+        Path(target_file).stem.lower(),
+        Path(target_file).suffix,
+        [keyword.lower() for keyword in keywords or []],
+        make_reference_entry(reference),
+    )
+
+
+def score_reference_entry(
+    target_name: str,
+    target_extension: str,
+    keywords: List[str],
+    entry: ReferenceEntry,
+) -> float:
+    """Score a preprocessed reference; keywords must already be lowercase"""
     score = 0.0
 
     # File name similarity
-    target_name = Path(target_file).stem.lower()
-    ref_name = Path(reference.file_path).stem.lower()
-
-    if target_name in ref_name or ref_name in target_name:
+    if target_name in entry.stem or entry.stem in target_name:
         score += 0.3
 
     # File type matching
-    target_extension = Path(target_file).suffix
-    ref_extension = Path(reference.file_path).suffix
-
-    if target_extension == ref_extension:
+    if target_extension == entry.suffix:
         score += 0.2
 
     # Keyword matching
     if keywords:
         keyword_matches = 0
-        total_searchable_text = (
-            " ".join(reference.key_concepts)
-            + " "
-            + " ".join(reference.main_functions)
-            + " "
-            + reference.summary
-            + " "
-            + reference.file_type
-        ).lower()
-
         for keyword in keywords:
-            if keyword.lower() in total_searchable_text:
+            if keyword in entry.searchable_text:
                 keyword_matches += 1
 
-        if keywords:
-            score += (keyword_matches / len(keywords)) * 0.5
+        score += (keyword_matches / len(keywords)) * 0.5
 
     return min(score, 1.0)
 
 
+def as_loaded_indexes(index_cache: Dict[str, Any]) -> Dict[str, LoadedIndex]:
+    """Accept either resident LoadedIndex values or raw index dicts"""
+    return {
+        index_key: index
+        if isinstance(index, LoadedIndex)
+        else build_loaded_index(index_key, Path(index_key), (0, 0), index)
+        for index_key, index in index_cache.items()
+    }
+
+
 def find_relevant_references_in_cache(
     target_file: str,
-    index_cache: Dict[str, Dict],
+    index_cache: Dict[str, Any],
     keywords: List[str] = None,
     max_results: int = 10,
+    semantic_weight: float = None,
 ) -> List[Tuple[CodeReference, float]]:
-    """Find reference code relevant to target file from provided cache"""
-    all_references = []
+    """
+    Find reference code relevant to target file from provided cache
 
-    # Collect reference information from all index files
-    for repo_name, index_data in index_cache.items():
-        references = extract_code_references(index_data)
-        for ref in references:
-            relevance_score = calculate_relevance_score(target_file, ref, keywords)
-            if relevance_score > 0.1:  # Only keep results with certain relevance
-                all_references.append((ref, relevance_score))
+    ``semantic_weight`` blends hashed-embedding similarity into the text
+    score (defaults to SEMANTIC_WEIGHT; 0 keeps ranking purely lexical).
+    """
+    if semantic_weight is None:
+        semantic_weight = SEMANTIC_WEIGHT
+    target_path = Path(target_file)
+    target_name = target_path.stem.lower()
+    target_extension = target_path.suffix
+    target_directories = {part.lower() for part in target_path.parent.parts}
+
+    # Query terms: keywords and the target file name count fully, the
+    # target's directories only give a hint
+    query_terms: Dict[str, float] = {}
+    for keyword in keywords or []:
+        for token in tokenize_search_text(keyword):
+            query_terms[token] = max(query_terms.get(token, 0.0), 1.0)
+    for token in tokenize_search_text(target_path.stem):
+        query_terms[token] = max(query_terms.get(token, 0.0), 1.0)
+    for token in tokenize_search_text(" ".join(target_path.parent.parts)):
+        query_terms.setdefault(token, 0.5)
+    if not query_terms:
+        return []
+
+    query_features = (
+        hashed_text_features(
+            " ".join([*(keywords or []), *target_path.parent.parts, target_path.stem]),
+            expand_acronyms=True,
+        )
+        if semantic_weight > 0
+        else {}
+    )
 
-    # Sort by relevance score
-    all_references.sort(key=lambda x: x[1], reverse=True)
+    # Collect the BM25 and embedding top candidates of every index file:
+    # id(entry) -> [entry, bm25_score, matched_weight, similarity]
+    candidate_limit = max(max_results * 5, 50)
+    candidates: Dict[int, List[Any]] = {}
+    for loaded_index in as_loaded_indexes(index_cache).values():
+        for entry, bm25_score, matched_weight in loaded_index.search_index.search(
+            query_terms, candidate_limit
+        ):
+            candidates[id(entry)] = [entry, bm25_score, matched_weight, 0.0]
+        if query_features and loaded_index.embedding_index is not None:
+            for entry, similarity in loaded_index.embedding_index.search(
+                query_features, candidate_limit
+            ):
+                candidates.setdefault(id(entry), [entry, 0.0, 0.0, 0.0])[3] = similarity
+    if not candidates:
+        return []
+
+    # Combine normalized BM25, query coverage, semantic similarity and path
+    # similarity
+    max_bm25 = max(candidate[1] for candidate in candidates.values()) or 1.0
+    total_query_weight = sum(query_terms.values())
+    all_references = []
+    for entry, bm25_score, matched_weight, similarity in candidates.values():
+        text_score = 0.5 * (bm25_score / max_bm25) + 0.5 * (
+            matched_weight / total_query_weight
+        )
+        if query_features:
+            text_score = (
+                1 - semantic_weight
+            ) * text_score + semantic_weight * similarity
+        path_score = 0.0
+        if target_name == entry.stem:
+            path_score += 0.3
+        elif target_name and (target_name in entry.stem or entry.stem in target_name):
+            path_score += 0.2
+        if target_extension == entry.suffix:
+            path_score += 0.1
+        if target_directories and entry.directories:
+            path_score += 0.1 * (
+                len(target_directories & entry.directories)
+                / len(target_directories | entry.directories)
+            )
+
+        relevance_score = min(0.5 * text_score + path_score, 1.0)
+        if relevance_score > 0.1:  # Only keep results with certain relevance
+            all_references.append((entry.reference, relevance_score))
 
-    return all_references[:max_results]
+    return heapq.nlargest(max_results, all_references, key=lambda x: x[1])
 
 
 def find_direct_relationships_in_cache(
-    target_file: str, index_cache: Dict[str, Dict]
+    target_file: str, index_cache: Dict[str, Any]
 ) -> List[RelationshipInfo]:
     """Find direct relationships with target file from provided cache"""
     relationships = []
 
     # Normalize target file path (remove common prefixes if exists)
-    common_prefixes = ["src/", "core/", "lib/", "main/", "./"]
-    normalized_target = target_file.strip("/")
-    for prefix in common_prefixes:
-        if normalized_target.startswith(prefix):
-            normalized_target = normalized_target[len(prefix) :]
-            break
+    normalized_target = normalize_relationship_target(target_file)
+    if not normalized_target:
+        return relationships
+    target_basename = normalized_target.rsplit("/", 1)[-1]
 
     # Collect relationship information from all index files
-    for repo_name, index_data in index_cache.items():
-        repo_relationships = extract_relationships(index_data)
-        for rel in repo_relationships:
-            # Normalize target file path in relationship
-            normalized_rel_target = rel.target_file_path.strip("/")
-            for prefix in common_prefixes:
-                if normalized_rel_target.startswith(prefix):
-                    normalized_rel_target = normalized_rel_target[len(prefix) :]
-                    break
-
-            # Check target file path matching (support multiple matching methods)
-            if (
-                normalized_target == normalized_rel_target
-                or normalized_target in normalized_rel_target
+    for loaded_index in as_loaded_indexes(index_cache).values():
+        # Direct match on the normalized path
+        exact_matches = loaded_index.relationships_by_target.get(normalized_target, [])
+        relationships.extend(exact_matches)
+
+        # Fuzzy fallback only scans relationships sharing the basename
+        for normalized_rel_target, rel in loaded_index.relationships_by_basename.get(
+            target_basename, []
+        ):
+            if normalized_rel_target != normalized_target and (
+                normalized_target in normalized_rel_target
                 or normalized_rel_target in normalized_target
-                or target_file in rel.target_file_path
-                or rel.target_file_path in target_file
             ):
                 relationships.append(rel)
 
@@ -328,6 +867,69 @@ def format_reference_output(
     return "\n".join(output_lines)
 
 
+def parse_keywords(keywords: Any) -> List[str]:
+    """Parse comma-separated keywords, also accepting an already split list"""
+    if not keywords:
+        return []
+    if isinstance(keywords, str):
+        keywords = keywords.split(",")
+    return [str(kw).strip() for kw in keywords if str(kw).strip()]
+
+
+def parse_target_files(target_files: str) -> List[str]:
+    """Parse a JSON array of target files, or a comma/newline separated list"""
+    try:
+        parsed = json.loads(target_files)
+    except json.JSONDecodeError:
+        parsed = re.split(r"[,\n]", target_files)
+    if isinstance(parsed, str):
+        parsed = [parsed]
+    target_file_list = []
+    for target_file in parsed:
+        target_file = str(target_file).strip()
+        if target_file and target_file not in target_file_list:
+            target_file_list.append(target_file)
+    return target_file_list
+
+
+def build_reference_pack(
+    target_file: str,
+    index_cache: Dict[str, Any],
+    keyword_list: List[str],
+    max_results: int,
+) -> Dict[str, Any]:
+    """Resolve references and direct relationships for one target file"""
+    relevant_refs = find_relevant_references_in_cache(
+        target_file, index_cache, keyword_list, max_results
+    )
+    relationships = find_direct_relationships_in_cache(target_file, index_cache)
+
+    return {
+        "keywords_used": keyword_list,
+        "total_references_found": len(relevant_refs),
+        "total_relationships_found": len(relationships),
+        "formatted_content": format_reference_output(
+            target_file, relevant_refs, relationships
+        ),
+    }
+
+
+def persist_reference_packs(
+    indexes_directory: str, packs: Dict[str, Dict[str, Any]]
+) -> Path:
+    """Write reference packs as JSONL next to the indexes, replacing atomically"""
+    packs_file = Path(indexes_directory).resolve() / REFERENCE_PACKS_FILENAME
+    temp_file = packs_file.with_name(packs_file.name + ".tmp")
+    with open(temp_file, "w", encoding="utf-8") as f:
+        for target_file, pack in packs.items():
+            f.write(
+                json.dumps({"target_file": target_file, **pack}, ensure_ascii=False)
+                + "\n"
+            )
+    os.replace(temp_file, packs_file)
+    return packs_file
+
+
 # ==================== MCP Tool Definitions ====================
 
 
@@ -351,7 +953,7 @@ async def search_code_references(
     try:
         # Step 1: Load index files from specified directory
         logger.info(f"Loading index files from: {indexes_path}")
-        index_cache = load_index_files_from_directory(indexes_path)
+        index_cache = get_loaded_indexes(indexes_path)
 
         if not index_cache:
             result = {
@@ -363,37 +965,20 @@ async def search_code_references(
             return json.dumps(result, ensure_ascii=False, indent=2)
 
         # Step 2: Parse keywords
-        keyword_list = (
-            [kw.strip() for kw in keywords.split(",") if kw.strip()] if keywords else []
-        )
-
-        # Step 3: Find relevant reference code
-        relevant_refs = find_relevant_references_in_cache(
-            target_file, index_cache, keyword_list, max_results
-        )
-
-        # Step 4: Find direct relationships
-        relationships = find_direct_relationships_in_cache(target_file, index_cache)
-
-        # Step 5: Format output
-        formatted_output = format_reference_output(
-            target_file, relevant_refs, relationships
-        )
+        keyword_list = parse_keywords(keywords)
 
+        # Steps 3-5: Find references and relationships, then format output
         result = {
             "status": "success",
             "target_file": target_file,
             "indexes_path": indexes_path,
-            "keywords_used": keyword_list,
-            "total_references_found": len(relevant_refs),
-            "total_relationships_found": len(relationships),
-            "formatted_content": formatted_output,
+            **build_reference_pack(target_file, index_cache, keyword_list, max_results),
             "indexes_loaded": list(index_cache.keys()),
             "total_indexes_loaded": len(index_cache),
         }
 
         logger.info(
-            f"Successfully found {len(relevant_refs)} references and {len(relationships)} relationships for {target_file}"
+            f"Successfully found {result['total_references_found']} references and {result['total_relationships_found']} relationships for {target_file}"
         )
         return json.dumps(result, ensure_ascii=False, indent=2)
 
@@ -408,6 +993,99 @@ async def search_code_references(
         return json.dumps(result, ensure_ascii=False, indent=2)
 
 
+@mcp.tool()
+async def search_code_references_batch(
+    indexes_path: str,
+    target_files: str,
+    keywords_by_file: str = "",
+    max_results: int = 10,
+    persist_results: bool = False,
+) -> str:
+    """
+    Search reference code for a whole list of planned files in one call.
+    Indexes are loaded once and every target file gets its own result pack.
+
+    Args:
+        indexes_path: Path to the indexes directory containing JSON index files
+        target_files: JSON array of target file paths, e.g. '["src/model.py", "src/train.py"]',
+                      or a comma/newline separated list
+        keywords_by_file: Optional JSON object mapping target files to comma-separated
+                          keywords, e.g. '{"src/model.py": "gcn,layer"}'
+        max_results: Maximum number of references per target file
+        persist_results: Whether to also write the packs to reference_packs.jsonl
+                         in the indexes directory
+
+    Returns:
+        JSON string with per-file reference packs
+    """
+    try:
+        target_file_list = parse_target_files(target_files)
+        if not target_file_list:
+            result = {
+                "status": "error",
+                "message": "No target files provided",
+                "indexes_path": indexes_path,
+            }
+            return json.dumps(result, ensure_ascii=False, indent=2)
+
+        try:
+            keywords_map = json.loads(keywords_by_file) if keywords_by_file else {}
+        except json.JSONDecodeError as e:
+            result = {
+                "status": "error",
+                "message": f"Invalid JSON format for keywords_by_file: {str(e)}",
+                "indexes_path": indexes_path,
+            }
+            return json.dumps(result, ensure_ascii=False, indent=2)
+
+        logger.info(f"Loading index files from: {indexes_path}")
+        index_cache = get_loaded_indexes(indexes_path)
+
+        if not index_cache:
+            result = {
+                "status": "error",
+                "message": f"No index files found or failed to load from: {indexes_path}",
+                "indexes_path": indexes_path,
+            }
+            return json.dumps(result, ensure_ascii=False, indent=2)
+
+        packs = {
+            target_file: build_reference_pack(
+                target_file,
+                index_cache,
+                parse_keywords(keywords_map.get(target_file, "")),
+                max_results,
+            )
+            for target_file in target_file_list
+        }
+
+        persisted_to = None
+        if persist_results:
+            persisted_to = str(persist_reference_packs(indexes_path, packs))
+
+        result = {
+            "status": "success",
+            "indexes_path": indexes_path,
+            "total_target_files": len(packs),
+            "results": packs,
+            "persisted_to": persisted_to,
+            "indexes_loaded": list(index_cache.keys()),
+            "total_indexes_loaded": len(index_cache),
+        }
+
+        logger.info(f"Resolved reference packs for {len(packs)} target files")
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        logger.error(f"Error in search_code_references_batch: {str(e)}")
+        result = {
+            "status": "error",
+            "message": f"Failed to search reference code in batch: {str(e)}",
+            "indexes_path": indexes_path,
+        }
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+
 @mcp.tool()
 async def get_indexes_overview(indexes_path: str) -> str:
     """
@@ -484,7 +1162,10 @@ def main():
         "1. search_code_references(indexes_path, target_file, keywords, max_results) - UNIFIED TOOL"
     )
     logger.info(
-        "2. get_indexes_overview(indexes_path) - Get overview of available indexes"
+        "2. search_code_references_batch(indexes_path, target_files, keywords_by_file, max_results, persist_results) - Reference packs for many files"
+    )
+    logger.info(
+        "3. get_indexes_overview(indexes_path) - Get overview of available indexes"
     )
 
     # Run MCP server
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Code Indexer Benchmark
+
+Measures the throughput of CodeIndexer itself, independent of any real LLM
+provider. Synthetic repositories of configurable size and file-size mix are
+indexed with the mock LLM, which can be given a per-call latency and an error
+rate to mimic a real API.
+
+Reported metrics (per run):
+- files/sec and LLM calls per analyzed file
+- wall time, CPU time and the wall time during which no LLM call was in flight
+- peak RSS of the benchmark process
+
+Every run executes in a fresh process so peak RSS is not inherited from
+earlier runs. Results are written as JSON and can be compared against a
+previous result file to catch regressions in concurrency, caching and
+batching changes.
+
+Usage:
+    python tools/indexer_benchmark.py --repos 2 --files 200 --latency 0.2
+    python tools/indexer_benchmark.py --runs 2 --output bench.json --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Allow running as a script from any working directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+try:
+    import resource
+
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+# File-size mixes as (weight, min_bytes, max_bytes) buckets
+FILE_SIZE_MIXES = {
+    "small": [(1.0, 200, 2000)],
+    "mixed": [(0.6, 200, 2000), (0.3, 2000, 12000), (0.1, 12000, 60000)],
+    "large": [(0.3, 2000, 12000), (0.7, 12000, 120000)],
+}
+
+# Component names used for both the synthetic repos and the target structure
+COMPONENTS = [
+    "encoder",
+    "decoder",
+    "attention",
+    "diffusion",
+    "sampler",
+    "dataset",
+    "loader",
+    "metrics",
+    "loss",
+    "trainer",
+    "optimizer",
+    "scheduler",
+    "graph",
+    "embedding",
+    "evaluator",
+    "config",
+]
+
+BENCHMARK_TARGET_STRUCTURE = """
+project/
+├── src/
+│   ├── models/
+│   │   ├── encoder.py      # encoder network
+│   │   ├── decoder.py      # decoder network
+│   │   └── diffusion.py    # diffusion process
+│   ├── data/
+│   │   ├── dataset.py      # dataset definitions
+│   │   └── loader.py       # batching and loading
+│   ├── training/
+│   │   ├── trainer.py      # training loop
+│   │   ├── loss.py         # loss functions
+│   │   └── scheduler.py    # learning rate schedules
+│   └── utils/
+│       └── metrics.py      # evaluation metrics
+├── configs/
+│   └── config.yaml
+"""
+
+
+def _make_python_file(rng: random.Random, component: str, target_size: int) -> str:
+    """Generate a Python module of roughly target_size bytes"""
+    lines = [
+        f'"""{component.capitalize()} utilities for the synthetic benchmark repo."""',
+        "",
+        "import math",
+        "import os",
+        f"from .{rng.choice(COMPONENTS)} import helper",
+        "",
+    ]
+    index = 0
+    while sum(len(line) + 1 for line in lines) < target_size:
+        if index % 4 == 0:
+            lines += [
+                "",
+                f"class {component.capitalize()}Block{index}:",
+                f'    """Block {index} of the {component} component."""',
+                "",
+                "    def __init__(self, size: int = 8):",
+                "        self.size = size",
+                "",
+                "    def forward(self, values):",
+                "        return [math.sqrt(abs(value)) * self.size for value in values]",
+            ]
+        else:
+            lines += [
+                "",
+                f"def {component}_step_{index}(values, scale={rng.randint(1, 9)}):",
+                f'    """Apply step {index} of the {component} computation."""',
+                "    total = 0",
+                "    for value in values:",
+                "        total += value * scale",
+                "    return total / max(len(values), 1)",
+            ]
+        index += 1
+    return "\n".join(lines) + "\n"
+
+
+def _make_config_file(rng: random.Random, suffix: str) -> str:
+    """Generate a small configuration or data file"""
+    settings = {
+        component: {"enabled": rng.random() > 0.5, "size": rng.randint(1, 512)}
+        for component in rng.sample(COMPONENTS, 4)
+    }
+    if suffix == ".json":
+        return json.dumps(settings, indent=2)
+    return "".join(
+        f"{name}:\n  enabled: {str(values['enabled']).lower()}\n  size: {values['size']}\n"
+        for name, values in settings.items()
+    )
+
+
+def generate_synthetic_repository(
+    root: Path, repo_name: str, num_files: int, size_mix: str, seed: int
+) -> int:
+    """Write a synthetic repository and return the number of files created"""
+    rng = random.Random(f"{seed}:{repo_name}")
+    buckets = FILE_SIZE_MIXES[size_mix]
+    weights = [weight for weight, _, _ in buckets]
+    repo_path = root / repo_name
+
+    for index in range(num_files):
+        package = repo_path / rng.choice(["models", "data", "training", "utils"])
+        if index % 10 == 0:
+            package = package / f"sub{index // 10 % 5}"
+        package.mkdir(parents=True, exist_ok=True)
+
+        component = rng.choice(COMPONENTS)
+        roll = rng.random()
+        if roll < 0.05:
+            (package / "__init__.py").write_text(f"from .{component} import *\n")
+        elif roll < 0.12:
+            suffix = rng.choice([".yaml", ".json"])
+            (package / f"{component}_{index}{suffix}").write_text(
+                _make_config_file(rng, suffix)
+            )
+        else:
+            _, min_bytes, max_bytes = rng.choices(buckets, weights=weights)[0]
+            (package / f"{component}_{index}.py").write_text(
+                _make_python_file(rng, component, rng.randint(min_bytes, max_bytes))
+            )
+
+    return sum(1 for path in repo_path.rglob("*") if path.is_file())
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB, or None if unavailable"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    divisor = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return round(peak / divisor, 2)
+
+
+class MockLLMInjector:
+    """Wraps CodeIndexer._call_llm with mock latency, errors and timing"""
+
+    def __init__(
+        self, indexer, latency: float, jitter: float, error_rate: float, seed: int
+    ):
+        self.indexer = indexer
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.original_call = indexer._call_llm
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.busy_since = None
+        self.busy_seconds = 0.0
+        indexer._call_llm = self._call_llm
+
+    async def _call_llm(self, prompt: str, *args, **kwargs) -> str:
+        self.calls += 1
+        if self.in_flight == 0:
+            self.busy_since = time.perf_counter()
+        self.in_flight += 1
+        try:
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.rng.random() < self.error_rate:
+                self.errors += 1
+                # Same shape as CodeIndexer._call_llm after exhausting retries
+                return "Error in LLM analysis: injected benchmark error"
+            return await self.original_call(prompt, *args, **kwargs)
+        finally:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self.busy_seconds += time.perf_counter() - self.busy_since
+
+
+async def _run_indexer(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Index the synthetic code base once and collect metrics"""
+    from tools.code_indexer import CodeIndexer
+
+    indexer = CodeIndexer(
+        code_base_path=settings["code_base_path"],
+        target_structure=BENCHMARK_TARGET_STRUCTURE,
+        output_dir=settings["output_dir"],
+        config_path=settings["api_config_path"],
+        indexer_config_path=settings["indexer_config_path"],
+        enable_pre_filtering=settings["pre_filtering"],
+    )
+    indexer.mock_llm_responses = True
+    indexer.request_delay = settings["request_delay"]
+    indexer.enable_concurrent_analysis = settings["max_concurrent_files"] > 1
+    indexer.max_concurrent_files = settings["max_concurrent_files"]
+    indexer.enable_batch_analysis = settings["batch_analysis"]
+    indexer.enable_persistent_cache = settings["persistent_cache"]
+    indexer.enable_incremental_indexing = settings["incremental"]
+    indexer.analysis_mode = settings["analysis_mode"]
+
+    injector = MockLLMInjector(
+        indexer,
+        latency=settings["latency"],
+        jitter=settings["jitter"],
+        error_rate=settings["error_rate"],
+        seed=settings["seed"],
+    )
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    output_files = await indexer.build_all_indexes()
+    wall_seconds = time.perf_counter() - wall_start
+    cpu_seconds = time.process_time() - cpu_start
+
+    files_analyzed = 0
+    relationships = 0
+    for output_file in output_files.values():
+        with open(output_file, "r", encoding="utf-8") as f:
+            index_data = json.load(f)
+        files_analyzed += len(index_data.get("file_summaries", []))
+        relationships += len(index_data.get("relationships", []))
+
+    return {
+        "repositories_indexed": len(output_files),
+        "files_analyzed": files_analyzed,
+        "relationships": relationships,
+        "wall_seconds": round(wall_seconds, 4),
+        "cpu_seconds": round(cpu_seconds, 4),
+        "llm_busy_seconds": round(injector.busy_seconds, 4),
+        "non_llm_wall_seconds": round(max(wall_seconds - injector.busy_seconds, 0), 4),
+        "files_per_second": round(files_analyzed / wall_seconds, 3)
+        if wall_seconds
+        else 0,
+        "llm_calls": injector.calls,
+        "llm_errors_injected": injector.errors,
+        "llm_calls_per_file": round(injector.calls / files_analyzed, 3)
+        if files_analyzed
+        else 0,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _write_run_config(indexer_config_path: str, work_dir: Path) -> str:
+    """Copy the indexer config into the work directory, logging to a file there"""
+    import yaml
+
+    try:
+        with open(indexer_config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+    except Exception:
+        config = {}
+    # The configured log file is relative to the current directory
+    config.setdefault("logging", {})["log_file"] = str(work_dir / "indexer.log")
+
+    run_config_path = work_dir / "indexer_config.yaml"
+    with open(run_config_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return str(run_config_path)
+
+
+def _run_in_subprocess(settings: Dict[str, Any], queue) -> None:
+    """Entry point of a benchmark run process"""
+    import logging
+
+    logging.disable(logging.INFO)
+    try:
+        queue.put(asyncio.run(_run_indexer(settings)))
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Generate the synthetic code base and execute all benchmark runs"""
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="indexer_bench_"))
+    code_base_path = work_dir / "code_base"
+    output_dir = work_dir / "indexes"
+    shutil.rmtree(code_base_path, ignore_errors=True)
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    generation_start = time.perf_counter()
+    files_generated = sum(
+        generate_synthetic_repository(
+            code_base_path, f"repo_{index}", args.files, args.size_mix, args.seed
+        )
+        for index in range(args.repos)
+    )
+    generation_seconds = time.perf_counter() - generation_start
+
+    settings = {
+        "code_base_path": str(code_base_path),
+        "output_dir": str(output_dir),
+        "api_config_path": args.api_config,
+        "indexer_config_path": _write_run_config(args.indexer_config, work_dir),
+        "pre_filtering": args.pre_filtering,
+        "request_delay": args.request_delay,
+        "max_concurrent_files": args.concurrency,
+        "batch_analysis": not args.no_batching,
+        "persistent_cache": not args.no_cache,
+        "incremental": not args.no_incremental,
+        "analysis_mode": args.analysis_mode,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+    }
+
+    # Runs share the output directory: run 1 is cold, later runs are warm
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for run_index in range(1, args.runs + 1):
+        queue = context.Queue()
+        process = context.Process(target=_run_in_subprocess, args=(settings, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        runs.append({"run": run_index, **result})
+        print(f"Run {run_index}: {json.dumps(result)}")
+
+    if not args.keep_work_dir and not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "benchmark_date": datetime.now().isoformat(),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "synthetic_code_base": {
+            "repositories": args.repos,
+            "files_per_repository": args.files,
+            "files_generated": files_generated,
+            "size_mix": args.size_mix,
+            "seed": args.seed,
+            "generation_seconds": round(generation_seconds, 3),
+        },
+        "settings": {
+            key: value
+            for key, value in settings.items()
+            if key not in ("code_base_path", "output_dir")
+        },
+        "runs": runs,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Describe per-run metric changes relative to a baseline result file"""
+    lines = []
+    metrics = [
+        ("files_per_second", True),
+        ("llm_calls_per_file", False),
+        ("non_llm_wall_seconds", False),
+        ("cpu_seconds", False),
+        ("peak_rss_mb", False),
+    ]
+    for current_run, baseline_run in zip(current["runs"], baseline.get("runs", [])):
+        for metric, higher_is_better in metrics:
+            now, before = current_run.get(metric), baseline_run.get(metric)
+            if not isinstance(now, (int, float)) or not isinstance(
+                before, (int, float)
+            ):
+                continue
+            change = ((now - before) / before * 100) if before else 0.0
+            improved = change > 0 if higher_is_better else change < 0
+            lines.append(
+                f"run {current_run['run']} {metric}: {before} -> {now} "
+                f"({change:+.1f}%{', better' if improved and change else ''})"
+            )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark CodeIndexer throughput against a mock LLM"
+    )
+    parser.add_argument("--repos", type=int, default=2, help="Synthetic repositories")
+    parser.add_argument(
+        "--files", type=int, default=100, help="Files per synthetic repository"
+    )
+    parser.add_argument("--size-mix", choices=sorted(FILE_SIZE_MIXES), default="mixed")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Mock LLM latency per call (s)"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Extra random latency up to (s)"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of LLM calls returning an error response",
+    )
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--request-delay", type=float, default=0.0)
+    parser.add_argument(
+        "--analysis-mode", choices=["combined", "separate"], default="combined"
+    )
+    parser.add_argument("--pre-filtering", action="store_true")
+    parser.add_argument("--no-batching", action="store_true")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--no-incremental", action="store_true")
+    parser.add_argument(
+        "--runs", type=int, default=1, help="Repeated runs (run 2+ are warm)"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--indexer-config",
+        default=os.path.join(current_dir, "indexer_config.yaml"),
+    )
+    parser.add_argument(
+        "--api-config", default=os.path.join(parent_dir, "mcp_agent.secrets.yaml")
+    )
+    parser.add_argument("--work-dir", help="Directory for the synthetic code base")
+    parser.add_argument("--keep-work-dir", action="store_true")
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        results["comparison"] = compare_results(results, baseline)
+        print("\n".join(results["comparison"]))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Results saved to {args.output}")
+    else:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Token-budgeted shaping of tool results before they enter an LLM prompt.
+
+Results are cut to a per-tool token budget: long text fields keep their head
+and tail around an elision marker, runs of repeated log lines are collapsed,
+the last Python traceback of a cut output is kept whole, oversized lists keep
+their first items, and everything is serialized as compact JSON.
+"""
+
+import json
+import re
+from typing import Any, List, Optional
+
+# Rough characters per token for code and logs
+CHARS_PER_TOKEN = 4
+
+# Token budget of one tool result, by tool name
+DEFAULT_TOOL_RESULT_TOKENS = 4000
+TOOL_RESULT_TOKEN_BUDGETS = {
+    "execute_python": 3000,
+    "execute_bash": 3000,
+    "read_file": 12000,
+    "read_multiple_files": 24000,
+    "read_code_mem": 8000,
+    "search_code": 4000,
+    "search_code_references": 8000,
+    "search_code_references_batch": 12000,
+    "get_file_structure": 6000,
+}
+
+# Text fields holding program output: the tail matters most and repeated
+# lines are collapsed
+LOG_FIELDS = {"stdout", "stderr", "output"}
+LOG_HEAD_FRACTION = 0.3
+# Strings up to this length are never cut
+MIN_SHAPED_CHARS = 200
+# Lists are cut down to no fewer items than this
+MIN_LIST_ITEMS = 8
+MAX_TRACEBACK_LINES = 40
+
+TRACEBACK_HEADER = "Traceback (most recent call last):"
+DIGITS_PATTERN = re.compile(r"\d+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of ``text``"""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def tool_result_text(result: Any) -> Any:
+    """
+    Plain text of an MCP tool result (CallToolResult content is joined);
+    strings, dicts and lists are returned unchanged
+    """
+    content = getattr(result, "content", None)
+    if isinstance(content, list):
+        return "\n".join(
+            item.text
+            for item in content
+            if isinstance(getattr(item, "text", None), str)
+        )
+    return result
+
+
+def truncate_middle(
+    text: str, max_chars: int, head_fraction: float = 0.5, first_line: int = 1
+) -> str:
+    """
+    Keep the head and tail of ``text`` within max_chars, replacing the middle
+    with a marker naming the elided lines (numbered from ``first_line``)
+
+    Cuts fall on line boundaries unless that would waste half the budget.
+    """
+    if len(text) <= max_chars:
+        return text
+
+    # Leave room for the marker
+    max_chars = max(max_chars - 64, 0)
+    head_chars = int(max_chars * head_fraction)
+    tail_chars = max_chars - head_chars
+
+    head_end = text.rfind("\n", 0, head_chars) + 1
+    if head_end < head_chars // 2:
+        head_end = head_chars
+    tail_start = len(text) - tail_chars
+    line_start = text.find("\n", tail_start, tail_start + tail_chars // 2) + 1
+    if line_start > 0:
+        tail_start = line_start
+
+    start_line = first_line + text.count("\n", 0, head_end)
+    end_line = first_line + text.count("\n", 0, max(tail_start - 1, head_end))
+    marker = (
+        f"[... lines {start_line}-{end_line} elided "
+        f"({tail_start - head_end} chars) ...]"
+    )
+    head = text[:head_end]
+    if not head.endswith("\n"):
+        head += "\n"
+    return f"{head}{marker}\n{text[tail_start:]}"
+
+
+def collapse_repeated_lines(text: str, similar: bool = False, min_run: int = 3) -> str:
+    """
+    Collapse runs of identical lines, or with ``similar`` also runs of lines
+    that differ only in their numbers (progress bars, per-step logs), which
+    keep their first and last line
+    """
+    lines = text.split("\n")
+    collapsed = []
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        key = DIGITS_PATTERN.sub("#", line) if similar else line
+        end = index + 1
+        while (
+            end < len(lines)
+            and (DIGITS_PATTERN.sub("#", lines[end]) if similar else lines[end]) == key
+        ):
+            end += 1
+
+        run = end - index
+        if run < min_run or not line.strip():
+            collapsed.extend(lines[index:end])
+        elif all(other == line for other in lines[index + 1 : end]):
+            collapsed.append(line)
+            collapsed.append(f"[... previous line repeated {run - 1} more times ...]")
+        else:
+            collapsed.append(line)
+            collapsed.append(f"[... {run - 2} similar lines elided ...]")
+            collapsed.append(lines[end - 1])
+        index = end
+    return "\n".join(collapsed)
+
+
+def extract_last_traceback(text: str) -> Optional[str]:
+    """The last Python traceback in ``text``, innermost frames kept if it is long"""
+    start = text.rfind(TRACEBACK_HEADER)
+    if start < 0:
+        return None
+
+    lines = text[start:].split("\n")
+    # The exception line is the first unindented line after the header
+    for index in range(1, len(lines)):
+        if lines[index] and not lines[index][0].isspace():
+            lines = lines[: index + 1]
+            break
+
+    if len(lines) > MAX_TRACEBACK_LINES:
+        elided = len(lines) - MAX_TRACEBACK_LINES
+        lines = (
+            lines[:1]
+            + [f"  [... {elided} lines of outer frames elided ...]"]
+            + lines[-(MAX_TRACEBACK_LINES - 1) :]
+        )
+    return "\n".join(lines)
+
+
+def shape_log_text(text: str, max_chars: int) -> tuple:
+    """
+    Fit program output into max_chars
+
+    Returns:
+        (shaped text, traceback) where traceback is the last traceback of
+        the output when the cut text no longer contains it, else None
+    """
+    if "\r" in text:
+        # Progress bars redraw their line with carriage returns
+        text = "\n".join(
+            line.rstrip("\r").rsplit("\r", 1)[-1] for line in text.split("\n")
+        )
+    text = collapse_repeated_lines(text)
+    if len(text) <= max_chars:
+        return text, None
+
+    text = collapse_repeated_lines(text, similar=True)
+    if len(text) <= max_chars:
+        return text, None
+
+    traceback = extract_last_traceback(text)
+    if traceback is not None and len(traceback) < max_chars // 2:
+        shaped = truncate_middle(text, max_chars - len(traceback), LOG_HEAD_FRACTION)
+        if traceback not in shaped:
+            return shaped, traceback
+    return truncate_middle(text, max_chars, LOG_HEAD_FRACTION), None
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _collect_containers(value: Any, strings: List, lists: List):
+    """Collect (container, key) of long strings and long lists below value"""
+    if isinstance(value, dict):
+        items = list(value.items())
+    elif isinstance(value, list):
+        items = list(enumerate(value))
+    else:
+        return
+    for key, item in items:
+        if isinstance(item, str):
+            if len(item) > MIN_SHAPED_CHARS:
+                strings.append((value, key))
+        else:
+            if isinstance(item, list) and len(item) > MIN_LIST_ITEMS:
+                lists.append((value, key))
+            _collect_containers(item, strings, lists)
+
+
+def _shape_strings(data: Any, max_chars: int):
+    """Share the budget left by the rest of the result among its long strings"""
+    strings = []
+    _collect_containers(data, strings, [])
+    if not strings:
+        return
+
+    originals = [container[key] for container, key in strings]
+    for container, key in strings:
+        container[key] = ""
+    available = max(max_chars - len(_dumps(data)), max_chars // 4)
+
+    # Strings shorter than their fair share stay whole; the rest split what is left
+    order = sorted(range(len(strings)), key=lambda index: len(originals[index]))
+    allowances = {}
+    for position, index in enumerate(order):
+        share = available // (len(order) - position)
+        allowances[index] = min(len(originals[index]), share)
+        available -= allowances[index]
+
+    for index, (container, key) in enumerate(strings):
+        text, allowance = originals[index], max(allowances[index], MIN_SHAPED_CHARS)
+        if len(text) <= allowance:
+            container[key] = text
+        elif key in LOG_FIELDS:
+            container[key], traceback = shape_log_text(text, allowance)
+            if traceback is not None and isinstance(container, dict):
+                container["traceback"] = traceback
+        else:
+            first_line = 1
+            if isinstance(container, dict) and isinstance(
+                container.get("start_line"), int
+            ):
+                first_line = container["start_line"]
+            container[key] = truncate_middle(text, allowance, first_line=first_line)
+
+
+def _shape_lists(data: Any, max_chars: int):
+    """Keep the first items of the largest lists until the result fits"""
+    for _ in range(8):
+        size = len(_dumps(data))
+        if size <= max_chars:
+            return
+        lists = []
+        _collect_containers(data, [], lists)
+        if not lists:
+            return
+        container, key = max(lists, key=lambda entry: len(_dumps(entry[0][entry[1]])))
+        items = container[key]
+        keep = max(MIN_LIST_ITEMS, int(len(items) * max_chars / size) - 1)
+        if keep >= len(items):
+            return
+        container[key] = items[:keep] + [
+            f"[... {len(items) - keep} more items elided ...]"
+        ]
+
+
+def shape_tool_result(
+    tool_name: str, result: Any, max_tokens: Optional[int] = None
+) -> str:
+    """
+    Render a tool result for an LLM prompt within the tool's token budget
+
+    Args:
+        tool_name: Tool that produced the result (selects the budget)
+        result: JSON string, plain text, dict/list or MCP CallToolResult
+        max_tokens: Budget override
+
+    Returns:
+        Compact JSON for structured results, otherwise the shaped text
+    """
+    if max_tokens is None:
+        max_tokens = TOOL_RESULT_TOKEN_BUDGETS.get(
+            tool_name, DEFAULT_TOOL_RESULT_TOKENS
+        )
+    max_chars = max_tokens * CHARS_PER_TOKEN
+
+    data = tool_result_text(result)
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            if len(data) <= max_chars:
+                return data
+            return truncate_middle(data, max_chars)
+        if not isinstance(data, (dict, list)):
+            return _dumps(data)
+    elif not isinstance(data, (dict, list)):
+        return truncate_middle(str(data), max_chars)
+    else:
+        # Never modify the caller's object
+        data = json.loads(_dumps(data))
+
+    # Repeated output lines are collapsed even when the result fits
+    for container in data if isinstance(data, list) else [data]:
+        if isinstance(container, dict):
+            for key in LOG_FIELDS.intersection(container):
+                if isinstance(container[key], str):
+                    container[key] = collapse_repeated_lines(container[key])
+
+    source = _dumps(data)
+    if len(source) <= max_chars:
+        return source
+
+    # Escaping makes serialized strings longer than their text; shrink the
+    # target until the serialized result fits
+    target = max_chars
+    for _ in range(3):
+        shaped = json.loads(source)
+        _shape_strings(shaped, target)
+        _shape_lists(shaped, target)
+        text = _dumps(shaped)
+        if len(text) <= max_chars:
+            return text
+        target = int(target * max_chars / len(text) * 0.95)
+
+    # Structure alone exceeds the budget; cut the serialized form
+    return truncate_middle(text, max_chars)
@@ -0,0 +1,286 @@
+"""
+In-memory snapshot of a workspace directory tree, maintained incrementally.
+
+Directories are re-listed only when their mtime changes (entries added,
+removed or renamed), writers can report changed files directly, and a full
+stat pass runs only when the snapshot was marked stale (e.g. after running
+arbitrary code) or periodically. Every change bumps a version number so
+callers can ask what changed since the version they last saw.
+"""
+
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Union
+
+# Seconds between full stat passes that catch in-place file modifications
+SNAPSHOT_FULL_SCAN_SECONDS = 30.0
+# Changes kept for changes_since queries
+SNAPSHOT_MAX_CHANGES = 10000
+# Directories never scanned: caches, dependencies and virtual environments
+# can hold far more files than the code being written
+DEFAULT_EXCLUDED_DIRECTORIES = frozenset(
+    {"__pycache__", "node_modules", "venv", "env", "site-packages"}
+)
+
+
+class WorkspaceSnapshot:
+    """
+    Tree of the files below one root directory
+
+    Hidden directories and directories named in ``exclude`` are skipped;
+    paths are relative with forward slashes, and the root directory itself
+    is "".
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        exclude: Iterable[str] = DEFAULT_EXCLUDED_DIRECTORIES,
+    ):
+        self.root = Path(root)
+        self.exclude = frozenset(exclude)
+        self.version = 0
+        self.stale = True
+        self.last_full_scan = 0.0
+        # relative file path -> (size_bytes, mtime_ns)
+        self.files: Dict[str, tuple] = {}
+        # relative directory path -> mtime_ns when it was last listed
+        self.directories: Dict[str, int] = {}
+        # relative directory path -> names of its files and subdirectories
+        self.children: Dict[str, Set[str]] = {}
+        self.changes = deque(maxlen=SNAPSHOT_MAX_CHANGES)
+        self._sorted_files = None
+
+    def _full_path(self, relative_path: str) -> str:
+        return os.path.join(str(self.root), *relative_path.split("/"))
+
+    @staticmethod
+    def _join(directory: str, name: str) -> str:
+        return f"{directory}/{name}" if directory else name
+
+    def _record(self, relative_path: str, change: str):
+        self.version += 1
+        self.changes.append((self.version, relative_path, change))
+        self._sorted_files = None
+
+    def _remove_directory(self, directory: str):
+        for name in self.children.pop(directory, set()):
+            child = self._join(directory, name)
+            if child in self.directories:
+                self._remove_directory(child)
+            elif self.files.pop(child, None) is not None:
+                self._record(child, "removed")
+        self.directories.pop(directory, None)
+
+    def _scan_directory(self, directory: str, stat_files: bool = True):
+        """List one directory, recursing into new (or all, on full scans) subdirectories"""
+        full_path = self._full_path(directory)
+        try:
+            directory_mtime = os.stat(full_path).st_mtime_ns
+            with os.scandir(full_path) as entries:
+                listed = list(entries)
+        except OSError:
+            self._remove_directory(directory)
+            return
+
+        known = self.children.get(directory, set())
+        names = set()
+        subdirectories = []
+        for entry in listed:
+            child = self._join(directory, entry.name)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name.startswith(".") or entry.name in self.exclude:
+                        continue
+                    names.add(entry.name)
+                    if child in self.files:
+                        self.files.pop(child)
+                        self._record(child, "removed")
+                    if stat_files or child not in self.directories:
+                        subdirectories.append(child)
+                elif entry.is_file():
+                    names.add(entry.name)
+                    if child in self.directories:
+                        self._remove_directory(child)
+                    if not stat_files and child in self.files:
+                        continue
+                    stats = entry.stat()
+                    signature = (stats.st_size, stats.st_mtime_ns)
+                    previous = self.files.get(child)
+                    if previous != signature:
+                        self.files[child] = signature
+                        self._record(child, "added" if previous is None else "modified")
+            except OSError:
+                continue
+
+        for name in known - names:
+            child = self._join(directory, name)
+            if child in self.directories:
+                self._remove_directory(child)
+            elif self.files.pop(child, None) is not None:
+                self._record(child, "removed")
+
+        self.children[directory] = names
+        self.directories[directory] = directory_mtime
+        for child in subdirectories:
+            self._scan_directory(child, stat_files)
+
+    def refresh(self):
+        """
+        Bring the snapshot up to date with the disk
+
+        Only directories whose mtime changed are listed again, unless the
+        snapshot is stale or due for its periodic full stat pass.
+        """
+        if not self.root.is_dir():
+            if self.directories:
+                self._remove_directory("")
+            return
+
+        now = time.monotonic()
+        if self.stale or now - self.last_full_scan >= SNAPSHOT_FULL_SCAN_SECONDS:
+            self.stale = False
+            self.last_full_scan = now
+            self._scan_directory("")
+            return
+
+        for directory, known_mtime in list(self.directories.items()):
+            if directory not in self.directories:
+                continue  # Removed while rescanning a parent
+            try:
+                changed = os.stat(self._full_path(directory)).st_mtime_ns != known_mtime
+            except OSError:
+                changed = True
+            if changed:
+                self._scan_directory(directory, stat_files=False)
+
+    def mark_stale(self):
+        """Request a full stat pass (files may have changed in place)"""
+        self.stale = True
+
+    def notify_file_changed(self, full_path: Union[str, Path]):
+        """Record a file that was just written, without rescanning its tree"""
+        try:
+            relative_path = Path(full_path).resolve().relative_to(self.root.resolve())
+        except ValueError:
+            return
+        relative_path = relative_path.as_posix()
+        parts = relative_path.split("/")
+        if any(part.startswith(".") or part in self.exclude for part in parts[:-1]):
+            return
+
+        directory = "/".join(parts[:-1])
+        if directory not in self.directories:
+            # New directories: list the nearest directory already known
+            while directory and directory not in self.directories:
+                directory = directory.rpartition("/")[0]
+            if directory in self.directories:
+                self._scan_directory(directory, stat_files=False)
+            return
+
+        try:
+            stats = os.stat(self._full_path(relative_path))
+        except OSError:
+            return
+        signature = (stats.st_size, stats.st_mtime_ns)
+        previous = self.files.get(relative_path)
+        if previous != signature:
+            self.files[relative_path] = signature
+            self.children[directory].add(parts[-1])
+            self._record(relative_path, "added" if previous is None else "modified")
+
+    def changes_since(self, version: int) -> Dict[str, Any]:
+        """
+        Files added, modified or removed after ``version``
+
+        ``complete`` is False when older changes were already dropped; the
+        caller should then re-read the whole tree.
+        """
+        oldest_kept = self.changes[0][0] if self.changes else self.version + 1
+        latest = {}
+        for change_version, relative_path, change in self.changes:
+            if change_version > version:
+                latest[relative_path] = change
+        return {
+            "version": self.version,
+            "since_version": version,
+            "complete": version >= oldest_kept - 1,
+            "changes": [
+                {"path": relative_path, "change": change}
+                for relative_path, change in sorted(latest.items())
+            ],
+        }
+
+    def file_paths(self) -> List[str]:
+        """All file paths in the snapshot, sorted"""
+        if self._sorted_files is None:
+            self._sorted_files = sorted(self.files)
+        return list(self._sorted_files)
+
+    def tree(
+        self, directory: str = "", max_depth: int = 5, path_prefix: str = ""
+    ) -> Dict[str, Any]:
+        """Nested directory structure below ``directory``, paths prefixed with path_prefix"""
+
+        def build(path: str, current_depth: int) -> Dict[str, Any]:
+            name = path.rpartition("/")[2] if path else self.root.name
+            if current_depth >= max_depth:
+                return {"type": "directory", "name": name, "truncated": True}
+
+            items = []
+            for child_name in sorted(self.children.get(path, ())):
+                child = self._join(path, child_name)
+                if child in self.files:
+                    items.append(
+                        {
+                            "type": "file",
+                            "name": child_name,
+                            "path": path_prefix + child,
+                            "size_bytes": self.files[child][0],
+                            "extension": os.path.splitext(child_name)[1],
+                        }
+                    )
+                elif child in self.directories:
+                    child_info = build(child, current_depth + 1)
+                    child_info["path"] = path_prefix + child
+                    items.append(child_info)
+
+            return {
+                "type": "directory",
+                "name": name,
+                "items": items,
+                "item_count": len(items),
+            }
+
+        return build(directory.strip("/"), 0)
+
+
+_SNAPSHOTS: Dict[tuple, WorkspaceSnapshot] = {}
+
+
+def get_workspace_snapshot(
+    root: Union[str, Path], exclude: Iterable[str] = DEFAULT_EXCLUDED_DIRECTORIES
+) -> WorkspaceSnapshot:
+    """Shared snapshot for a root directory and exclude set (one per process)"""
+    root = os.path.abspath(str(root))
+    exclude = frozenset(exclude)
+    snapshot = _SNAPSHOTS.get((root, exclude))
+    if snapshot is None:
+        snapshot = _SNAPSHOTS[(root, exclude)] = WorkspaceSnapshot(root, exclude)
+    return snapshot
+
+
+def notify_file_changed(full_path: Union[str, Path]):
+    """Tell every snapshot containing ``full_path`` that the file was written"""
+    full_path = os.path.abspath(str(full_path))
+    for (root, _), snapshot in _SNAPSHOTS.items():
+        if full_path.startswith(root.rstrip(os.sep) + os.sep):
+            snapshot.notify_file_changed(full_path)
+
+
+def mark_snapshots_stale():
+    """Request a full stat pass from every snapshot"""
+    for snapshot in _SNAPSHOTS.values():
+        snapshot.mark_stale()
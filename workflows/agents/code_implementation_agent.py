@@ -66,6 +66,7 @@ class CodeImplementationAgent:
             "important_constraints": [],
             "architecture_notes": [],
             "dependency_analysis": [],  # Track dependency analysis and file reads
+            "file_edits": [],  # Track apply_edits changes to existing files
         }
         self.files_implemented_count = 0
         self.implemented_files_set = (
@@ -114,6 +115,12 @@ class CodeImplementationAgent:
         self.llm_client = None  # Will be set externally
         self.llm_client_type = None  # Will be set externally
 
+        # Reference packs prefetched for planned files (target file -> pack)
+        # and the search arguments they were resolved with
+        self.reference_packs = {}
+        self.reference_packs_indexes_path = None
+        self.reference_packs_max_results = None
+
         # Log read tools configuration
         read_tools_status = "ENABLED" if self.enable_read_tools else "DISABLED"
         self.logger.info(
@@ -151,6 +158,72 @@ class CodeImplementationAgent:
         self.llm_client_type = llm_client_type
         self.logger.info("Memory agent integration configured")
 
+    def set_reference_packs(
+        self,
+        reference_packs: Dict[str, Dict[str, Any]],
+        indexes_path: str,
+        max_results: int,
+    ):
+        """
+        Set reference packs prefetched with search_code_references_batch
+
+        Args:
+            reference_packs: Mapping from target file path to its reference pack
+            indexes_path: Indexes directory the packs were resolved from
+            max_results: Maximum number of results per pack
+        """
+        self.reference_packs = {
+            self._normalize_reference_target(target_file): pack
+            for target_file, pack in reference_packs.items()
+        }
+        self.reference_packs_indexes_path = os.path.realpath(indexes_path)
+        self.reference_packs_max_results = max_results
+        self.logger.info(
+            f"Reference packs prefetched for {len(self.reference_packs)} files"
+        )
+
+    @staticmethod
+    def _normalize_reference_target(target_file: str) -> str:
+        """Normalize a target file path for reference pack lookups"""
+        normalized = target_file.replace("\\", "/").strip()
+        while normalized.startswith("./"):
+            normalized = normalized[2:]
+        return normalized.strip("/")
+
+    def _get_prefetched_reference_result(self, tool_input: Dict) -> Optional[str]:
+        """
+        Serve a search_code_references call from the prefetched packs
+
+        Packs are resolved without keywords from one indexes directory with
+        one result limit; calls with keywords, another directory or another
+        limit still go to the MCP server.
+        """
+        if not self.reference_packs or tool_input.get("keywords"):
+            return None
+        if (
+            os.path.realpath(tool_input.get("indexes_path") or "")
+            != self.reference_packs_indexes_path
+            or tool_input.get("max_results", 10) != self.reference_packs_max_results
+        ):
+            return None
+
+        target_file = tool_input.get("target_file", "")
+        pack = self.reference_packs.get(self._normalize_reference_target(target_file))
+        if pack is None:
+            return None
+
+        return json.dumps(
+            {
+                "status": "success",
+                "target_file": target_file,
+                "indexes_path": tool_input.get("indexes_path", ""),
+                **pack,
+                "prefetched": True,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+
     async def execute_tool_calls(self, tool_calls: List[Dict]) -> List[Dict]:
         """
         Execute MCP tool calls and track implementation progress
@@ -198,6 +271,22 @@ class CodeImplementationAgent:
 
                 # read_code_mem is now a proper MCP tool, no special handling needed
 
+                # Serve reference lookups from the prefetched packs when possible
+                if tool_name == "search_code_references":
+                    prefetched_result = self._get_prefetched_reference_result(
+                        tool_input
+                    )
+                    if prefetched_result is not None:
+                        self._track_tool_call_for_loop_detection(tool_name)
+                        results.append(
+                            {
+                                "tool_id": tool_call["id"],
+                                "tool_name": tool_name,
+                                "result": prefetched_result,
+                            }
+                        )
+                        continue
+
                 # INTERCEPT read_file calls - redirect to read_code_mem first if memory agent is available
                 if tool_name == "read_file":
                     file_path = tool_call["input"].get("file_path", "unknown")
@@ -233,6 +322,8 @@ class CodeImplementationAgent:
                         await self._track_file_implementation_with_summary(
                             tool_call, result
                         )
+                    elif tool_name == "apply_edits":
+                        self._track_file_edits(tool_call, result)
                     elif tool_name == "read_file":
                         self._track_dependency_analysis(tool_call, result)
 
@@ -545,6 +636,51 @@ class CodeImplementationAgent:
                     f"File implementation counted (emergency fallback): count={self.files_implemented_count}, file={file_path}"
                 )
 
+    def _track_file_edits(self, tool_call: Dict, result: Any):
+        """
+        Track files changed through apply_edits the same way as write_file
+        """
+        try:
+            # Handle different result types from MCP
+            if hasattr(result, "content"):
+                if hasattr(result.content, "text"):
+                    result_content = result.content.text
+                elif isinstance(result.content, list) and result.content:
+                    result_content = getattr(result.content[0], "text", "")
+                else:
+                    result_content = str(result.content)
+                result_data = json.loads(result_content)
+            elif isinstance(result, str):
+                result_data = json.loads(result)
+            else:
+                result_data = result
+
+            if (
+                not isinstance(result_data, dict)
+                or result_data.get("status") != "success"
+                or result_data.get("dry_run")
+            ):
+                return
+
+            for file_path, file_result in result_data.get("files", {}).items():
+                self.implementation_summary["file_edits"].append(
+                    {
+                        "file": file_path,
+                        "timestamp": time.time(),
+                        "edits_applied": file_result.get("edits_applied", 0),
+                        "lines_added": file_result.get("lines_added", 0),
+                        "lines_removed": file_result.get("lines_removed", 0),
+                    }
+                )
+                # Edited files count as implemented, exactly like written ones
+                self._track_file_implementation(
+                    {"id": tool_call.get("id"), "input": {"file_path": file_path}},
+                    {"status": "success", "file_path": file_path},
+                )
+
+        except Exception as e:
+            self.logger.warning(f"Failed to track file edits: {e}")
+
     def _track_dependency_analysis(self, tool_call: Dict, result: Any):
         """
         Track dependency analysis through read_file calls
@@ -791,6 +927,7 @@ class CodeImplementationAgent:
                 self.implementation_summary["dependency_analysis"]
             ),
             "files_read_for_dependencies": len(self.files_read_for_dependencies),
+            "file_edits_count": len(self.implementation_summary["file_edits"]),
             "unique_files_implemented": len(self.implemented_files_set),
             "completed_files_list": [
                 f["file"] for f in self.implementation_summary["completed_files"]
@@ -824,6 +961,7 @@ class CodeImplementationAgent:
             "important_constraints": [],
             "architecture_notes": [],
             "dependency_analysis": [],  # Reset dependency analysis and file reads
+            "file_edits": [],  # Reset apply_edits changes
         }
         self.files_implemented_count = 0
         self.implemented_files_set = (
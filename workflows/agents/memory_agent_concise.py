@@ -23,6 +23,9 @@ import time
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+from utils.workspace_snapshot import get_workspace_snapshot
+from utils.tool_result_shaping import shape_tool_result, tool_result_text
+
 
 class ConciseMemoryAgent:
     """
@@ -89,6 +92,10 @@ class ConciseMemoryAgent:
             self.save_path, "generate_code"
         )
 
+        # Code files of the generated directory, cached per snapshot version
+        self._directory_files = []
+        self._directory_files_version = None
+
         # Extract all files - prioritize generated directory over plan parsing
         self.all_files_list = self._extract_all_files()
 
@@ -258,37 +265,34 @@ class ConciseMemoryAgent:
         }
 
         try:
-            for root, dirs, files in os.walk(self.code_directory):
-                # Filter out excluded directories
-                dirs[:] = [
-                    d
-                    for d in dirs
-                    if d not in exclude_patterns and not d.startswith(".")
-                ]
-
-                for file in files:
-                    # Skip hidden files and excluded patterns
-                    if file.startswith("."):
-                        continue
-
-                    # Check if file has a code extension
-                    has_code_ext = any(
-                        file.lower().endswith(ext) for ext in code_extensions
-                    )
-                    if not has_code_ext:
-                        continue
-
-                    # Get full path and convert to relative path
-                    full_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(full_path, self.code_directory)
+            # The shared workspace snapshot only re-lists directories whose
+            # mtime changed, so unchanged trees cost one stat per directory
+            snapshot = get_workspace_snapshot(self.code_directory, exclude_patterns)
+            snapshot.refresh()
+            if snapshot.version == self._directory_files_version:
+                return list(self._directory_files)
+
+            # Excluded and hidden directories are pruned by the snapshot
+            for relative_path in snapshot.file_paths():
+                file = relative_path.rpartition("/")[2]
+
+                # Skip hidden files and excluded patterns
+                if file.startswith("."):
+                    continue
 
-                    # Normalize path separators
-                    relative_path = relative_path.replace(os.sep, "/")
+                # Check if file has a code extension
+                has_code_ext = any(
+                    file.lower().endswith(ext) for ext in code_extensions
+                )
+                if not has_code_ext:
+                    continue
 
-                    code_files.append(relative_path)
+                code_files.append(relative_path)
 
-            # Sort for consistency
-            code_files = sorted(code_files)
+            # Snapshot paths are already sorted
+            self._directory_files = code_files
+            self._directory_files_version = snapshot.version
+            code_files = list(code_files)
 
             if code_files:
                 self.logger.info(f"📄 Found {len(code_files)} code files in directory")
@@ -1778,19 +1782,19 @@ Write_file can be used to implement the new component
                 file_path = tool_input.get("file_path", "unknown")
                 formatted_results.append(f"""
 **read_code_mem Result for {file_path}:**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "read_file":
                 file_path = tool_input.get("file_path", "unknown")
                 formatted_results.append(f"""
 **read_file Result for {file_path}:**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "write_file":
                 file_path = tool_input.get("file_path", "unknown")
                 formatted_results.append(f"""
 **write_file Result for {file_path}:**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "execute_python":
                 code_snippet = (
@@ -1800,27 +1804,27 @@ Write_file can be used to implement the new component
                 )
                 formatted_results.append(f"""
 **execute_python Result (code: {code_snippet}):**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "execute_bash":
                 command = tool_input.get("command", "unknown")
                 formatted_results.append(f"""
 **execute_bash Result (command: {command}):**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "search_code":
                 pattern = tool_input.get("pattern", "unknown")
                 file_pattern = tool_input.get("file_pattern", "")
                 formatted_results.append(f"""
 **search_code Result (pattern: {pattern}, files: {file_pattern}):**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "search_reference_code":
                 target_file = tool_input.get("target_file", "unknown")
                 keywords = tool_input.get("keywords", "")
                 formatted_results.append(f"""
 **search_reference_code Result for {target_file} (keywords: {keywords}):**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "get_file_structure":
                 directory = tool_input.get(
@@ -1828,21 +1832,23 @@ Write_file can be used to implement the new component
                 )
                 formatted_results.append(f"""
 **get_file_structure Result for {directory}:**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
 
         return "\n".join(formatted_results)
 
-    def _format_tool_result_content(self, tool_result: Any) -> str:
+    def _format_tool_result_content(self, tool_result: Any, tool_name: str = "") -> str:
         """
-        Format tool result content for display
+        Format tool result content for display, within the tool's token budget
 
         Args:
             tool_result: Tool result to format
+            tool_name: Tool that produced the result
 
         Returns:
             Formatted string representation
         """
+        tool_result = tool_result_text(tool_result)
         if isinstance(tool_result, str):
             # Try to parse as JSON for better formatting
             try:
@@ -1855,14 +1861,9 @@ Write_file can be used to implement the new component
                         )
                     elif result_data.get("status") == "no_summary":
                         return "No summary available"
-                    else:
-                        return json.dumps(result_data, indent=2)
-                else:
-                    return str(result_data)
             except json.JSONDecodeError:
-                return tool_result
-        else:
-            return str(tool_result)
+                pass
+        return shape_tool_result(tool_name, tool_result)
 
     def get_memory_statistics(self, files_implemented: int = 0) -> Dict[str, Any]:
         """Get memory agent statistics"""
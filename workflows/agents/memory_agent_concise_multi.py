@@ -19,13 +19,14 @@ Key Features:
 - FILE TRACKING: Gets ALL file information from workflow, no internal tracking
 """
 
-import json
 import logging
 import os
 import time
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+from utils.tool_result_shaping import shape_tool_result
+
 
 class ConciseMemoryAgent:
     """
@@ -1044,12 +1045,12 @@ class ConciseMemoryAgent:
                 file_requests = tool_input.get("file_requests", "unknown")
                 formatted_results.append(f"""
 **read_multiple_files Result for {file_requests}:**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "write_multiple_files":
                 formatted_results.append(f"""
 **write_multiple_files Result for batch:**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "execute_python":
                 code_snippet = (
@@ -1059,27 +1060,27 @@ class ConciseMemoryAgent:
                 )
                 formatted_results.append(f"""
 **execute_python Result (code: {code_snippet}):**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "execute_bash":
                 command = tool_input.get("command", "unknown")
                 formatted_results.append(f"""
 **execute_bash Result (command: {command}):**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "search_code":
                 pattern = tool_input.get("pattern", "unknown")
                 file_pattern = tool_input.get("file_pattern", "")
                 formatted_results.append(f"""
 **search_code Result (pattern: {pattern}, files: {file_pattern}):**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "search_reference_code":
                 target_file = tool_input.get("target_file", "unknown")
                 keywords = tool_input.get("keywords", "")
                 formatted_results.append(f"""
 **search_reference_code Result for {target_file} (keywords: {keywords}):**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
             elif tool_name == "get_file_structure":
                 directory = tool_input.get(
@@ -1087,37 +1088,23 @@ class ConciseMemoryAgent:
                 )
                 formatted_results.append(f"""
 **get_file_structure Result for {directory}:**
-{self._format_tool_result_content(tool_result)}
+{self._format_tool_result_content(tool_result, tool_name)}
 """)
 
         return "\n".join(formatted_results)
 
-    def _format_tool_result_content(self, tool_result: Any) -> str:
+    def _format_tool_result_content(self, tool_result: Any, tool_name: str = "") -> str:
         """
-        Format tool result content for display
+        Format tool result content for display, within the tool's token budget
 
         Args:
             tool_result: Tool result to format
+            tool_name: Tool that produced the result
 
         Returns:
             Formatted string representation
         """
-        if isinstance(tool_result, str):
-            # Try to parse as JSON for better formatting
-            try:
-                result_data = json.loads(tool_result)
-                if isinstance(result_data, dict):
-                    # Format key information
-                    if result_data.get("status") == "success":
-                        return json.dumps(result_data, indent=2)
-                    else:
-                        return json.dumps(result_data, indent=2)
-                else:
-                    return str(result_data)
-            except json.JSONDecodeError:
-                return tool_result
-        else:
-            return str(tool_result)
+        return shape_tool_result(tool_name, tool_result)
 
     def get_memory_statistics(
         self, all_files: List[str] = None, implemented_files: List[str] = None
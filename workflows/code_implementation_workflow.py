@@ -34,6 +34,7 @@ from workflows.agents import CodeImplementationAgent
 from workflows.agents.memory_agent_concise import ConciseMemoryAgent
 from config.mcp_tool_definitions import get_mcp_tools
 from utils.llm_utils import get_preferred_llm_class, get_default_models
+from utils.tool_result_shaping import shape_tool_result
 # DialogueLogger removed - no longer needed
 
 
@@ -1330,7 +1331,7 @@ Requirements:
             response_parts.append("🔧 **Tool Execution Results:**")
             for tool_result in tool_results:
                 tool_name = tool_result["tool_name"]
-                result_content = tool_result["result"]
+                result_content = shape_tool_result(tool_name, tool_result["result"])
                 response_parts.append(
                     f"```\nTool: {tool_name}\nResult: {result_content}\n```"
                 )
@@ -1377,6 +1378,10 @@ Requirements:
                         file_path = item.get("details", {}).get("file_path", "unknown")
                         files_created.append(file_path)
 
+            # Lifetime counters kept by the server (the history is only the recent tail)
+            operation_stats = history_data.get("stats", {})
+            write_operations = operation_stats.get("total_writes", write_operations)
+
             report = f"""
 # Pure Code Implementation Completion Report (Write-File-Based Memory Mode)
 
@@ -1385,6 +1390,7 @@ Requirements:
 - Total elapsed time: {elapsed_time:.2f} seconds
 - Files implemented: {code_stats['total_files_implemented']}
 - File write operations: {write_operations}
+- Code executions: {operation_stats.get('executions', 0)} (failure rate: {operation_stats.get('execution_failure_rate', 0.0):.0%})
 - Total MCP operations: {history_data.get('total_operations', 0)}
 
 ## Read Tools Configuration
@@ -34,6 +34,7 @@ from workflows.agents import CodeImplementationAgent
 from workflows.agents.memory_agent_concise import ConciseMemoryAgent
 from config.mcp_tool_definitions_index import get_mcp_tools
 from utils.llm_utils import get_preferred_llm_class, get_default_models
+from utils.tool_result_shaping import shape_tool_result
 # DialogueLogger removed - no longer needed
 
 
@@ -312,6 +313,17 @@ Requirements:
             code_directory,
         )
 
+        # Prefetch reference packs for every planned file in one lookup
+        indexes_path = os.path.join(target_directory, "indexes")
+        max_results = 10
+        code_agent.set_reference_packs(
+            await self._prefetch_reference_packs(
+                memory_agent.get_unimplemented_files(), indexes_path, max_results
+            ),
+            indexes_path,
+            max_results,
+        )
+
         # Log read tools configuration
         read_tools_status = "ENABLED" if self.enable_read_tools else "DISABLED"
         self.logger.info(
@@ -485,6 +497,46 @@ Requirements:
                 self.mcp_agent = None
             raise
 
+    async def _prefetch_reference_packs(
+        self, target_files: List[str], indexes_path: str, max_results: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """Resolve reference packs for all planned files with one batch tool call"""
+        if not target_files or not self.mcp_agent or not os.path.isdir(indexes_path):
+            return {}
+
+        try:
+            result = await self.mcp_agent.call_tool(
+                "search_code_references_batch",
+                {
+                    "indexes_path": indexes_path,
+                    "target_files": json.dumps(target_files),
+                    "max_results": max_results,
+                    "persist_results": True,
+                },
+            )
+
+            # Extract text from CallToolResult objects
+            if hasattr(result, "content"):
+                result = "".join(
+                    getattr(item, "text", "") for item in result.content or []
+                )
+            result_data = json.loads(result) if isinstance(result, str) else result
+
+            if result_data.get("status") != "success":
+                self.logger.warning(
+                    f"Reference prefetch skipped: {result_data.get('message')}"
+                )
+                return {}
+
+            reference_packs = result_data.get("results", {})
+            self.logger.info(
+                f"📚 Prefetched reference packs for {len(reference_packs)} planned files"
+            )
+            return reference_packs
+        except Exception as e:
+            self.logger.warning(f"Reference prefetch failed: {e}")
+            return {}
+
     async def _cleanup_mcp_agent(self):
         """Clean up MCP agent resources"""
         if self.mcp_agent:
@@ -1226,7 +1278,7 @@ Requirements:
         all_tools = get_mcp_tools("code_implementation")
 
         # Define essential tools for code implementation
-        essential_tool_names = {"write_file", "search_code_references"}
+        essential_tool_names = {"write_file", "apply_edits", "search_code_references"}
 
         # Filter to only essential tools
         filtered_tools = [
@@ -1353,7 +1405,7 @@ Requirements:
             response_parts.append("🔧 **Tool Execution Results:**")
             for tool_result in tool_results:
                 tool_name = tool_result["tool_name"]
-                result_content = tool_result["result"]
+                result_content = shape_tool_result(tool_name, tool_result["result"])
                 response_parts.append(
                     f"```\nTool: {tool_name}\nResult: {result_content}\n```"
                 )
@@ -1400,6 +1452,10 @@ Requirements:
                         file_path = item.get("details", {}).get("file_path", "unknown")
                         files_created.append(file_path)
 
+            # Lifetime counters kept by the server (the history is only the recent tail)
+            operation_stats = history_data.get("stats", {})
+            write_operations = operation_stats.get("total_writes", write_operations)
+
             report = f"""
 # Pure Code Implementation Completion Report (Write-File-Based Memory Mode)
 
@@ -1408,6 +1464,7 @@ Requirements:
 - Total elapsed time: {elapsed_time:.2f} seconds
 - Files implemented: {code_stats['total_files_implemented']}
 - File write operations: {write_operations}
+- Code executions: {operation_stats.get('executions', 0)} (failure rate: {operation_stats.get('execution_failure_rate', 0.0):.0%})
 - Total MCP operations: {history_data.get('total_operations', 0)}
 
 ## Read Tools Configuration
@@ -386,6 +386,8 @@ project/
                 "max_concurrent_files": 3,
                 "enable_content_caching": True,
                 "max_cache_size": 100,
+                "enable_persistent_cache": True,
+                "enable_incremental_indexing": True,
             },
             "debug": {
                 "verbose_output": True,
@@ -491,6 +493,24 @@ project/
                 self.indexer.max_content_length = file_config.get(
                     "max_content_length", self.indexer.max_content_length
                 )
+                self.indexer.enable_static_analysis = file_config.get(
+                    "enable_static_analysis", self.indexer.enable_static_analysis
+                )
+                self.indexer.skeleton_min_chars = file_config.get(
+                    "skeleton_min_chars", self.indexer.skeleton_min_chars
+                )
+                self.indexer.pre_filter_mode = file_config.get(
+                    "pre_filter_mode", self.indexer.pre_filter_mode
+                )
+                self.indexer.pre_filter_top_k = file_config.get(
+                    "pre_filter_top_k", self.indexer.pre_filter_top_k
+                )
+                self.indexer.pre_filter_rerank_top_k = file_config.get(
+                    "pre_filter_rerank_top_k", self.indexer.pre_filter_rerank_top_k
+                )
+                self.indexer.pre_filter_content_bytes = file_config.get(
+                    "pre_filter_content_bytes", self.indexer.pre_filter_content_bytes
+                )
 
             if "llm" in indexer_config:
                 llm_config = indexer_config["llm"]
@@ -512,6 +532,9 @@ project/
                 self.indexer.retry_delay = llm_config.get(
                     "retry_delay", self.indexer.retry_delay
                 )
+                self.indexer.analysis_mode = llm_config.get(
+                    "analysis_mode", self.indexer.analysis_mode
+                )
 
             if "relationships" in indexer_config:
                 rel_config = indexer_config["relationships"]
@@ -534,12 +557,49 @@ project/
                 self.indexer.max_concurrent_files = perf_config.get(
                     "max_concurrent_files", self.indexer.max_concurrent_files
                 )
+                self.indexer.max_concurrent_repositories = perf_config.get(
+                    "max_concurrent_repositories",
+                    self.indexer.max_concurrent_repositories,
+                )
                 self.indexer.enable_content_caching = perf_config.get(
                     "enable_content_caching", self.indexer.enable_content_caching
                 )
                 self.indexer.max_cache_size = perf_config.get(
                     "max_cache_size", self.indexer.max_cache_size
                 )
+                self.indexer.enable_persistent_cache = perf_config.get(
+                    "enable_persistent_cache", self.indexer.enable_persistent_cache
+                )
+                self.indexer.persistent_cache_path = perf_config.get(
+                    "persistent_cache_path", self.indexer.persistent_cache_path
+                )
+                self.indexer.persistent_cache_max_entries = perf_config.get(
+                    "persistent_cache_max_entries",
+                    self.indexer.persistent_cache_max_entries,
+                )
+                self.indexer.persistent_cache_max_size_mb = perf_config.get(
+                    "persistent_cache_max_size_mb",
+                    self.indexer.persistent_cache_max_size_mb,
+                )
+                self.indexer.enable_incremental_indexing = perf_config.get(
+                    "enable_incremental_indexing",
+                    self.indexer.enable_incremental_indexing,
+                )
+                self.indexer.enable_index_journal = perf_config.get(
+                    "enable_index_journal", self.indexer.enable_index_journal
+                )
+                self.indexer.enable_batch_analysis = perf_config.get(
+                    "enable_batch_analysis", self.indexer.enable_batch_analysis
+                )
+                self.indexer.batch_max_file_size = perf_config.get(
+                    "batch_max_file_size", self.indexer.batch_max_file_size
+                )
+                self.indexer.batch_token_budget = perf_config.get(
+                    "batch_token_budget", self.indexer.batch_token_budget
+                )
+                self.indexer.batch_max_files = perf_config.get(
+                    "batch_max_files", self.indexer.batch_max_files
+                )
 
             if "debug" in indexer_config:
                 debug_config = indexer_config["debug"]